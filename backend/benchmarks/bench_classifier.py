@@ -0,0 +1,258 @@
+"""
+Per-task cost of TaskClassifier.classify and each of its stages.
+
+Runs every stage over a seeded synthetic corpus of short, medium and
+maximum-length (2,000-character) descriptions and reports throughput and
+p50/p95/p99 latency per stage and length. Stages are called on their own,
+as a caller without precomputed keyword hits would, so _detect_category,
+_assign_priority and _extract_actions each include the keyword scan that
+classify() shares between them. classify() runs with the memo disabled,
+so every call does the full work.
+
+Results can be written as JSON. With --compare, the run is checked against
+a stored baseline and exits with status 1 if any stage got slower than
+--threshold allows, for use as a regression gate. The gate compares the
+median of each benchmark's fastest round by default, which shrugs off
+rounds slowed down by other processes; record the baseline on the same
+machine.
+
+Usage:
+    python -m benchmarks.bench_classifier --output baseline.json
+    python -m benchmarks.bench_classifier --compare baseline.json --threshold 0.15
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.classifier import TaskClassifier
+
+
+# Description lengths in characters; 2,000 is the most CreateTaskRequest accepts
+LENGTHS = {"short": 60, "medium": 400, "max": 2000}
+
+METRICS = ("best_p50_us", "p50_us", "p95_us", "p99_us", "mean_us")
+
+NAMES = ["Sarah", "John", "Alex", "Priya", "Marco", "Chen"]
+PLACES = ["Main Office", "Board Room 4B", "Warehouse", "Building C", "Head Office"]
+DATES = ["today", "tomorrow", "next week", "Friday", "12/31/2024", "Jan 15", "03-04-25"]
+FILLER = [
+    "the", "team", "project", "notes", "update", "client", "draft", "plan",
+    "status", "follow", "details", "before", "after", "quarterly", "shared",
+]
+
+# (title, description, due_date)
+Item = Tuple[str, str, Any]
+
+
+def build_corpus(size: int, length: int, seed: int) -> List[Item]:
+    """
+    Synthetic tasks mixing keywords, names, places, dates and filler.
+    
+    Vocabulary is drawn from the classifier's own tables so that every
+    category, priority and action verb is hit somewhere.
+    """
+    rng = random.Random(seed)
+    keywords = [
+        keyword
+        for table in (TaskClassifier.CATEGORY_KEYWORDS, TaskClassifier.PRIORITY_KEYWORDS)
+        for words in table.values()
+        for keyword in words
+    ]
+    now = datetime.now(timezone.utc)
+    corpus = []
+    for _ in range(size):
+        title = f"{rng.choice(TaskClassifier.ACTION_VERBS).capitalize()} {rng.choice(keywords)}"
+        words = []
+        while sum(len(word) + 1 for word in words) < length:
+            roll = rng.random()
+            if roll < 0.15:
+                words.append(rng.choice(keywords))
+            elif roll < 0.2:
+                words.append(rng.choice(TaskClassifier.ACTION_VERBS))
+            elif roll < 0.25:
+                words.extend(["with", rng.choice(NAMES)])
+            elif roll < 0.3:
+                words.extend(["at", rng.choice(PLACES)])
+            elif roll < 0.35:
+                words.extend(["by", rng.choice(DATES)])
+            else:
+                words.append(rng.choice(FILLER))
+        description = " ".join(words)[:length]
+        due_date = now + timedelta(hours=rng.randint(-48, 24 * 14)) if rng.random() < 0.5 else None
+        corpus.append((title, description, due_date))
+    return corpus
+
+
+def stages(classifier: TaskClassifier) -> Dict[str, Callable[[Item], Any]]:
+    """The measured calls, each taking one corpus item."""
+    def lowered(item: Item) -> str:
+        return f"{item[0]} {item[1]}".lower()
+    
+    def combined(item: Item) -> str:
+        return f"{item[0]} {item[1]}"
+    
+    return {
+        "_scan_keywords": lambda item: classifier._scan_keywords(lowered(item)),
+        "_detect_category": lambda item: classifier._detect_category(lowered(item)),
+        "_assign_priority": lambda item: classifier._assign_priority(lowered(item), item[2]),
+        "_extract_dates": lambda item: classifier._extract_dates(combined(item)),
+        "_extract_people": lambda item: classifier._extract_people(combined(item)),
+        "_extract_locations": lambda item: classifier._extract_locations(combined(item)),
+        "_extract_actions": lambda item: classifier._extract_actions(item[0], item[1]),
+        "classify": lambda item: classifier.classify(*item),
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(fn: Callable[[Item], Any], corpus: List[Item], rounds: int) -> Dict[str, float]:
+    """Time every call individually; garbage collection is paused meanwhile."""
+    for item in corpus:
+        fn(item)
+    
+    samples = []
+    round_medians = []
+    clock = time.perf_counter_ns
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            round_samples = []
+            for item in corpus:
+                started = clock()
+                fn(item)
+                round_samples.append(clock() - started)
+            round_medians.append(percentile(sorted(round_samples), 0.50))
+            samples.extend(round_samples)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    
+    samples.sort()
+    total_seconds = sum(samples) / 1e9
+    return {
+        "calls": len(samples),
+        "ops_per_sec": len(samples) / total_seconds if total_seconds else 0.0,
+        "p50_us": percentile(samples, 0.50) / 1e3,
+        "p95_us": percentile(samples, 0.95) / 1e3,
+        "p99_us": percentile(samples, 0.99) / 1e3,
+        "mean_us": total_seconds / len(samples) * 1e6,
+        # Median of the least disturbed round; the steadiest figure on a busy machine
+        "best_p50_us": min(round_medians) / 1e3,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    classifier = TaskClassifier(memo_size=0)
+    measured = stages(classifier)
+    selected = args.stages or list(measured)
+    unknown = set(selected) - set(measured)
+    if unknown:
+        raise SystemExit(f"Unknown stages: {', '.join(sorted(unknown))}")
+    
+    results = {}
+    for length_name in args.lengths:
+        corpus = build_corpus(args.corpus_size, LENGTHS[length_name], args.seed)
+        for stage in selected:
+            results[f"{stage}/{length_name}"] = measure(measured[stage], corpus, args.rounds)
+    
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "corpus_size": args.corpus_size,
+            "rounds": args.rounds,
+            "lengths": {name: LENGTHS[name] for name in args.lengths},
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    metric: str,
+    threshold: float,
+    min_delta_us: float
+) -> List[str]:
+    """
+    Benchmarks whose metric grew by more than threshold over the baseline.
+    
+    Growth below min_delta_us microseconds is treated as noise whatever
+    the ratio. Benchmarks missing from either run are not compared.
+    """
+    regressions = []
+    print(f"{'benchmark':<28} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<28} {'-':>10} {result[metric]:>10.2f} {'new':>8}")
+            continue
+        old, new = before[metric], result[metric]
+        change = (new - old) / old if old else 0.0
+        regressed = change > threshold and new - old > min_delta_us
+        if regressed:
+            regressions.append(name)
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<28} {old:>10.2f} {new:>10.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def print_results(report: Dict[str, Any]):
+    print(f"{'benchmark':<28} {'ops/s':>10} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    for name, result in report["results"].items():
+        print(
+            f"{name:<28} {result['ops_per_sec']:>10.0f} {result['p50_us']:>9.2f} "
+            f"{result['p95_us']:>9.2f} {result['p99_us']:>9.2f}"
+        )
+
+
+def main(args: argparse.Namespace) -> int:
+    report = run(args)
+    print_results(report)
+    
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as stored:
+            baseline = json.load(stored)
+        if baseline["meta"].get("seed") != args.seed:
+            print("warning: baseline was recorded with another seed", file=sys.stderr)
+        print(f"\n{args.metric} against {args.compare} (threshold {args.threshold:.0%})")
+        regressions = compare(baseline, report, args.metric, args.threshold, args.min_delta_us)
+        if regressions:
+            print(f"\n{len(regressions)} regressed: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus-size", type=int, default=500, help="Tasks per description length")
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the corpus per stage")
+    parser.add_argument("--seed", type=int, default=7, help="Corpus seed")
+    parser.add_argument("--lengths", nargs="+", choices=list(LENGTHS), default=list(LENGTHS))
+    parser.add_argument("--stages", nargs="+", help="Only these stages (default: all)")
+    parser.add_argument("--output", help="Write the results as JSON here")
+    parser.add_argument("--compare", help="Baseline JSON to check the results against")
+    parser.add_argument("--metric", choices=METRICS, default="best_p50_us", help="Latency compared")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown, as a fraction")
+    parser.add_argument(
+        "--min-delta-us", type=float, default=0.5,
+        help="Slowdowns smaller than this many microseconds are ignored"
+    )
+    sys.exit(main(parser.parse_args()))
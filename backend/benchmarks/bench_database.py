@@ -0,0 +1,121 @@
+"""
+Database service benchmarks against a client stand-in with fixed latency.
+
+Two measurements, both through SupabaseStorage with a client whose execute()
+sleeps like a PostgREST round trip:
+
+- throughput: requests/second for task reads at increasing concurrency. With
+  queries offloaded to the thread pool, throughput grows with concurrency
+  until the pool size is reached.
+- patch: p50 latency and round trips per DatabaseService.update_task call.
+
+Usage:
+    python -m benchmarks.bench_database --latency 0.02 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from src.database import DatabaseService  # noqa: E402
+from src.models import UpdateTaskRequest, TaskStatus  # noqa: E402
+from src.storage import SupabaseStorage  # noqa: E402
+
+
+TASK_ROW = {
+    "id": "00000000-0000-0000-0000-000000000001",
+    "title": "Benchmark task",
+    "description": "Fixed row returned by the stand-in client",
+    "category": "general",
+    "priority": "low",
+    "status": "pending",
+    "assigned_to": None,
+    "due_date": None,
+    "extracted_entities": {},
+    "suggested_actions": [],
+    "created_at": "2025-01-01T00:00:00+00:00",
+    "updated_at": "2025-01-01T00:00:00+00:00",
+}
+
+
+class LatencyQuery:
+    """Query builder stand-in that sleeps in execute() like a network call."""
+    
+    def __init__(self, client: "LatencyClient", data):
+        self.client = client
+        self.data = data
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+    
+    def execute(self):
+        self.client.round_trips += 1
+        time.sleep(self.client.latency)
+        return SimpleNamespace(data=self.data, count=len(self.data))
+
+
+class LatencyClient:
+    """Supabase client stand-in with a fixed per-query latency."""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.round_trips = 0
+    
+    def table(self, name: str) -> LatencyQuery:
+        return LatencyQuery(self, [dict(TASK_ROW)])
+    
+    def rpc(self, name: str, params: dict) -> LatencyQuery:
+        return LatencyQuery(self, {"task": dict(TASK_ROW), "action": "updated", "previous": {}})
+
+
+async def run_level(service: DatabaseService, concurrency: int, requests: int) -> float:
+    """Issue `requests` reads with at most `concurrency` in flight; return RPS."""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(i: int):
+        async with semaphore:
+            await service.get_task(str(i))
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def measure_patch(service: DatabaseService, client: LatencyClient, requests: int):
+    """Return (p50 seconds, round trips per call) for sequential PATCHes."""
+    update = UpdateTaskRequest(status=TaskStatus.IN_PROGRESS)
+    client.round_trips = 0
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await service.update_task(TASK_ROW["id"], update)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), client.round_trips / requests
+
+
+async def main(args: argparse.Namespace):
+    client = LatencyClient(args.latency)
+    service = DatabaseService(SupabaseStorage(client=client, max_workers=args.workers))
+    
+    print(f"latency={args.latency * 1000:.0f}ms pool={args.workers} requests={args.requests}")
+    print(f"{'concurrency':>12} {'req/s':>10}")
+    for concurrency in args.levels:
+        rps = await run_level(service, concurrency, args.requests)
+        print(f"{concurrency:>12} {rps:>10.1f}")
+    
+    p50, round_trips = await measure_patch(service, client, min(args.requests, 50))
+    print(f"\nPATCH p50 {p50 * 1000:.1f}ms, {round_trips:.0f} round trip(s) per update")
+    service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per query")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level")
+    parser.add_argument("--workers", type=int, default=16, help="Thread pool size")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,143 @@
+"""
+Per-task entity extraction cost, before and after fusing the patterns.
+
+"Before" is the original implementation that rebuilt its pattern lists and
+ran one re.findall per pattern (16 date, 4 people and 3 location scans);
+"after" is TaskClassifier's precompiled single-pass-per-family extraction.
+Both run on a 2,000-character description, the largest CreateTaskRequest
+accepts. Before timing, the benchmark checks that they find the same
+entities on that description, on known edge cases and on --fuzz random
+texts built from overlapping dates, places and names, and exits with
+status 1 on the first difference.
+
+Usage:
+    python -m benchmarks.bench_entity_extraction --number 2000 --fuzz 200000
+"""
+import argparse
+import random
+import re
+import sys
+import timeit
+
+from src.classifier import TaskClassifier
+
+
+SENTENCE = (
+    "Meet with Sarah at Main Office tomorrow, then review the invoice by Friday "
+    "in the Board Room 4B. Deadline is 12/31/2024; follow up for Alex on Jan 15. "
+)
+
+
+def legacy_extract(text: str) -> tuple:
+    """The per-pattern extraction this benchmark compares against."""
+    date_patterns = [
+        r'\btoday\b', r'\btomorrow\b', r'\byesterday\b',
+        r'\bthis week\b', r'\bnext week\b', r'\bthis month\b',
+        r'\bmonday\b', r'\btuesday\b', r'\bwednesday\b', r'\bthursday\b',
+        r'\bfriday\b', r'\bsaturday\b', r'\bsunday\b',
+        r'\d{1,2}/\d{1,2}/\d{2,4}',
+        r'\d{1,2}-\d{1,2}-\d{2,4}',
+        r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2}\b'
+    ]
+    dates = []
+    for pattern in date_patterns:
+        dates.extend(re.findall(pattern, text, re.IGNORECASE))
+    
+    name_patterns = [
+        r'\bwith\s+([A-Z][a-z]+)',
+        r'\bby\s+([A-Z][a-z]+)',
+        r'\bassign\s+to\s+([A-Z][a-z]+)',
+        r'\bfor\s+([A-Z][a-z]+)'
+    ]
+    people = []
+    for pattern in name_patterns:
+        people.extend(re.findall(pattern, text))
+    
+    location_patterns = [
+        r'\bat\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+        r'\bin\s+(?:the\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+        r'(?:Room|Office|Building)\s+(\w+)',
+    ]
+    locations = []
+    for pattern in location_patterns:
+        locations.extend(re.findall(pattern, text))
+    
+    return list(set(dates)), list(set(people)), list(set(locations))
+
+
+# Inputs where matches of different patterns overlap or abut
+EDGE_CASES = [
+    "Due Jan 12/31/2024 at noon",
+    "Building Building Dec",
+    "Room Office 5 in the Board Room 4B",
+    "meet at Main Office 4 on 1/2/33-4-55",
+    "with by Sarah for With Alex assign to Bob",
+    "Mon 3-4-2025 tomorrow, friday Mar 1-2-33",
+]
+
+# Fragments the fuzz texts are drawn from
+TOKENS = [
+    "Jan", "Dec", "March", "12", "1", "31", "2024", "/", "-", " ", " ", " ",
+    "12/31/2024", "1-2-33", "today", "Friday", "next week", "this", "week",
+    "at", "in", "the", "with", "by", "for", "assign to", "Room", "Office",
+    "Building", "Main", "Board", "4B", "Sarah", "Alex", "a", "Oat", ",", ".",
+]
+
+
+def fused_extract(classifier: TaskClassifier, text: str) -> tuple:
+    return (
+        classifier._extract_dates(text),
+        classifier._extract_people(text),
+        classifier._extract_locations(text),
+    )
+
+
+def fuzz_texts(count: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 12)))
+
+
+def disagreement(classifier: TaskClassifier, texts) -> tuple:
+    """The first text both implementations do not agree on, with their results."""
+    for text in texts:
+        before = [sorted(values) for values in legacy_extract(text)]
+        after = [sorted(values) for values in fused_extract(classifier, text)]
+        if before != after:
+            return text, before, after
+    return None
+
+
+def main(args: argparse.Namespace) -> int:
+    classifier = TaskClassifier()
+    text = (SENTENCE * (2000 // len(SENTENCE) + 1))[:2000]
+    
+    found = disagreement(
+        classifier, [text, *EDGE_CASES, *fuzz_texts(args.fuzz, args.seed)]
+    )
+    if found:
+        print("implementations disagree on %r:\n  before %s\n  after  %s" % found, file=sys.stderr)
+        return 1
+    print(f"agreement: {1 + len(EDGE_CASES) + args.fuzz} texts")
+    
+    timings = {}
+    for name, fn in (
+        ("before", lambda: legacy_extract(text)),
+        ("after", lambda: fused_extract(classifier, text)),
+    ):
+        best = min(timeit.repeat(fn, number=args.number, repeat=5))
+        timings[name] = best / args.number * 1e6
+    
+    print(f"description length: {len(text)} chars")
+    print(f"before: {timings['before']:8.1f} us/task")
+    print(f"after:  {timings['after']:8.1f} us/task")
+    print(f"speedup: {timings['before'] / timings['after']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=2000, help="Extractions per timing")
+    parser.add_argument("--fuzz", type=int, default=20000, help="Random texts checked for agreement")
+    parser.add_argument("--seed", type=int, default=7, help="Fuzz seed")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""
+Task history storage size, full rows versus delta encoding.
+
+Writes synthetic tasks with a run of single-field updates into SQLite as
+full old/new rows (the pre-delta layout), measures the stored JSON, compacts
+it and measures again, then times reading one page of expanded history.
+
+Usage:
+    python -m benchmarks.bench_history --tasks 1000 --updates 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.bench_search import synthetic_records
+from src.storage import SNAPSHOT_INTERVAL, SQLiteStorage, expand_history
+from src.storage.base import new_id
+
+
+def stored_bytes(storage: SQLiteStorage) -> int:
+    with storage._lock:
+        return storage._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(old_value)), 0) + COALESCE(SUM(LENGTH(new_value)), 0) "
+            "FROM task_history"
+        ).fetchone()[0]
+
+
+async def run(args: argparse.Namespace):
+    storage = SQLiteStorage(":memory:")
+    tasks = await storage.insert_tasks(synthetic_records(args.tasks))
+    
+    rows = []
+    for task in tasks:
+        previous = None
+        for i in range(args.updates + 1):
+            current = dict(task, title=f"{task['title']} v{i}") if i else task
+            rows.append((
+                new_id(), task["id"], "updated" if i else "created",
+                json.dumps(previous) if previous else None, json.dumps(current),
+                f"2024-01-01T00:{i // 60:02}:{i % 60:02}+00:00"
+            ))
+            previous = current
+    with storage._lock:
+        storage._conn.executemany(
+            "INSERT INTO task_history (id, task_id, action, old_value, new_value, changed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+    
+    full = stored_bytes(storage)
+    start = time.perf_counter()
+    while await storage.compact_history(batch_size=500):
+        pass
+    compacted = stored_bytes(storage)
+    compact_seconds = time.perf_counter() - start
+    
+    async def read_page():
+        task_id = tasks[len(tasks) // 2]["id"]
+        return expand_history(await storage.select_history(task_id, limit=20 + SNAPSHOT_INTERVAL))[:20]
+    
+    start = time.perf_counter()
+    for _ in range(args.number):
+        await read_page()
+    page_ms = (time.perf_counter() - start) / args.number * 1e3
+    storage.close()
+    
+    print(f"history rows:       {len(rows)}")
+    print(f"full rows:          {full / 1e6:.1f} MB")
+    print(f"delta encoded:      {compacted / 1e6:.1f} MB ({compacted / full:.0%})")
+    print(f"compaction:         {compact_seconds:.2f} s")
+    print(f"20-entry page:      {page_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=50, help="Updates per task")
+    parser.add_argument("--number", type=int, default=100, help="Page reads per timing")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,59 @@
+"""
+Keyword scanning cost as the vocabulary grows.
+
+Compares one `keyword in text` scan per keyword with the single-pass
+KeywordMatcher on a 2,000-character description, padding the vocabulary
+with synthetic terms to the requested sizes.
+
+Usage:
+    python -m benchmarks.bench_keywords --sizes 60 600 6000
+"""
+import argparse
+import random
+import string
+import timeit
+
+from src.keywords import KeywordMatcher
+
+
+BASE_TEXT = (
+    "Schedule an urgent meeting with Sarah at Main Office to review the "
+    "invoice payment and fix the system error before the safety inspection. "
+)
+
+
+def synthetic_vocabulary(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    words = ["meeting", "invoice", "urgent", "inspection", "error", "payment"]
+    while len(words) < size:
+        words.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))))
+    return words
+
+
+def main(args: argparse.Namespace):
+    text = (BASE_TEXT * (2000 // len(BASE_TEXT) + 1))[:2000].lower()
+    print(f"{'keywords':>9} {'naive us':>10} {'matcher us':>11}")
+    
+    for size in args.sizes:
+        vocabulary = synthetic_vocabulary(size)
+        matcher = KeywordMatcher()
+        for word in vocabulary:
+            matcher.add(word, word)
+        
+        naive = min(timeit.repeat(
+            lambda: [word for word in vocabulary if word in text],
+            number=args.number, repeat=3
+        )) / args.number
+        single_pass = min(timeit.repeat(
+            lambda: matcher.scan(text),
+            number=args.number, repeat=3
+        )) / args.number
+        
+        print(f"{size:>9} {naive * 1e6:>10.1f} {single_pass * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[60, 600, 6000])
+    parser.add_argument("--number", type=int, default=200, help="Scans per timing")
+    main(parser.parse_args())
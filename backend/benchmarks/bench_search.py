@@ -0,0 +1,101 @@
+"""
+Search latency as the task table grows.
+
+Fills the in-memory and SQLite backends with synthetic tasks and times one
+counted page of a search for a rare word, next to the full scans the
+indexes replaced (substring test per row in memory, COUNT and page with
+LIKE '%term%' in SQLite).
+
+Usage:
+    python -m benchmarks.bench_search --sizes 1000 10000 50000
+"""
+import argparse
+import asyncio
+import random
+import string
+import time
+
+from src.storage import MemoryStorage, SQLiteStorage, TaskQuery
+
+
+def synthetic_records(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        for _ in range(5000)
+    ]
+    records = []
+    for i in range(size):
+        words = rng.choices(vocabulary, k=30)
+        if i % 100 == 0:
+            words[rng.randrange(30)] = "invoice"
+        records.append({
+            "title": " ".join(words[:5]).capitalize(),
+            "description": " ".join(words[5:]),
+            "category": "general",
+            "priority": "low",
+            "status": "pending",
+            "extracted_entities": {},
+            "suggested_actions": [],
+        })
+    return records
+
+
+async def timed(fn, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        await fn()
+    return (time.perf_counter() - start) / number
+
+
+async def run(args: argparse.Namespace):
+    print(f"{'tasks':>7} {'memory scan ms':>15} {'memory index ms':>16} "
+          f"{'sqlite LIKE ms':>15} {'sqlite FTS ms':>14}")
+    query = TaskQuery(search="invoice", limit=20)
+    
+    for size in args.sizes:
+        records = synthetic_records(size)
+        memory = MemoryStorage()
+        sqlite = SQLiteStorage(":memory:")
+        await memory.insert_tasks(records)
+        await sqlite.insert_tasks(records)
+        
+        async def memory_scan():
+            term = query.search.lower()
+            matches = [
+                row for row in memory._tasks.values()
+                if term in row["title"].lower() or term in row["description"].lower()
+            ]
+            return matches[:query.limit], len(matches)
+        
+        async def sqlite_like():
+            where = "WHERE title LIKE ? OR description LIKE ?"
+            pattern = f"%{query.search}%"
+            with sqlite._lock:
+                total = sqlite._conn.execute(
+                    f"SELECT COUNT(*) FROM tasks {where}", (pattern, pattern)
+                ).fetchone()[0]
+                rows = sqlite._conn.execute(
+                    f"SELECT * FROM tasks {where} ORDER BY created_at DESC LIMIT ?",
+                    (pattern, pattern, query.limit)
+                ).fetchall()
+            return rows, total
+        
+        timings = [
+            await timed(memory_scan, args.number),
+            await timed(lambda: memory.select_tasks(query), args.number),
+            await timed(sqlite_like, args.number),
+            await timed(lambda: sqlite.select_tasks(query), args.number),
+        ]
+        sqlite.close()
+        
+        print(f"{size:>7} " + " ".join(
+            f"{t * 1e3:>{width}.2f}" for t, width in zip(timings, (15, 16, 15, 14))
+        ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--number", type=int, default=20, help="Searches per timing")
+    asyncio.run(run(parser.parse_args()))
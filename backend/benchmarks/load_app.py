@@ -0,0 +1,69 @@
+"""
+The API app on a local storage stand-in, for load tests without Supabase.
+
+Serves src.main.app with the storage backend wrapped in LatencyStorage,
+which holds every storage call for LOAD_LATENCY seconds on a bounded
+thread pool before running it, as the Supabase driver's blocking round
+trips do. Requests therefore queue for the pool and the event loop stays
+free exactly as in production, while the data lives in memory or, for
+several server workers sharing it, in an SQLite file.
+
+Environment:
+    LOAD_LATENCY      seconds added to every storage call (default 0.02)
+    STORAGE_BACKEND   memory (default) or sqlite
+    DB_MAX_WORKERS    size of the thread pool the latency is spent on
+
+Usage:
+    LOAD_LATENCY=0.02 uvicorn benchmarks.load_app:app --port 8100
+"""
+import asyncio
+import inspect
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from src.config import get_settings  # noqa: E402
+from src.database import db_service  # noqa: E402
+from src.main import app  # noqa: E402, F401
+
+
+class LatencyStorage:
+    """Storage backend wrapper that adds a blocking round trip to every call."""
+    
+    def __init__(self, inner, latency: float, max_workers: int):
+        """
+        Args:
+            inner: Backend that holds the data
+            latency: Seconds each call spends on the thread pool first
+            max_workers: Size of that thread pool
+        """
+        self.latency = latency
+        self._inner = inner
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+    
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._inner, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+        
+        async def call(*args, **kwargs):
+            if self.latency > 0:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self._executor, time.sleep, self.latency)
+            return await attribute(*args, **kwargs)
+        
+        return call
+    
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._inner.close()
+
+
+db_service.storage = LatencyStorage(
+    db_service.storage,
+    latency=float(os.environ.get("LOAD_LATENCY", "0.02")),
+    max_workers=get_settings().db_max_workers
+)
@@ -0,0 +1,356 @@
+"""
+End-to-end load test of the API against a local storage stand-in.
+
+Boots benchmarks.load_app under uvicorn in a subprocess. Every storage call
+there spends --latency seconds on the database thread pool, standing in for
+a Supabase round trip. The harness seeds tasks and then drives a weighted
+mix of create, list, search, get, patch and delete requests over HTTP with
+httpx. It runs either closed loop (--concurrency clients, each sending its
+next request when the last one returns) or open loop (--rate requests per
+second with Poisson arrivals, timed from when each request was due, so a
+stalled server cannot hide its queueing).
+
+It reports requests, errors, RPS and p50/p95/p99 per endpoint. The
+"health" probe (GET /) touches no storage; when its tail latency climbs
+with the load, something is blocking the event loop.
+
+The harness shares the machine with the server unless --url points it at
+one started elsewhere; at high rates, run it from another host.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 32 --duration 30
+    python -m benchmarks.load_test --rate 200 --latency 0.05 --workers 2
+    python -m benchmarks.load_test --url http://localhost:8000 --mix list=8,get=2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+
+DEFAULT_MIX = "create=10,list=25,search=15,get=30,patch=12,delete=5,health=3"
+
+TITLES = [
+    "Schedule team meeting", "Pay vendor invoice", "Fix login bug", "Inspect fire exits",
+    "Review budget report", "Deploy server update", "Book client call", "Renew safety training",
+]
+DETAILS = [
+    "with Sarah at Main Office tomorrow", "before Friday, urgent", "for the quarterly review",
+    "in Board Room 4B next week", "assign to Alex when possible", "check the error logs first",
+]
+SEARCHES = ["meeting", "invoice", "bug", "safety", "report", "server", "client", "review"]
+STATUSES = ["pending", "in_progress", "completed"]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse "create=10,list=25,..." into operation weights."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in Workload.OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}; choose from {', '.join(Workload.OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Workload:
+    """Issues the operations of the mix and records their latencies."""
+    
+    OPERATIONS = ("create", "list", "search", "get", "patch", "delete", "health")
+    
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], seed: int):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.task_ids: List[str] = []
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = {name: [] for name in mix}
+        self.errors: Dict[str, int] = {name: 0 for name in mix}
+        self._names = list(mix)
+        self._weights = list(mix.values())
+    
+    def choose(self) -> str:
+        return self.rng.choices(self._names, self._weights)[0]
+    
+    def _task_body(self) -> Dict[str, str]:
+        return {
+            "title": self.rng.choice(TITLES),
+            "description": f"{self.rng.choice(TITLES)} {self.rng.choice(DETAILS)}",
+        }
+    
+    async def seed(self, count: int, batch_size: int = 500):
+        """Create count tasks through the bulk endpoint."""
+        for start in range(0, count, batch_size):
+            body = {"tasks": [self._task_body() for _ in range(min(batch_size, count - start))]}
+            response = await self.client.post("/api/tasks/bulk", json=body)
+            response.raise_for_status()
+            self.task_ids.extend(
+                result["task"]["id"] for result in response.json()["results"] if result["success"]
+            )
+    
+    async def _send(self, operation: str) -> httpx.Response:
+        if operation == "create":
+            response = await self.client.post("/api/tasks", json=self._task_body())
+            if response.status_code == 201:
+                self.task_ids.append(response.json()["id"])
+            return response
+        if operation == "list":
+            params = {"limit": 20}
+            if self.rng.random() < 0.5:
+                params["status"] = self.rng.choice(STATUSES)
+            return await self.client.get("/api/tasks", params=params)
+        if operation == "search":
+            return await self.client.get(
+                "/api/tasks", params={"search": self.rng.choice(SEARCHES), "limit": 20}
+            )
+        if operation == "get":
+            return await self.client.get(f"/api/tasks/{self.rng.choice(self.task_ids)}")
+        if operation == "patch":
+            return await self.client.patch(
+                f"/api/tasks/{self.rng.choice(self.task_ids)}",
+                json={"status": self.rng.choice(STATUSES)}
+            )
+        if operation == "delete":
+            # Taken out first so that no other request picks it meanwhile
+            index = self.rng.randrange(len(self.task_ids))
+            self.task_ids[index], self.task_ids[-1] = self.task_ids[-1], self.task_ids[index]
+            return await self.client.delete(f"/api/tasks/{self.task_ids.pop()}")
+        return await self.client.get("/")
+    
+    async def request(self, operation: str, started: Optional[float] = None):
+        """
+        Send one request and record it.
+        
+        Args:
+            operation: Name from the mix
+            started: When the request was due (open loop); defaults to now
+        """
+        started = time.perf_counter() if started is None else started
+        if operation in ("get", "patch", "delete") and not self.task_ids:
+            operation = "create"
+        try:
+            response = await self._send(operation)
+            # A task deleted while a get or patch of it was in flight is expected
+            failed = response.status_code >= 400 and response.status_code != 404
+        except httpx.HTTPError:
+            failed = True
+        if self.recording:
+            self.latencies[operation].append(time.perf_counter() - started)
+            if failed:
+                self.errors[operation] += 1
+
+
+async def closed_loop(workload: Workload, concurrency: int, duration: float):
+    """concurrency clients, each sending its next request when the last returns."""
+    deadline = time.perf_counter() + duration
+    
+    async def client():
+        while time.perf_counter() < deadline:
+            await workload.request(workload.choose())
+    
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+async def open_loop(workload: Workload, rate: float, duration: float, max_in_flight: int) -> int:
+    """
+    Requests arriving at rate per second, whether or not earlier ones returned.
+    
+    Returns:
+        Arrivals dropped because max_in_flight requests were outstanding
+    """
+    in_flight = set()
+    dropped = 0
+    now = time.perf_counter()
+    deadline = now + duration
+    due = now
+    while True:
+        due += workload.rng.expovariate(rate)
+        if due >= deadline:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            dropped += workload.recording
+            continue
+        task = asyncio.create_task(workload.request(workload.choose(), started=due))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    await asyncio.gather(*in_flight)
+    return dropped
+
+
+def summarize(workload: Workload, elapsed: float) -> Dict[str, Dict[str, Any]]:
+    """Requests, errors, RPS and latency percentiles per operation and in total."""
+    rows = {}
+    everything = []
+    for operation, latencies in workload.latencies.items():
+        everything.extend(latencies)
+        rows[operation] = _stats(latencies, workload.errors[operation], elapsed)
+    rows["total"] = _stats(everything, sum(workload.errors.values()), elapsed)
+    return rows
+
+
+def _stats(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    stats = {"requests": len(latencies), "errors": errors, "rps": len(latencies) / elapsed}
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        stats.update(p50_ms=cuts[49] * 1e3, p95_ms=cuts[94] * 1e3, p99_ms=cuts[98] * 1e3)
+    else:
+        stats.update({name: latencies[0] * 1e3 if latencies else None for name in ("p50_ms", "p95_ms", "p99_ms")})
+    return stats
+
+
+def print_report(rows: Dict[str, Dict[str, Any]]):
+    print(f"{'endpoint':<8} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for operation, stats in rows.items():
+        percentiles = " ".join(
+            f"{stats[name]:>8.1f}" if stats[name] is not None else f"{'-':>8}"
+            for name in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        print(
+            f"{operation:<8} {stats['requests']:>9} {stats['errors']:>7} "
+            f"{stats['rps']:>8.1f} {percentiles}"
+        )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(args: argparse.Namespace) -> Iterator[str]:
+    """Run benchmarks.load_app under uvicorn for the duration of the block."""
+    env = dict(
+        os.environ,
+        LOAD_LATENCY=str(args.latency),
+        DB_MAX_WORKERS=str(args.pool),
+        STORAGE_BACKEND="memory",
+    )
+    data_dir = None
+    if args.workers > 1:
+        # Workers share the tasks through one SQLite file
+        data_dir = tempfile.TemporaryDirectory()
+        env.update(STORAGE_BACKEND="sqlite", SQLITE_PATH=os.path.join(data_dir.name, "load.db"))
+    
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.load_app:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if server.poll() is not None:
+                raise SystemExit("Server exited during startup")
+            try:
+                httpx.get(f"{url}/", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise SystemExit("Server did not start within 30 seconds")
+                time.sleep(0.2)
+        yield url
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        if data_dir is not None:
+            data_dir.cleanup()
+
+
+async def drive(args: argparse.Namespace, url: str) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    connections = args.max_in_flight if args.rate else args.concurrency
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        workload = Workload(client, mix, args.seed)
+        await workload.seed(args.tasks)
+        
+        async def phase(duration: float) -> int:
+            if args.rate:
+                return await open_loop(workload, args.rate, duration, args.max_in_flight)
+            await closed_loop(workload, args.concurrency, duration)
+            return 0
+        
+        if args.warmup > 0:
+            await phase(args.warmup)
+        workload.recording = True
+        started = time.perf_counter()
+        dropped = await phase(args.duration)
+        elapsed = time.perf_counter() - started
+    
+    return {
+        "config": {
+            "url": url if args.url else None,
+            "latency": args.latency,
+            "workers": args.workers,
+            "pool": args.pool,
+            "mix": mix,
+            "concurrency": None if args.rate else args.concurrency,
+            "rate": args.rate,
+            "duration": elapsed,
+            "dropped": dropped,
+        },
+        "endpoints": summarize(workload, elapsed),
+    }
+
+
+def main(args: argparse.Namespace):
+    if args.url:
+        report = asyncio.run(drive(args, args.url.rstrip("/")))
+    else:
+        with serve(args) as url:
+            report = asyncio.run(drive(args, url))
+    
+    config = report["config"]
+    load = f"rate={config['rate']}/s" if config["rate"] else f"concurrency={config['concurrency']}"
+    print(
+        f"{load} latency={args.latency * 1000:.0f}ms workers={args.workers} "
+        f"pool={args.pool} duration={config['duration']:.1f}s"
+    )
+    print_report(report["endpoints"])
+    if config["dropped"]:
+        print(f"{config['dropped']} arrivals dropped at {args.max_in_flight} in flight")
+    
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=16, help="Closed loop: clients in flight")
+    load.add_argument("--rate", type=float, help="Open loop: requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds measured")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds run before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights")
+    parser.add_argument("--tasks", type=int, default=1000, help="Tasks created before the run")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added per storage call")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--pool", type=int, default=16, help="Database thread pool per worker")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open loop: cap on outstanding requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds per request")
+    parser.add_argument("--seed", type=int, default=7, help="Seed of the request mix")
+    parser.add_argument("--url", help="Load an already running server instead of starting one")
+    parser.add_argument("--output", help="Write the report as JSON here")
+    main(parser.parse_args())
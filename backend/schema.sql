@@ -28,7 +28,9 @@ CREATE TABLE IF NOT EXISTS task_history (
   old_value JSONB,
   new_value JSONB,
   changed_by TEXT,
-  changed_at TIMESTAMPTZ DEFAULT NOW()
+  changed_at TIMESTAMPTZ DEFAULT NOW(),
+  seq INTEGER,
+  is_snapshot BOOLEAN
 );
 
 -- Create indexes for better performance
@@ -39,6 +41,56 @@ CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
 CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_task_history_task_id ON task_history(task_id);
 CREATE INDEX IF NOT EXISTS idx_task_history_changed_at ON task_history(changed_at DESC);
+-- History pages seek on (changed_at, id) per task
+CREATE INDEX IF NOT EXISTS idx_task_history_task_changed
+  ON task_history(task_id, changed_at DESC, id DESC);
+
+-- Delta-encoded history (see src/storage/history.py). seq numbers a task's
+-- rows from 1; every 16th row (seq 1, 17, 33, ...) is a snapshot whose
+-- new_value is the full task row, the others hold only the changed fields.
+-- Rows written before delta encoding keep NULL seq/is_snapshot until
+-- compact_task_history() rewrites them.
+ALTER TABLE task_history ADD COLUMN IF NOT EXISTS seq INTEGER;
+ALTER TABLE task_history ADD COLUMN IF NOT EXISTS is_snapshot BOOLEAN;
+CREATE INDEX IF NOT EXISTS idx_task_history_task_seq ON task_history(task_id, seq DESC);
+
+-- Deferred enrichment (see src/enrichment.py): with DEFERRED_ENRICHMENT on,
+-- tasks are inserted 'pending' with empty entities that a background worker
+-- fills in. The partial index finds tasks left pending by a crash.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS enrichment_status TEXT
+  CHECK (enrichment_status IN ('pending', 'complete')) DEFAULT 'complete';
+CREATE INDEX IF NOT EXISTS idx_tasks_enrichment_pending ON tasks(created_at)
+  WHERE enrichment_status = 'pending';
+
+-- Number new history rows and turn the rows that are due into snapshots.
+-- Runs after the task row was written, so the snapshot is the new state.
+-- Locking the task row serializes the numbering: inserts that do not hold
+-- it already (insert_history_many from bulk creates) would otherwise read
+-- the same MAX(seq) and write duplicate seq numbers.
+CREATE OR REPLACE FUNCTION assign_task_history_seq()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM 1 FROM tasks WHERE id = NEW.task_id FOR UPDATE;
+
+  SELECT COALESCE(MAX(seq), 0) + 1 INTO NEW.seq
+  FROM task_history
+  WHERE task_id = NEW.task_id;
+
+  IF (NEW.seq - 1) % 16 = 0 AND NEW.is_snapshot IS NOT TRUE THEN
+    SELECT to_jsonb(t) INTO NEW.new_value FROM tasks t WHERE t.id = NEW.task_id;
+    NEW.is_snapshot := TRUE;
+  ELSE
+    NEW.is_snapshot := COALESCE(NEW.is_snapshot, FALSE);
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS assign_task_history_seq ON task_history;
+CREATE TRIGGER assign_task_history_seq
+BEFORE INSERT ON task_history
+FOR EACH ROW
+EXECUTE FUNCTION assign_task_history_seq();
 
 -- Create function to auto-update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -56,6 +108,293 @@ BEFORE UPDATE ON tasks
 FOR EACH ROW
 EXECUTE FUNCTION update_updated_at_column();
 
+-- Update a task and record the change in task_history in one call.
+-- p_changes holds only the columns to change. Returns the new row as "task",
+-- the history "action", and the previous values of the changed columns as
+-- "previous"; returns NULL if the task does not exist.
+CREATE OR REPLACE FUNCTION update_task_with_history(
+  p_task_id UUID,
+  p_changes JSONB,
+  p_changed_by TEXT DEFAULT 'system'
+)
+RETURNS JSONB AS $$
+DECLARE
+  old_row tasks;
+  new_row tasks;
+  v_action TEXT := 'updated';
+  v_previous JSONB;
+  v_old_delta JSONB;
+  v_new_delta JSONB;
+BEGIN
+  SELECT * INTO old_row FROM tasks WHERE id = p_task_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  UPDATE tasks SET
+    title = CASE WHEN p_changes ? 'title' THEN p_changes->>'title' ELSE title END,
+    description = CASE WHEN p_changes ? 'description' THEN p_changes->>'description' ELSE description END,
+    category = CASE WHEN p_changes ? 'category' THEN p_changes->>'category' ELSE category END,
+    priority = CASE WHEN p_changes ? 'priority' THEN p_changes->>'priority' ELSE priority END,
+    status = CASE WHEN p_changes ? 'status' THEN p_changes->>'status' ELSE status END,
+    assigned_to = CASE WHEN p_changes ? 'assigned_to' THEN p_changes->>'assigned_to' ELSE assigned_to END,
+    due_date = CASE WHEN p_changes ? 'due_date' THEN (p_changes->>'due_date')::TIMESTAMPTZ ELSE due_date END,
+    extracted_entities = CASE WHEN p_changes ? 'extracted_entities' THEN p_changes->'extracted_entities' ELSE extracted_entities END,
+    suggested_actions = CASE WHEN p_changes ? 'suggested_actions' THEN p_changes->'suggested_actions' ELSE suggested_actions END,
+    enrichment_status = CASE WHEN p_changes ? 'enrichment_status' THEN p_changes->>'enrichment_status' ELSE enrichment_status END
+  WHERE id = p_task_id
+  RETURNING * INTO new_row;
+
+  IF new_row.status IS DISTINCT FROM old_row.status THEN
+    v_action := CASE WHEN new_row.status = 'completed' THEN 'completed' ELSE 'status_changed' END;
+  END IF;
+
+  SELECT jsonb_object_agg(o.key, o.value), jsonb_object_agg(o.key, n.value)
+  INTO v_old_delta, v_new_delta
+  FROM jsonb_each(to_jsonb(old_row)) AS o
+  JOIN jsonb_each(to_jsonb(new_row)) AS n USING (key)
+  WHERE o.value IS DISTINCT FROM n.value;
+
+  INSERT INTO task_history (task_id, action, old_value, new_value, changed_by, is_snapshot)
+  VALUES (
+    p_task_id, v_action,
+    COALESCE(v_old_delta, '{}'::JSONB), COALESCE(v_new_delta, '{}'::JSONB),
+    p_changed_by, FALSE
+  );
+
+  SELECT jsonb_object_agg(key, to_jsonb(old_row) -> key)
+  INTO v_previous
+  FROM jsonb_object_keys(p_changes) AS key;
+
+  RETURN jsonb_build_object(
+    'task', to_jsonb(new_row),
+    'action', v_action,
+    'previous', COALESCE(v_previous, '{}'::JSONB)
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Update many tasks and record their changes in task_history in one call.
+-- p_changes is an array of {"id": ..., "changes": {...}} objects, each
+-- holding only the columns to change for that task; tasks that do not exist
+-- are skipped. Returns one {"task", "action", "previous"} object per updated
+-- task, as update_task_with_history does.
+CREATE OR REPLACE FUNCTION bulk_update_with_history(
+  p_changes JSONB,
+  p_changed_by TEXT DEFAULT 'system'
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_results JSONB;
+BEGIN
+  -- Lock in id order, so that concurrent bulk updates cannot deadlock
+  PERFORM 1 FROM tasks
+  WHERE id IN (SELECT c.id FROM jsonb_to_recordset(p_changes) AS c(id UUID, changes JSONB))
+  ORDER BY id
+  FOR UPDATE;
+
+  WITH c AS (
+    SELECT * FROM jsonb_to_recordset(p_changes) AS c(id UUID, changes JSONB)
+  ),
+  old_rows AS (
+    SELECT t.* FROM tasks t JOIN c ON c.id = t.id
+  ),
+  new_rows AS (
+    UPDATE tasks t SET
+      title = CASE WHEN c.changes ? 'title' THEN c.changes->>'title' ELSE t.title END,
+      description = CASE WHEN c.changes ? 'description' THEN c.changes->>'description' ELSE t.description END,
+      category = CASE WHEN c.changes ? 'category' THEN c.changes->>'category' ELSE t.category END,
+      priority = CASE WHEN c.changes ? 'priority' THEN c.changes->>'priority' ELSE t.priority END,
+      status = CASE WHEN c.changes ? 'status' THEN c.changes->>'status' ELSE t.status END,
+      assigned_to = CASE WHEN c.changes ? 'assigned_to' THEN c.changes->>'assigned_to' ELSE t.assigned_to END,
+      due_date = CASE WHEN c.changes ? 'due_date' THEN (c.changes->>'due_date')::TIMESTAMPTZ ELSE t.due_date END,
+      extracted_entities = CASE WHEN c.changes ? 'extracted_entities' THEN c.changes->'extracted_entities' ELSE t.extracted_entities END,
+      suggested_actions = CASE WHEN c.changes ? 'suggested_actions' THEN c.changes->'suggested_actions' ELSE t.suggested_actions END,
+      enrichment_status = CASE WHEN c.changes ? 'enrichment_status' THEN c.changes->>'enrichment_status' ELSE t.enrichment_status END
+    FROM c
+    WHERE t.id = c.id
+    RETURNING t.*
+  )
+  SELECT jsonb_agg(jsonb_build_object(
+    'task', to_jsonb(n),
+    'old', to_jsonb(o),
+    'action', CASE
+      WHEN n.status IS NOT DISTINCT FROM o.status THEN 'updated'
+      WHEN n.status = 'completed' THEN 'completed'
+      ELSE 'status_changed'
+    END,
+    'previous', COALESCE(
+      (SELECT jsonb_object_agg(key, to_jsonb(o) -> key) FROM jsonb_object_keys(c.changes) AS key),
+      '{}'::JSONB
+    )
+  ))
+  INTO v_results
+  FROM new_rows n
+  JOIN old_rows o ON o.id = n.id
+  JOIN c ON c.id = n.id;
+
+  -- A separate statement, so that snapshot rows (assign_task_history_seq)
+  -- see the updated tasks
+  INSERT INTO task_history (task_id, action, old_value, new_value, changed_by, is_snapshot)
+  SELECT
+    (r->'task'->>'id')::UUID, r->>'action',
+    COALESCE(d.old_delta, '{}'::JSONB), COALESCE(d.new_delta, '{}'::JSONB),
+    p_changed_by, FALSE
+  FROM jsonb_array_elements(COALESCE(v_results, '[]'::JSONB)) AS r
+  CROSS JOIN LATERAL (
+    SELECT jsonb_object_agg(o.key, o.value) AS old_delta, jsonb_object_agg(o.key, n.value) AS new_delta
+    FROM jsonb_each(r->'old') AS o
+    JOIN jsonb_each(r->'task') AS n USING (key)
+    WHERE o.value IS DISTINCT FROM n.value
+  ) AS d;
+
+  RETURN COALESCE(
+    (SELECT jsonb_agg(r - 'old') FROM jsonb_array_elements(v_results) AS r),
+    '[]'::JSONB
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Delta-encode the history of up to p_batch_size tasks still holding rows
+-- with full old and new values. Returns the number of rows rewritten; call
+-- until it returns 0.
+CREATE OR REPLACE FUNCTION compact_task_history(p_batch_size INTEGER DEFAULT 1000)
+RETURNS INTEGER AS $$
+DECLARE
+  v_count INTEGER;
+BEGIN
+  WITH batch AS (
+    SELECT DISTINCT task_id FROM task_history WHERE is_snapshot IS NULL LIMIT p_batch_size
+  ),
+  numbered AS (
+    SELECT h.id, h.old_value, h.new_value,
+           row_number() OVER (PARTITION BY h.task_id ORDER BY h.changed_at, h.id)::INTEGER AS seq
+    FROM task_history h
+    JOIN batch USING (task_id)
+    WHERE h.is_snapshot IS NULL
+  ),
+  encoded AS (
+    SELECT n.id, n.seq, n.old_value, n.new_value, d.old_delta, d.new_delta,
+           (n.old_value IS NULL OR n.new_value IS NULL OR (n.seq - 1) % 16 = 0) AS is_snapshot
+    FROM numbered n
+    CROSS JOIN LATERAL (
+      SELECT COALESCE(jsonb_object_agg(e.key, n.old_value -> e.key), '{}'::JSONB) AS old_delta,
+             COALESCE(jsonb_object_agg(e.key, e.value), '{}'::JSONB) AS new_delta
+      FROM jsonb_each(n.new_value) AS e
+      WHERE n.old_value -> e.key IS DISTINCT FROM e.value
+    ) d
+  )
+  UPDATE task_history h SET
+    seq = e.seq,
+    is_snapshot = e.is_snapshot,
+    old_value = CASE WHEN e.old_value IS NULL OR e.new_value IS NULL THEN e.old_value ELSE e.old_delta END,
+    new_value = CASE WHEN e.is_snapshot THEN e.new_value ELSE e.new_delta END
+  FROM encoded e
+  WHERE h.id = e.id;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Dashboard counts in one call. "overdue" and "due_soon" count the tasks
+-- not completed that are due before p_now, or from p_now until
+-- p_due_soon_until (a range scan of idx_tasks_due_date). With p_facets,
+-- "cells" holds one count per status/category/priority combination.
+CREATE OR REPLACE FUNCTION task_summary(
+  p_now TIMESTAMPTZ,
+  p_due_soon_until TIMESTAMPTZ,
+  p_facets BOOLEAN DEFAULT TRUE
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_summary JSONB;
+  v_cells JSONB;
+BEGIN
+  SELECT jsonb_build_object(
+    'overdue', COUNT(*) FILTER (WHERE due_date < p_now),
+    'due_soon', COUNT(*) FILTER (WHERE due_date >= p_now)
+  )
+  INTO v_summary
+  FROM tasks
+  WHERE due_date < p_due_soon_until AND status <> 'completed';
+
+  IF NOT p_facets THEN
+    RETURN v_summary;
+  END IF;
+
+  SELECT COALESCE(jsonb_agg(jsonb_build_object(
+    'status', status, 'category', category, 'priority', priority, 'count', n
+  )), '[]'::JSONB)
+  INTO v_cells
+  FROM (
+    SELECT status, category, priority, COUNT(*) AS n
+    FROM tasks
+    GROUP BY status, category, priority
+  ) AS grouped;
+
+  RETURN v_summary || jsonb_build_object('cells', v_cells);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Full-text search over title and description.
+-- task_search_vector() is indexed directly (rather than stored in a generated
+-- column) so the vector never appears in task rows, history snapshots or
+-- upserts. The 'simple' configuration keeps words unstemmed, matching the
+-- word-prefix search of the embedded backends; title words weigh more.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION task_search_vector(p_title TEXT, p_description TEXT)
+RETURNS tsvector AS $$
+  SELECT setweight(to_tsvector('simple', COALESCE(p_title, '')), 'A') ||
+         setweight(to_tsvector('simple', COALESCE(p_description, '')), 'B')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE INDEX IF NOT EXISTS idx_tasks_search
+  ON tasks USING GIN (task_search_vector(title, description));
+-- Trigram indexes serve the substring fallback (ILIKE '%term%')
+CREATE INDEX IF NOT EXISTS idx_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tasks_description_trgm ON tasks USING GIN (description gin_trgm_ops);
+
+-- Tasks matching a search, with their relevance. A task matches when the
+-- prefix tsquery p_tsquery (e.g. 'fix:* & bug:*') matches its words, or when
+-- p_search occurs in its title or description. Called through PostgREST,
+-- which applies the list filters, ordering and range on top.
+-- Dropped first, as CREATE OR REPLACE cannot change the returned columns.
+DROP FUNCTION IF EXISTS search_tasks(TEXT, TEXT);
+CREATE OR REPLACE FUNCTION search_tasks(p_search TEXT, p_tsquery TEXT DEFAULT '')
+RETURNS TABLE (
+  id UUID,
+  title TEXT,
+  description TEXT,
+  category TEXT,
+  priority TEXT,
+  status TEXT,
+  assigned_to TEXT,
+  due_date TIMESTAMPTZ,
+  extracted_entities JSONB,
+  suggested_actions JSONB,
+  enrichment_status TEXT,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  relevance REAL
+) AS $$
+  WITH q AS (
+    SELECT
+      CASE WHEN p_tsquery <> '' THEN to_tsquery('simple', p_tsquery) END AS query,
+      '%' || replace(replace(replace(p_search, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+  )
+  SELECT
+    t.id, t.title, t.description, t.category, t.priority, t.status,
+    t.assigned_to, t.due_date, t.extracted_entities, t.suggested_actions,
+    t.enrichment_status, t.created_at, t.updated_at,
+    COALESCE(ts_rank(task_search_vector(t.title, t.description), q.query), 0)::REAL
+  FROM tasks t, q
+  WHERE task_search_vector(t.title, t.description) @@ q.query
+     OR t.title ILIKE q.pattern
+     OR t.description ILIKE q.pattern
+$$ LANGUAGE sql STABLE;
+
 -- Insert sample data for testing (optional)
 INSERT INTO tasks (title, description, category, priority, status, assigned_to, due_date, extracted_entities, suggested_actions)
 VALUES 
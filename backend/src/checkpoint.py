@@ -0,0 +1,60 @@
+"""
+Progress files for resumable batch jobs.
+
+A checkpoint holds a job's running totals as JSON, tagged with the source
+it was made for so that it is never applied to a different input.
+"""
+import json
+import os
+from dataclasses import asdict, fields
+from typing import Any, Generic, Type, TypeVar
+
+
+Progress = TypeVar("Progress")
+
+
+class Checkpoint(Generic[Progress]):
+    """Progress of a job, saved atomically after each batch."""
+    
+    def __init__(self, path: str, source: Any, progress_type: Type[Progress]):
+        """
+        Args:
+            path: Checkpoint file
+            source: JSON value identifying the job's input
+            progress_type: Dataclass holding the totals
+        """
+        self.path = path
+        self.source = source
+        self.progress_type = progress_type
+    
+    def load(self) -> Progress:
+        """
+        Totals of the earlier run for this source, or a fresh progress.
+        
+        Raises:
+            ValueError: If the checkpoint was made for another source
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self.progress_type()
+        if data.get("source") != self.source:
+            raise ValueError(f"Checkpoint {self.path} belongs to {data.get('source')}")
+        return self.progress_type(**{
+            field.name: data[field.name] for field in fields(self.progress_type) if field.name in data
+        })
+    
+    def save(self, progress: Progress):
+        """Atomically replace the checkpoint with the current totals."""
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"source": self.source, **asdict(progress)}, f)
+        os.replace(temporary, self.path)
+    
+    def clear(self):
+        """Remove the checkpoint once the job has finished."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
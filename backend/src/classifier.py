@@ -2,10 +2,66 @@
 Auto-classification engine for tasks.
 Implements category detection, priority assignment, entity extraction, and action suggestions.
 """
+import hashlib
+import os
 import re
-from typing import Dict, List, Tuple
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
+from .cache import TTLCache
+from .config import get_settings
 from .models import TaskCategory, TaskPriority, ExtractedEntities
+from .keywords import KeywordMatcher
+
+
+# Priority of a task due within each interval, most urgent first
+DUE_DATE_PRIORITIES = (
+    (timedelta(days=1), TaskPriority.HIGH),
+    (timedelta(days=7), TaskPriority.MEDIUM),
+)
+
+# Class attributes a classification depends on
+TABLES = ("CATEGORY_KEYWORDS", "PRIORITY_KEYWORDS", "ACTION_VERBS", "SUGGESTED_ACTIONS")
+
+# (category, priority, entities, suggested_actions)
+Classification = Tuple[TaskCategory, TaskPriority, ExtractedEntities, List[str]]
+
+# (title, description, due_date)
+ClassificationInput = Tuple[str, str, Optional[datetime]]
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    """Remove duplicates, keeping first occurrences in order."""
+    return list(dict.fromkeys(values))
+
+
+def _scan(patterns: Iterable[re.Pattern], text: str, group: int) -> List[str]:
+    """Unique matches of several patterns, each scanned on its own, in text order."""
+    matches = sorted(
+        (match.start(group), match.group(group))
+        for pattern in patterns
+        for match in pattern.finditer(text)
+    )
+    return _unique(value for _, value in matches)
+
+
+@dataclass
+class KeywordHits:
+    """Keyword matches found in one scan of a task's text."""
+    category_scores: Dict[TaskCategory, int] = field(default_factory=dict)
+    priorities: Set[TaskPriority] = field(default_factory=set)
+    actions: List[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class ContentAnalysis:
+    """The parts of a classification that depend only on a task's text."""
+    category: TaskCategory
+    entities: ExtractedEntities
+    hits: KeywordHits
 
 
 class TaskClassifier:
@@ -42,6 +98,43 @@ class TaskClassifier:
         ]
     }
     
+    # Action verbs reported as extracted entities
+    ACTION_VERBS = [
+        'schedule', 'send', 'prepare', 'review', 'check', 'create',
+        'update', 'fix', 'install', 'complete', 'submit', 'approve',
+        'assign', 'notify', 'conduct', 'generate', 'document'
+    ]
+    
+    # Entity patterns, compiled once. The leading lookahead on each pattern
+    # lists the characters a match can start with, which lets the regex
+    # engine skip most positions. Patterns whose matches can overlap get a
+    # scan of their own, so "Jan 12/31/2024" yields both "Jan 12" and
+    # "12/31/2024"; alternatives fused into one scan never overlap.
+    DATE_PATTERNS = (
+        re.compile(
+            r'(?=[adfjmnostwy])\b(?:'
+            r'(?:today|tomorrow|yesterday|this week|next week|this month)\b'
+            r'|(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b'
+            r'|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2}\b)',
+            re.IGNORECASE
+        ),
+        re.compile(r'\d{1,2}/\d{1,2}/\d{2,4}'),  # 12/31/2024
+        re.compile(r'\d{1,2}-\d{1,2}-\d{2,4}'),  # 12-31-2024
+    )
+    
+    # "with/by/assign to/for [Name]"
+    PEOPLE_PATTERN = re.compile(
+        r'(?=[abfw])\b(?:with|by|assign\s+to|for)\s+(?P<person>[A-Z][a-z]+)'
+    )
+    
+    # "at [Location]", "in [Location]" and "Room/Office/Building [id]"; a
+    # room number inside a named place ("at Main Office 4") is also found
+    LOCATION_PATTERNS = (
+        re.compile(r'(?=a)\bat\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'),
+        re.compile(r'(?=i)\bin\s+(?:the\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'),
+        re.compile(r'(?=[BOR])(?:Room|Office|Building)\s+(\w+)'),
+    )
+    
     # Suggested actions by category
     SUGGESTED_ACTIONS = {
         TaskCategory.SCHEDULING: [
@@ -76,6 +169,59 @@ class TaskClassifier:
         ]
     }
     
+    def __init__(self, memo_size: int = 4096):
+        """
+        Compile the keyword tables.
+        
+        Args:
+            memo_size: Texts whose analysis is remembered (0 disables)
+        """
+        # Content analysis keyed by a digest of title and description, so
+        # tasks created from templates skip the keyword scan and regexes
+        self._memo = TTLCache(maxsize=memo_size)
+        self.reload_keywords()
+    
+    def reload_keywords(self):
+        """
+        Compile the keyword tables into a single matcher.
+        
+        Call again after editing CATEGORY_KEYWORDS, PRIORITY_KEYWORDS or
+        ACTION_VERBS so that the changes take effect. The tables travel with
+        every chunk classify_many() sends, so already running pool workers
+        use the edited tables from the next batch on.
+        """
+        matcher = KeywordMatcher()
+        for category, keywords in self.CATEGORY_KEYWORDS.items():
+            for keyword in keywords:
+                matcher.add(keyword, ("category", category))
+        for priority, keywords in self.PRIORITY_KEYWORDS.items():
+            for keyword in keywords:
+                matcher.add(keyword, ("priority", priority))
+        for verb in self.ACTION_VERBS:
+            matcher.add(verb, ("action", verb))
+        self._keywords = matcher
+        # Remembered analyses were made with the old tables
+        self._memo.clear()
+    
+    def memo_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy of the content analysis memo."""
+        return self._memo.stats()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Ship exactly the keyword and action tables, as they are when each
+        # chunk is sent, so pooled workers started before an edit still
+        # classify with the current tables. Workers recompile them and
+        # start with an empty memo of the same size
+        state = {name: getattr(self, name) for name in TABLES}
+        state["memo_size"] = self._memo.maxsize
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self._memo = TTLCache(maxsize=state.pop("memo_size"))
+        # Instance attributes shadow the worker's own copy of the class tables
+        self.__dict__.update(state)
+        self.reload_keywords()
+    
     def classify(
         self, 
         title: str, 
@@ -94,21 +240,131 @@ class TaskClassifier:
             Tuple of (category, priority, entities, suggested_actions)
         """
         combined_text = f"{title} {description}".lower()
+        analysis = self._analyze(title, description, combined_text)
         
-        category = self._detect_category(combined_text)
-        priority = self._assign_priority(combined_text, due_date)
-        entities = self._extract_entities(title, description)
-        actions = self.SUGGESTED_ACTIONS[category]
+        # Depends on the clock, so never remembered
+        priority = self._assign_priority(combined_text, due_date, analysis.hits)
+        actions = self.SUGGESTED_ACTIONS[analysis.category]
         
-        return category, priority, entities, actions
+        return analysis.category, priority, analysis.entities.model_copy(deep=True), actions
     
-    def _detect_category(self, text: str) -> TaskCategory:
-        """Detect task category based on keyword matching."""
-        category_scores = {}
+    def classify_fast(
+        self,
+        title: str,
+        description: str,
+        due_date: datetime = None
+    ) -> Tuple[TaskCategory, TaskPriority]:
+        """
+        Category and priority from one keyword scan, without entity extraction.
         
-        for category, keywords in self.CATEGORY_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            category_scores[category] = score
+        Gives the same category and priority as classify(); used when
+        entities are extracted later (deferred enrichment).
+        """
+        combined_text = f"{title} {description}".lower()
+        hits = self._scan_keywords(combined_text)
+        
+        category = self._detect_category(combined_text, hits)
+        priority = self._assign_priority(combined_text, due_date, hits)
+        
+        return category, priority
+    
+    def _analyze(self, title: str, description: str, combined_text: str) -> ContentAnalysis:
+        """
+        Category, entities and keyword hits of a text, remembered by content.
+        
+        The key is the exact text: requests already strip surrounding
+        whitespace, and case and inner spacing change the entities found.
+        """
+        key = hashlib.blake2b(
+            f"{title}\0{description}".encode(), digest_size=16
+        ).digest()
+        analysis = self._memo.get(key)
+        if analysis is None:
+            hits = self._scan_keywords(combined_text)
+            analysis = ContentAnalysis(
+                category=self._detect_category(combined_text, hits),
+                entities=self._extract_entities(title, description, hits),
+                hits=hits
+            )
+            self._memo.set(key, analysis)
+        return analysis
+    
+    def classify_many(
+        self,
+        items: Iterable[ClassificationInput],
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 64,
+        parallel_threshold: int = 256
+    ) -> Iterator[Classification]:
+        """
+        Classify a stream of tasks, yielding results in input order.
+        
+        Batches smaller than parallel_threshold are classified in-process.
+        Larger ones are split into chunks and fanned out to a process pool,
+        with a bounded number of chunks in flight so memory stays flat for
+        arbitrarily long inputs. Results are identical to calling classify()
+        on each item.
+        
+        Args:
+            items: (title, description, due_date) tuples
+            executor: Process pool to use (one is created if omitted)
+            max_workers: Worker count of the pool, given or created (defaults
+                to the CPU count); twice as many chunks are kept in flight
+            chunk_size: Tasks sent to a worker at a time
+            parallel_threshold: Minimum batch size worth fanning out
+            
+        Yields:
+            (category, priority, entities, suggested_actions) per item
+        """
+        items = iter(items)
+        head = list(islice(items, parallel_threshold))
+        
+        if len(head) < parallel_threshold:
+            for title, description, due_date in head:
+                yield self.classify(title, description, due_date)
+            return
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        owned = executor is None
+        if owned:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        
+        try:
+            max_in_flight = 2 * max_workers
+            pending = deque()
+            
+            for chunk in _chunked(chain(head, items), chunk_size):
+                pending.append(executor.submit(_classify_chunk, self, chunk))
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+            
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            if owned:
+                executor.shutdown(cancel_futures=True)
+    
+    def _scan_keywords(self, text: str) -> KeywordHits:
+        """Collect category, priority and action keyword hits in one pass over lowercased text."""
+        hits = KeywordHits(
+            category_scores={category: 0 for category in self.CATEGORY_KEYWORDS}
+        )
+        
+        for _, tags in self._keywords.scan(text):
+            for kind, value in tags:
+                if kind == "category":
+                    hits.category_scores[value] += 1
+                elif kind == "priority":
+                    hits.priorities.add(value)
+                else:
+                    hits.actions.append(value)
+        
+        return hits
+    
+    def _detect_category(self, text: str, hits: Optional[KeywordHits] = None) -> TaskCategory:
+        """Detect task category based on keyword matching."""
+        category_scores = (hits or self._scan_keywords(text)).category_scores
         
         # Get category with highest score
         max_score = max(category_scores.values())
@@ -123,37 +379,47 @@ class TaskClassifier:
         
         return TaskCategory.GENERAL
     
-    def _assign_priority(self, text: str, due_date: datetime = None) -> TaskPriority:
+    def _assign_priority(
+        self,
+        text: str,
+        due_date: datetime = None,
+        hits: Optional[KeywordHits] = None
+    ) -> TaskPriority:
         """Assign priority based on urgency indicators and due date."""
+        priorities = (hits or self._scan_keywords(text)).priorities
+        
         # Check for high priority keywords
-        for keyword in self.PRIORITY_KEYWORDS[TaskPriority.HIGH]:
-            if keyword in text:
-                return TaskPriority.HIGH
+        if TaskPriority.HIGH in priorities:
+            return TaskPriority.HIGH
         
         # Check due date proximity
         if due_date:
-            time_until_due = due_date - datetime.now()
+            # Aware due dates (from the API or storage) compare with aware now
+            time_until_due = due_date - datetime.now(due_date.tzinfo)
             
-            if time_until_due <= timedelta(days=1):
-                return TaskPriority.HIGH
-            elif time_until_due <= timedelta(days=7):
-                return TaskPriority.MEDIUM
+            for within, priority in DUE_DATE_PRIORITIES:
+                if time_until_due <= within:
+                    return priority
         
         # Check for medium priority keywords
-        for keyword in self.PRIORITY_KEYWORDS[TaskPriority.MEDIUM]:
-            if keyword in text:
-                return TaskPriority.MEDIUM
+        if TaskPriority.MEDIUM in priorities:
+            return TaskPriority.MEDIUM
         
         return TaskPriority.LOW
     
-    def _extract_entities(self, title: str, description: str) -> ExtractedEntities:
+    def _extract_entities(
+        self,
+        title: str,
+        description: str,
+        hits: Optional[KeywordHits] = None
+    ) -> ExtractedEntities:
         """Extract entities from task content."""
         combined_text = f"{title} {description}"
         
         dates = self._extract_dates(combined_text)
         people = self._extract_people(combined_text)
         locations = self._extract_locations(combined_text)
-        actions = self._extract_actions(title, description)
+        actions = self._extract_actions(title, description, hits)
         
         return ExtractedEntities(
             dates=dates,
@@ -164,79 +430,43 @@ class TaskClassifier:
     
     def _extract_dates(self, text: str) -> List[str]:
         """Extract date references from text."""
-        dates = []
-        
-        # Common date patterns
-        date_patterns = [
-            r'\btoday\b', r'\btomorrow\b', r'\byesterday\b',
-            r'\bthis week\b', r'\bnext week\b', r'\bthis month\b',
-            r'\bmonday\b', r'\btuesday\b', r'\bwednesday\b', r'\bthursday\b',
-            r'\bfriday\b', r'\bsaturday\b', r'\bsunday\b',
-            r'\d{1,2}/\d{1,2}/\d{2,4}',  # Date format: 12/31/2024
-            r'\d{1,2}-\d{1,2}-\d{2,4}',  # Date format: 12-31-2024
-            r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2}\b'
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            dates.extend(matches)
-        
-        return list(set(dates))  # Remove duplicates
+        return _scan(self.DATE_PATTERNS, text, 0)
     
     def _extract_people(self, text: str) -> List[str]:
         """Extract person names from text."""
-        people = []
-        
-        # Pattern: "with/by/assign to [Name]" - improved to stop at word boundaries
-        name_patterns = [
-            r'\bwith\s+([A-Z][a-z]+)',
-            r'\bby\s+([A-Z][a-z]+)',
-            r'\bassign\s+to\s+([A-Z][a-z]+)',
-            r'\bfor\s+([A-Z][a-z]+)'
-        ]
-        
-        for pattern in name_patterns:
-            matches = re.findall(pattern, text)
-            people.extend(matches)
-        
-        return list(set(people))  # Remove duplicates
+        return _unique(match.group("person") for match in self.PEOPLE_PATTERN.finditer(text))
     
     def _extract_locations(self, text: str) -> List[str]:
         """Extract location references from text."""
-        locations = []
-        
-        # Pattern: "at/in [Location]"
-        location_patterns = [
-            r'\bat\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'\bin\s+(?:the\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'(?:Room|Office|Building)\s+(\w+)',
-        ]
-        
-        for pattern in location_patterns:
-            matches = re.findall(pattern, text)
-            locations.extend(matches)
-        
-        return list(set(locations))  # Remove duplicates
+        return _scan(self.LOCATION_PATTERNS, text, 1)
     
-    def _extract_actions(self, title: str, description: str) -> List[str]:
-        """Extract action verbs from text."""
-        actions = []
-        
-        # Common action verbs
-        action_verbs = [
-            'schedule', 'send', 'prepare', 'review', 'check', 'create',
-            'update', 'fix', 'install', 'complete', 'submit', 'approve',
-            'assign', 'notify', 'conduct', 'generate', 'document'
-        ]
-        
-        combined_text = f"{title} {description}".lower()
+    def _extract_actions(
+        self,
+        title: str,
+        description: str,
+        hits: Optional[KeywordHits] = None
+    ) -> List[str]:
+        """Extract action verbs from text, in order of first appearance."""
+        if hits is None:
+            hits = self._scan_keywords(f"{title} {description}".lower())
         
-        for verb in action_verbs:
-            if verb in combined_text:
-                actions.append(verb.capitalize())
-        
-        return list(set(actions))  # Remove duplicates
+        return [verb.capitalize() for verb in hits.actions]
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split an iterable into lists of at most size items."""
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def _classify_chunk(
+    task_classifier: TaskClassifier,
+    chunk: List[ClassificationInput]
+) -> List[Classification]:
+    """Classify one chunk inside a worker process."""
+    return [task_classifier.classify(*item) for item in chunk]
 
 
 # Global classifier instance
-classifier = TaskClassifier()
+classifier = TaskClassifier(memo_size=get_settings().classifier_memo_size)
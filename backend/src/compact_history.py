@@ -0,0 +1,57 @@
+"""
+Delta-encode task history written before delta encoding.
+
+Rewrites legacy history rows (full old and new values) in batches until none
+are left. Reads return the same full views before and after, so this can run
+while the API is serving.
+
+Usage:
+    python -m src.compact_history --batch-size 1000
+"""
+import argparse
+import asyncio
+import logging
+
+from .config import get_settings
+from .storage import create_storage
+
+
+logger = logging.getLogger(__name__)
+
+
+async def compact_all(storage, batch_size: int) -> int:
+    """
+    Compact history until the backend reports nothing left.
+    
+    Args:
+        storage: Storage backend to compact
+        batch_size: Tasks per batch
+    
+    Returns:
+        Total number of rows rewritten
+    """
+    total = 0
+    while True:
+        rewritten = await storage.compact_history(batch_size)
+        if not rewritten:
+            return total
+        total += rewritten
+        logger.info("Compacted %d history rows (%d total)", rewritten, total)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000, help="Tasks per batch")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    storage = create_storage(get_settings())
+    try:
+        total = asyncio.run(compact_all(storage, args.batch_size))
+    finally:
+        storage.close()
+    print(f"Compacted {total} history rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,37 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
-    supabase_url: str
-    supabase_key: str
+    supabase_url: str = ""
+    supabase_key: str = ""
     port: int = 8000
     environment: str = "development"
+    db_max_workers: int = 16
+    storage_backend: str = "supabase"  # supabase | sqlite | memory
+    sqlite_path: str = "tasks.db"
+    classifier_workers: Optional[int] = None  # defaults to the CPU count
+    classifier_chunk_size: int = 64
+    classifier_parallel_threshold: int = 256
+    classifier_memo_size: int = 4096  # remembered task texts; 0 disables
+    deferred_enrichment: bool = False  # extract entities after create returns
+    enrichment_workers: int = 4
+    enrichment_queue_size: int = 10000
+    count_cache_ttl: float = 5.0  # seconds; 0 disables the exact-count cache
+    count_cache_size: int = 1024
+    task_cache_ttl: float = 30.0  # seconds; 0 disables the task/history cache
+    task_cache_size: int = 4096
+    export_batch_size: int = 1000  # rows per query when streaming an export
+    import_batch_size: int = 1000  # rows per classify-and-insert batch of an upload
+    summary_counters: bool = False  # maintain dashboard facet counts in process
+    summary_counters_ttl: float = 300.0  # seconds between counter reloads
+    event_queue_size: int = 256  # change feed events buffered per subscriber
+    event_heartbeat: float = 15.0  # seconds between keepalives on idle feeds
+    priority_escalation: bool = False  # raise priorities as due dates approach
+    escalation_refresh: float = 3600.0  # seconds between reads of the due_date window
     
     class Config:
         env_file = ".env"
@@ -1,28 +1,130 @@
 """
-Database service for interacting with Supabase.
+Database service implementing task operations on top of a storage backend.
+
+The backend (Supabase, SQLite or in-memory) is chosen by the STORAGE_BACKEND
+setting; see src/storage.
 """
-from typing import List, Optional, Dict, Any
-from datetime import datetime
-from supabase import create_client, Client
+import asyncio
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
 from .config import get_settings
 from .models import (
     Task, TaskHistory, TaskCategory, TaskPriority, 
     TaskStatus, TaskAction, ExtractedEntities, CreateTaskRequest,
-    UpdateTaskRequest
+    UpdateTaskRequest, CountMode, TaskSummary, EnrichmentStatus
+)
+from .cache import TTLCache
+from .summary import SummaryCounters, cell_of, facet_counts
+from .events import EventBus
+from .enrichment import EnrichmentQueue
+from .escalation import PriorityEscalator
+from .classifier import classifier, Classification, ClassificationInput
+from .storage import (
+    SNAPSHOT_INTERVAL, StorageBackend, TaskQuery, create_storage, decode_cursor,
+    decode_history_cursor, encode_cursor, encode_history_cursor, expand_history
 )
-from .classifier import classifier
+
+logger = logging.getLogger(__name__)
+
+# Receives the ids touched by a write
+InvalidationHook = Callable[[Tuple[str, ...]], None]
 
 
 class DatabaseService:
     """Service for database operations."""
     
-    def __init__(self):
-        """Initialize Supabase client."""
-        settings = get_settings()
-        self.client: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_key
+    def __init__(self, storage: Optional[StorageBackend] = None):
+        """
+        Initialize the service.
+        
+        Args:
+            storage: Storage backend (defaults to the one selected in settings)
+        """
+        self.settings = get_settings()
+        self.storage = storage or create_storage(self.settings)
+        # Exact totals keyed by filter combination, dropped on every write
+        self.count_cache = TTLCache(
+            maxsize=self.settings.count_cache_size if self.settings.count_cache_ttl > 0 else 0,
+            ttl=self.settings.count_cache_ttl
+        )
+        # Parsed tasks and histories keyed by ("task" | "history", id),
+        # dropped for exactly the ids a write touches
+        self.task_cache = TTLCache(
+            maxsize=self.settings.task_cache_size if self.settings.task_cache_ttl > 0 else 0,
+            ttl=self.settings.task_cache_ttl
+        )
+        # Bumped by every write; a read only fills a cache if no write
+        # happened while it was in flight
+        self.write_version = 0
+        # Distinguishes this process's write versions from other workers'
+        self.instance_epoch = uuid.uuid4().hex[:12]
+        self._invalidation_hooks: List[InvalidationHook] = []
+        # Facet counts kept current by the write paths (SUMMARY_COUNTERS)
+        self.summary_counters = (
+            SummaryCounters(self.settings.summary_counters_ttl)
+            if self.settings.summary_counters else None
+        )
+        # Change feed of the tasks this process writes
+        self.events = EventBus(self.settings.event_queue_size)
+        # Extracts entities after create_task returns (DEFERRED_ENRICHMENT);
+        # started by the application's lifespan
+        self.enrichment = (
+            EnrichmentQueue(
+                self._write_enrichment,
+                workers=self.settings.enrichment_workers,
+                maxsize=self.settings.enrichment_queue_size
+            )
+            if self.settings.deferred_enrichment else None
+        )
+        # Raises priorities as due dates approach (PRIORITY_ESCALATION);
+        # started by the application's lifespan
+        self.escalator = (
+            PriorityEscalator(self, refresh=self.settings.escalation_refresh)
+            if self.settings.priority_escalation else None
         )
+        # Classifies large batches; worker processes start on first use and
+        # are reused by every later batch
+        self._classifier_workers = self.settings.classifier_workers or os.cpu_count() or 1
+        self._classifier_executor = ProcessPoolExecutor(max_workers=self._classifier_workers)
+    
+    def close(self):
+        """Release the storage backend and the classifier workers."""
+        self.storage.close()
+        self._classifier_executor.shutdown()
+    
+    def add_invalidation_hook(self, hook: InvalidationHook):
+        """
+        Register a callback run after every write with the ids it touched.
+        
+        Use it to keep several workers coherent: publish the ids on a shared
+        channel and call invalidate() with them in the other workers.
+        """
+        self._invalidation_hooks.append(hook)
+    
+    def list_version(self) -> str:
+        """
+        Stamp that changes whenever a task listing may have changed.
+        
+        Made of the instance epoch, the write version and the current cache
+        TTL window, so that writes on other workers are picked up within one
+        TTL even without an invalidation hook.
+        """
+        ttl = self.settings.task_cache_ttl
+        window = int(time.time() // ttl) if ttl > 0 else time.time_ns()
+        return f"{self.instance_epoch}.{self.write_version}.{window}"
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters and occupancy of the service caches."""
+        return {
+            "tasks": self.task_cache.stats(),
+            "counts": self.count_cache.stats(),
+        }
     
     async def create_task(
         self, 
@@ -39,44 +141,139 @@ class DatabaseService:
         Returns:
             Created task with classification
         """
-        # Run auto-classification
-        category, priority, entities, actions = classifier.classify(
-            task_data.title,
-            task_data.description,
-            task_data.due_date
-        )
+        deferred = self.enrichment is not None and self.enrichment.admit()
+        
+        # Run auto-classification; when deferred, entity extraction runs
+        # after the task is returned
+        if deferred:
+            category, priority = classifier.classify_fast(
+                task_data.title,
+                task_data.description,
+                task_data.due_date
+            )
+            classification = (
+                category, priority, ExtractedEntities(), classifier.SUGGESTED_ACTIONS[category]
+            )
+        else:
+            classification = classifier.classify(
+                task_data.title,
+                task_data.description,
+                task_data.due_date
+            )
         
         # Prepare task data
-        task_dict = {
-            "title": task_data.title,
-            "description": task_data.description,
-            "category": category.value,
-            "priority": priority.value,
-            "status": TaskStatus.PENDING.value,
-            "assigned_to": task_data.assigned_to,
-            "due_date": task_data.due_date.isoformat() if task_data.due_date else None,
-            "extracted_entities": entities.model_dump(),
-            "suggested_actions": actions,
-        }
+        task_dict = self._build_task_record(task_data, classification)
+        if deferred:
+            task_dict["enrichment_status"] = EnrichmentStatus.PENDING.value
         
         # Insert task
-        result = self.client.table("tasks").insert(task_dict).execute()
-        
-        if not result.data:
-            raise Exception("Failed to create task")
-        
-        task_record = result.data[0]
+        task_record = await self.storage.insert_task(task_dict)
         
         # Log to history
         await self._log_history(
             task_id=task_record["id"],
             action=TaskAction.CREATED,
             new_value=task_record,
-            changed_by=changed_by
+            changed_by=changed_by,
+            is_snapshot=True
         )
+        self._task_changed(None, task_record)
+        self._after_write(task_record["id"])
+        
+        if deferred and not self.enrichment.submit(
+            task_record["id"], task_data.title, task_data.description
+        ):
+            # The queue filled up during the insert
+            _, _, entities, _ = classifier.classify(task_data.title, task_data.description)
+            task_record = await self._write_enrichment(task_record["id"], entities) or task_record
         
         return self._parse_task(task_record)
     
+    async def create_tasks(
+        self,
+        tasks_data: List[CreateTaskRequest],
+        changed_by: str = "system"
+    ) -> List[Task]:
+        """
+        Create many tasks with two round trips in total.
+        
+        Tasks are classified as a batch (fanned out to worker processes for
+        large batches), inserted with one multi-row insert, and their
+        "created" history rows written with a second one.
+        
+        Args:
+            tasks_data: Task creation data
+            changed_by: User who created the tasks
+            
+        Returns:
+            Created tasks, in input order
+        """
+        if not tasks_data:
+            return []
+        
+        classifications = await asyncio.to_thread(
+            self.classify_batch,
+            [(task.title, task.description, task.due_date) for task in tasks_data]
+        )
+        task_dicts = [
+            self._build_task_record(task_data, classification)
+            for task_data, classification in zip(tasks_data, classifications)
+        ]
+        
+        task_records = await self.storage.insert_tasks(task_dicts)
+        
+        await self.storage.insert_history_many([
+            {
+                "task_id": record["id"],
+                "action": TaskAction.CREATED.value,
+                "old_value": None,
+                "new_value": record,
+                "changed_by": changed_by,
+                "is_snapshot": True
+            }
+            for record in task_records
+        ])
+        for record in task_records:
+            self._task_changed(None, record)
+        self._after_write(*(record["id"] for record in task_records))
+        
+        return [self._parse_task(record) for record in task_records]
+    
+    def classify_batch(self, items: List[ClassificationInput]) -> List[Classification]:
+        """
+        Classify (title, description, due_date) items on the classifier workers.
+        
+        Blocking; run it off the event loop.
+        """
+        return list(classifier.classify_many(
+            items,
+            executor=self._classifier_executor,
+            max_workers=self._classifier_workers,
+            chunk_size=self.settings.classifier_chunk_size,
+            parallel_threshold=self.settings.classifier_parallel_threshold
+        ))
+    
+    @classmethod
+    def _build_task_record(
+        cls,
+        task_data: CreateTaskRequest,
+        classification: Classification
+    ) -> Dict[str, Any]:
+        """Build the row for a new task from its request and classification."""
+        category, priority, entities, actions = classification
+        return {
+            "title": task_data.title,
+            "description": task_data.description,
+            "category": category.value,
+            "priority": priority.value,
+            "status": TaskStatus.PENDING.value,
+            "assigned_to": task_data.assigned_to,
+            "due_date": cls._timestamp(task_data.due_date),
+            "extracted_entities": entities.model_dump(),
+            "suggested_actions": actions,
+            "enrichment_status": EnrichmentStatus.COMPLETE.value,
+        }
+    
     async def get_tasks(
         self,
         status: Optional[TaskStatus] = None,
@@ -86,63 +283,260 @@ class DatabaseService:
         sort_by: str = "created_at",
         sort_order: str = "desc",
         limit: int = 20,
-        offset: int = 0
-    ) -> tuple[List[Task], int]:
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.EXACT
+    ) -> tuple[List[Task], Optional[int], Optional[str]]:
         """
         Get tasks with filtering, sorting, and pagination.
         
+        Pages are addressed either by offset or by an opaque cursor taken
+        from a previous page's next_cursor. Cursor pages seek past the last
+        row seen, so they stay fast at any depth and do not skip or repeat
+        rows when tasks are inserted concurrently.
+        
+        The total is computed according to count: exact totals are cached
+        briefly per filter combination (and dropped on any write), planned
+        and estimated totals come from planner statistics, and none skips
+        counting altogether. Whether another page follows never depends on
+        the total; one extra row is fetched instead.
+        
         Returns:
-            Tuple of (tasks, total_count)
-        """
-        # Build query
-        query = self.client.table("tasks").select("*", count="exact")
-        
-        # Apply filters
-        if status:
-            query = query.eq("status", status.value)
-        if category:
-            query = query.eq("category", category.value)
-        if priority:
-            query = query.eq("priority", priority.value)
-        if search:
-            query = query.or_(
-                f"title.ilike.%{search}%,description.ilike.%{search}%"
-            )
+            Tuple of (tasks, total_count, next_cursor); total_count is None
+            with count=none and next_cursor is None on the last page
         
-        # Apply sorting
-        query = query.order(sort_by, desc=(sort_order == "desc"))
+        Raises:
+            ValueError: For an unsortable field, or a cursor that is malformed
+                or was issued for another sort order
+        """
+        query = TaskQuery(
+            status=status.value if status else None,
+            category=category.value if category else None,
+            priority=priority.value if priority else None,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            # One extra row tells whether another page follows
+            limit=limit + 1,
+            offset=offset,
+            after=decode_cursor(cursor, sort_by, sort_order) if cursor else None,
+            count=CountMode(count).value
+        )
+        
+        count_key = (query.status, query.category, query.priority, query.search)
+        version = self.write_version
+        cached_total = None
+        if query.count == CountMode.EXACT.value:
+            cached_total = self.count_cache.get(count_key)
+            if cached_total is not None:
+                query.count = CountMode.NONE.value
+        
+        records, total = await self.storage.select_tasks(query)
+        
+        if cached_total is not None:
+            total = cached_total
+        elif query.count == CountMode.EXACT.value and version == self.write_version:
+            self.count_cache.set(count_key, total)
+        
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_cursor = encode_cursor(query, records[-1])
         
-        # Apply pagination
-        query = query.range(offset, offset + limit - 1)
+        tasks = [self._parse_task(record) for record in records]
+        
+        return tasks, total, next_cursor
+    
+    def iter_task_batches(
+        self,
+        status: Optional[TaskStatus] = None,
+        category: Optional[TaskCategory] = None,
+        priority: Optional[TaskPriority] = None,
+        search: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[List[Task]]:
+        """
+        Iterate over every matching task, one batch at a time.
         
-        # Execute query
-        result = query.execute()
+        Batches are read with keyset pagination and without counting, so
+        memory stays bounded by batch_size however many tasks match. The
+        arguments are validated before iteration starts.
         
-        tasks = [self._parse_task(record) for record in result.data]
-        total = result.count or 0
+        Args:
+            batch_size: Tasks per storage query (defaults to EXPORT_BATCH_SIZE)
         
-        return tasks, total
+        Raises:
+            ValueError: For an unsortable field
+        """
+        query = TaskQuery(
+            status=status.value if status else None,
+            category=category.value if category else None,
+            priority=priority.value if priority else None,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=batch_size or self.settings.export_batch_size,
+            count=CountMode.NONE.value
+        )
+        return self._iter_task_batches(query)
+    
+    async def _iter_task_batches(self, query: TaskQuery) -> AsyncIterator[List[Task]]:
+        while True:
+            records, _ = await self.storage.select_tasks(query)
+            if records:
+                yield [self._parse_task(record) for record in records]
+            if len(records) < query.limit:
+                return
+            last = records[-1]
+            query = replace(query, after=(last.get(query.sort_by), last["id"]))
     
     async def get_task(self, task_id: str) -> Optional[Task]:
-        """Get a single task by ID."""
-        result = self.client.table("tasks").select("*").eq("id", task_id).execute()
+        """Get a single task by ID, from the cache when possible."""
+        key = ("task", task_id)
+        task = self.task_cache.get(key)
+        if task is not None:
+            return task
+        
+        version = self.write_version
+        record = await self.storage.get_task(task_id)
         
-        if not result.data:
+        if not record:
             return None
         
-        return self._parse_task(result.data[0])
+        task = self._parse_task(record)
+        if version == self.write_version:
+            self.task_cache.set(key, task)
+        return task
+    
+    async def get_task_history(
+        self,
+        task_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> List[TaskHistory]:
+        """
+        Get task history, newest first, from the cache when possible.
+        
+        Args:
+            task_id: Task whose history to read
+            limit: Maximum number of entries (None for all)
+            cursor: Only entries after this one, from history_cursor()
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        before = decode_history_cursor(cursor) if cursor else None
+        key = ("history", task_id)
+        history = self.task_cache.get(key)
+        if history is not None:
+            return self._page_history(history, limit, before)
+        
+        version = self.write_version
+        records = await self.storage.select_history(
+            task_id, self._history_window(limit), before
+        )
+        
+        history = self._expand_history(records, limit)
+        if version == self.write_version and limit is None and before is None:
+            self.task_cache.set(key, tuple(history))
+        return history
     
-    async def get_task_history(self, task_id: str) -> List[TaskHistory]:
-        """Get task history."""
-        result = (
-            self.client.table("task_history")
-            .select("*")
-            .eq("task_id", task_id)
-            .order("changed_at", desc=True)
-            .execute()
+    async def get_task_with_history(
+        self,
+        task_id: str,
+        history_limit: Optional[int] = None,
+        history_cursor: Optional[str] = None
+    ) -> Optional[tuple[Task, List[TaskHistory]]]:
+        """
+        Get a task together with (a page of) its history.
+        
+        Served from the cache when both are cached; otherwise the storage
+        backend fetches them together (one embedded query on Supabase).
+        
+        Args:
+            task_id: Task to read
+            history_limit: Maximum number of history entries (None for all)
+            history_cursor: Only entries after this one, from history_cursor()
+        
+        Returns:
+            Tuple of (task, history), or None if the task does not exist
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        history_before = decode_history_cursor(history_cursor) if history_cursor else None
+        task = self.task_cache.get(("task", task_id))
+        history = self.task_cache.get(("history", task_id))
+        if task is not None and history is not None:
+            return task, self._page_history(history, history_limit, history_before)
+        
+        version = self.write_version
+        result = await self.storage.get_task_with_history(
+            task_id, self._history_window(history_limit), history_before
         )
+        if result is None:
+            return None
         
-        return [self._parse_history(record) for record in result.data]
+        record, history_records = result
+        task = self._parse_task(record)
+        history = self._expand_history(history_records, history_limit)
+        if version == self.write_version:
+            self.task_cache.set(("task", task_id), task)
+            if history_limit is None and history_before is None:
+                self.task_cache.set(("history", task_id), tuple(history))
+        return task, history
+    
+    @staticmethod
+    def _history_window(limit: Optional[int]) -> Optional[int]:
+        """Rows to read for a history page: enough to reach back to a snapshot."""
+        return None if limit is None else limit + SNAPSHOT_INTERVAL
+    
+    def _expand_history(
+        self,
+        records: List[Dict[str, Any]],
+        limit: Optional[int]
+    ) -> List[TaskHistory]:
+        """Parse delta-encoded history rows into full views, trimmed to limit."""
+        expanded = expand_history(records)
+        if limit is not None:
+            expanded = expanded[:limit]
+        return [self._parse_history(record) for record in expanded]
+    
+    @classmethod
+    def history_cursor(cls, entry: TaskHistory) -> str:
+        """Cursor for the history page following entry."""
+        return encode_history_cursor(cls._timestamp(entry.changed_at), entry.id)
+    
+    @classmethod
+    def _page_history(
+        cls,
+        history: tuple,
+        limit: Optional[int],
+        before: Optional[Tuple[str, str]]
+    ) -> List[TaskHistory]:
+        """Apply history pagination to a full history, newest first by (changed_at, id)."""
+        entries = list(history)
+        if before is not None:
+            position = (datetime.fromisoformat(before[0]), before[1])
+            entries = [
+                entry for entry in entries
+                if (cls._as_utc(entry.changed_at), entry.id) < position
+            ]
+        return entries if limit is None else entries[:limit]
+    
+    @staticmethod
+    def _as_utc(moment: datetime) -> datetime:
+        """Treat naive datetimes as UTC."""
+        return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+    
+    @classmethod
+    def _timestamp(cls, moment: Optional[datetime]) -> Optional[str]:
+        """ISO-8601 UTC timestamp as stored by the backends."""
+        if moment is None:
+            return None
+        return cls._as_utc(moment).astimezone(timezone.utc).isoformat()
     
     async def update_task(
         self,
@@ -150,13 +544,108 @@ class DatabaseService:
         update_data: UpdateTaskRequest,
         changed_by: str = "system"
     ) -> Optional[Task]:
-        """Update a task."""
-        # Get current task
-        current_task = await self.get_task(task_id)
-        if not current_task:
+        """
+        Update a task.
+        
+        The update and its history row are written by the storage backend
+        in one operation (a single RPC round trip on Supabase).
+        """
+        update_dict = self._build_changes(update_data)
+        
+        if not update_dict:
+            return await self.get_task(task_id)
+        
+        result = await self.storage.update_task_logged(task_id, update_dict, changed_by)
+        
+        if not result:
             return None
         
-        # Prepare update data
+        self._task_changed({**result["task"], **result["previous"]}, result["task"])
+        self._after_write(task_id)
+        
+        return self._parse_task(result["task"])
+    
+    async def update_tasks(
+        self,
+        updates: List[tuple[str, UpdateTaskRequest]],
+        changed_by: str = "system"
+    ) -> Dict[str, Task]:
+        """
+        Update many tasks with one set-based write.
+        
+        All changes and their history rows are written atomically by a
+        single storage call, which writes only the changed columns of each
+        task and never inserts.
+        
+        Args:
+            updates: (task_id, changes) pairs; an id should appear once
+            changed_by: User making the changes
+            
+        Returns:
+            Updated tasks keyed by id; ids that do not exist are omitted
+        """
+        if not updates:
+            return {}
+        
+        changes = {task_id: self._build_changes(update_data) for task_id, update_data in updates}
+        updated = await self._write_changes(changes, changed_by)
+        unchanged = [task_id for task_id, task_changes in changes.items() if not task_changes]
+        if unchanged:
+            for row in await self.storage.get_tasks_by_ids(unchanged):
+                updated.setdefault(row["id"], row)
+        return {
+            task_id: self._parse_task(updated[task_id])
+            for task_id, _ in updates
+            if task_id in updated
+        }
+    
+    async def apply_changes(
+        self,
+        changes: Dict[str, Dict[str, Any]],
+        changed_by: str = "system"
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Write column changes to many tasks, like update_tasks().
+        
+        For jobs that compute columns requests cannot set, such as the
+        classification of a task.
+        
+        Args:
+            changes: Column changes keyed by task id
+            changed_by: Recorded in the history
+        
+        Returns:
+            Updated rows keyed by id; ids that do not exist are omitted
+        """
+        return await self._write_changes(changes, changed_by)
+    
+    async def _write_changes(
+        self,
+        changes: Dict[str, Dict[str, Any]],
+        changed_by: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Apply per-task changes and their history in one atomic storage call.
+        
+        Returns:
+            Updated rows keyed by id; tasks with no changes are omitted
+        """
+        pending = {task_id: task_changes for task_id, task_changes in changes.items() if task_changes}
+        if not pending:
+            return {}
+        
+        updated = {}
+        for result in await self.storage.update_tasks_logged(pending, changed_by):
+            row = result["task"]
+            updated[row["id"]] = row
+            self._task_changed({**row, **result["previous"]}, row)
+        self._after_write(*updated)
+        
+        return updated
+    
+    @classmethod
+    def _build_changes(cls, update_data: UpdateTaskRequest) -> Dict[str, Any]:
+        """Build the column changes for a partial update."""
         update_dict = {}
         if update_data.title is not None:
             update_dict["title"] = update_data.title
@@ -171,47 +660,120 @@ class DatabaseService:
         if update_data.assigned_to is not None:
             update_dict["assigned_to"] = update_data.assigned_to
         if update_data.due_date is not None:
-            update_dict["due_date"] = update_data.due_date.isoformat()
+            update_dict["due_date"] = cls._timestamp(update_data.due_date)
+        return update_dict
+    
+    async def _write_enrichment(
+        self,
+        task_id: str,
+        entities: ExtractedEntities
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Store the entities extracted for a task created with deferred enrichment.
         
-        if not update_dict:
-            return current_task
-        
-        # Update task
-        result = (
-            self.client.table("tasks")
-            .update(update_dict)
-            .eq("id", task_id)
-            .execute()
-        )
+        Recorded in the history as an update by "enrichment", like any other
+        write: later entries are deltas rebuilt on top of the "created"
+        snapshot, which still holds the pending state.
         
-        if not result.data:
+        Returns:
+            The updated row, or None if the task was deleted meanwhile
+        """
+        result = await self.storage.update_task_logged(task_id, {
+            "extracted_entities": entities.model_dump(),
+            "enrichment_status": EnrichmentStatus.COMPLETE.value,
+        }, "enrichment")
+        if not result:
             return None
+        self._task_changed({**result["task"], **result["previous"]}, result["task"])
+        self._after_write(task_id)
+        return result["task"]
+    
+    async def delete_task(self, task_id: str) -> bool:
+        """Delete a task."""
+        # The counters and event filters need the row's facets, which the
+        # delete does not return
+        needs_row = self.summary_counters is not None or self.events.has_subscribers()
+        old = await self.storage.get_task(task_id) if needs_row else None
+        deleted = await self.storage.delete_task(task_id)
+        if deleted:
+            self._task_changed(old, None)
+            self._after_write(task_id)
+        return deleted
+    
+    async def get_summary(self, due_soon_days: int = 3) -> TaskSummary:
+        """
+        Count all tasks by status, category and priority, plus overdue and due-soon.
+        
+        The facets come from the in-process counters when SUMMARY_COUNTERS
+        is on and they are fresh, leaving only the due_date index to read;
+        otherwise from one grouped query, whose result is cached briefly
+        like exact list totals.
         
-        updated_task = result.data[0]
+        Args:
+            due_soon_days: Length of the due-soon window starting now
+        """
+        key = ("summary", due_soon_days)
+        counters = self.summary_counters
+        if counters is None or not counters.is_fresh():
+            cached = self.count_cache.get(key)
+            if cached is not None:
+                return cached
         
-        # Determine action type
-        action = TaskAction.UPDATED
-        if update_data.status and update_data.status != current_task.status:
-            if update_data.status == TaskStatus.COMPLETED:
-                action = TaskAction.COMPLETED
-            else:
-                action = TaskAction.STATUS_CHANGED
+        now = datetime.now(timezone.utc)
+        bounds = (self._timestamp(now), self._timestamp(now + timedelta(days=due_soon_days)))
+        version = self.write_version
         
-        # Log to history
-        await self._log_history(
-            task_id=task_id,
-            action=action,
-            old_value=current_task.model_dump(),
-            new_value=updated_task,
-            changed_by=changed_by
+        if counters is not None and counters.is_fresh():
+            counts = await self.storage.summarize_tasks(*bounds, facets=False)
+            cells = counters.cells()
+        else:
+            counts = await self.storage.summarize_tasks(*bounds)
+            cells = [(cell_of(cell), cell["count"]) for cell in counts["cells"]]
+            if counters is not None and version == self.write_version:
+                counters.load(cells)
+        
+        summary = TaskSummary(
+            **facet_counts(cells),
+            overdue=counts["overdue"],
+            due_soon=counts["due_soon"],
+            due_soon_days=due_soon_days
         )
+        if counters is None and version == self.write_version:
+            self.count_cache.set(key, summary)
+        return summary
+    
+    def invalidate(self, *task_ids: str):
+        """
+        Drop cached state derived from the given tasks.
         
-        return self._parse_task(updated_task)
+        Args:
+            task_ids: Ids of the tasks that were created, changed or deleted
+        """
+        self.write_version += 1
+        # A write can move any task in or out of any filter combination
+        self.count_cache.clear()
+        for task_id in task_ids:
+            self.task_cache.pop(("task", task_id))
+            self.task_cache.pop(("history", task_id))
     
-    async def delete_task(self, task_id: str) -> bool:
-        """Delete a task."""
-        result = self.client.table("tasks").delete().eq("id", task_id).execute()
-        return len(result.data) > 0
+    def _task_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """Move a written task between summary counter cells, reschedule and publish it."""
+        if self.summary_counters is not None:
+            self.summary_counters.apply(old, new)
+        if self.escalator is not None:
+            self.escalator.track(old, new)
+        if self.events.has_subscribers():
+            self.events.publish(old, new, self._parse_task(new) if new is not None else None)
+    
+    def _after_write(self, *task_ids: str):
+        """Invalidate after a write (task and history rows) and run the hooks."""
+        self.invalidate(*task_ids)
+        for hook in self._invalidation_hooks:
+            try:
+                hook(task_ids)
+            except Exception:
+                # The write itself succeeded; the TTL bounds any staleness
+                logger.exception("Invalidation hook failed")
     
     async def _log_history(
         self,
@@ -219,18 +781,25 @@ class DatabaseService:
         action: TaskAction,
         old_value: Optional[Dict[str, Any]] = None,
         new_value: Optional[Dict[str, Any]] = None,
-        changed_by: str = "system"
+        changed_by: str = "system",
+        is_snapshot: bool = False
     ):
-        """Log task change to history."""
+        """
+        Log task change to history.
+        
+        old_value/new_value hold the changed fields only, unless is_snapshot
+        is set and new_value is the full row (see storage.history).
+        """
         history_dict = {
             "task_id": task_id,
             "action": action.value,
             "old_value": old_value,
             "new_value": new_value,
-            "changed_by": changed_by
+            "changed_by": changed_by,
+            "is_snapshot": is_snapshot
         }
         
-        self.client.table("task_history").insert(history_dict).execute()
+        await self.storage.insert_history(history_dict)
     
     def _parse_task(self, record: Dict[str, Any]) -> Task:
         """Parse task record from database."""
@@ -245,6 +814,9 @@ class DatabaseService:
             due_date=datetime.fromisoformat(record["due_date"]) if record.get("due_date") else None,
             extracted_entities=ExtractedEntities(**record.get("extracted_entities", {})),
             suggested_actions=record.get("suggested_actions", []),
+            enrichment_status=EnrichmentStatus(
+                record.get("enrichment_status") or EnrichmentStatus.COMPLETE.value
+            ),
             created_at=datetime.fromisoformat(record["created_at"]),
             updated_at=datetime.fromisoformat(record["updated_at"])
         )
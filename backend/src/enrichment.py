@@ -0,0 +1,171 @@
+"""
+Deferred entity extraction for newly created tasks.
+
+With DEFERRED_ENRICHMENT on, DatabaseService.create_task stores a task with
+the category and priority of a single keyword scan and enrichment_status
+"pending", and submits it here. A pool of asyncio workers drains a bounded
+queue, runs the entity regexes off the event loop and patches the entities
+onto the row, setting enrichment_status to "complete".
+
+When the queue is full, or not running, create_task classifies inline as
+before, so a burst of creates slows down instead of piling up unbounded
+work. Queued tasks are drained on shutdown; tasks still pending after a
+crash keep empty entities until they are reclassified.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from .classifier import classifier
+from .models import ExtractedEntities
+
+
+logger = logging.getLogger(__name__)
+
+# Writes a task's entities; returns the updated row, or None if the task is gone
+EnrichmentWriter = Callable[[str, ExtractedEntities], Awaitable[Optional[Dict[str, Any]]]]
+
+
+@dataclass
+class EnrichmentJob:
+    """A task waiting for entity extraction."""
+    task_id: str
+    title: str
+    description: str
+    enqueued_at: float
+
+
+class EnrichmentQueue:
+    """Bounded queue of tasks to enrich, drained by asyncio workers."""
+    
+    def __init__(
+        self,
+        write: EnrichmentWriter,
+        workers: int = 4,
+        maxsize: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            write: Patches extracted entities onto a task
+            workers: Jobs processed concurrently
+            maxsize: Jobs queued before submit() refuses more
+            clock: Time source, injectable for tests
+        """
+        self.workers = workers
+        self.maxsize = maxsize
+        self._write = write
+        self._clock = clock
+        self._queue: Optional[asyncio.Queue] = None
+        # Enqueue times in queue order, for the age of the oldest job
+        self._enqueued_at: Deque[float] = deque()
+        self._tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._total_lag = 0.0
+    
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+    
+    def admit(self) -> bool:
+        """
+        Whether a new task should be created for deferred enrichment.
+        
+        False when the queue is full or stopped; such tasks are counted as
+        rejected and classified inline.
+        """
+        if self.running and not self._queue.full():
+            return True
+        self.rejected += 1
+        return False
+    
+    def start(self):
+        """Start the workers on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"enrichment-{i}")
+            for i in range(self.workers)
+        ]
+    
+    async def stop(self, timeout: Optional[float] = 10.0):
+        """
+        Finish the queued jobs, waiting at most timeout seconds, then stop.
+        
+        Jobs still queued after the timeout are dropped and stay pending.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stopped with %d enrichment jobs pending", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._enqueued_at.clear()
+    
+    def submit(self, task_id: str, title: str, description: str) -> bool:
+        """
+        Queue a task for enrichment.
+        
+        Returns:
+            False if the queue is full or stopped; the caller should
+            classify the task inline instead
+        """
+        if not self.running or self._queue.full():
+            self.rejected += 1
+            return False
+        now = self._clock()
+        self._queue.put_nowait(EnrichmentJob(task_id, title, description, now))
+        self._enqueued_at.append(now)
+        self.submitted += 1
+        return True
+    
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            self._enqueued_at.popleft()
+            try:
+                await self._enrich(job)
+            finally:
+                self._queue.task_done()
+    
+    async def _enrich(self, job: EnrichmentJob):
+        try:
+            _, _, entities, _ = await asyncio.to_thread(
+                classifier.classify, job.title, job.description
+            )
+            await self._write(job.task_id, entities)
+        except Exception:
+            self.failed += 1
+            logger.exception("Enrichment of task %s failed", job.task_id)
+            return
+        self.completed += 1
+        self._total_lag += self._clock() - job.enqueued_at
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, lag and job counters."""
+        now = self._clock()
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "depth": len(self._enqueued_at),
+            "maxsize": self.maxsize,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            # Age of the oldest job still queued
+            "lag_seconds": now - self._enqueued_at[0] if self._enqueued_at else 0.0,
+            # From submit() to the entities being written, per completed job
+            "avg_lag_seconds": self._total_lag / self.completed if self.completed else 0.0,
+        }
@@ -0,0 +1,285 @@
+"""
+Due-date priority escalation.
+
+classify() ranks a task by its due date only when the task is created:
+due within 7 days is medium, within 1 day high (DUE_DATE_PRIORITIES). The
+PriorityEscalator keeps that true as time passes. It holds a min-heap of
+the moments at which open tasks cross those thresholds, sleeps until the
+earliest, and raises the priority of every task whose moment has come in
+one batched write per priority. The writes go through
+DatabaseService.apply_changes, so they are recorded in the history as
+changed by "escalator", invalidate the caches and reach the change feed.
+
+Only tasks due before a horizon (the longest threshold plus one refresh
+interval) are scheduled. The first refresh reads every open task due
+before it from the due_date index and catches up on thresholds crossed
+while nothing was running; each later refresh reads the tasks due between
+now and the moved horizon. DatabaseService reports every task it writes,
+so new tasks and moved due dates are scheduled straight away.
+
+A threshold counts as crossed when time passes it or when a write moves
+the due date past it. Priorities are only raised, and a task whose
+priority is lowered by hand is not raised again until its next threshold.
+
+Run it in one worker. Due dates changed by other processes are picked up
+by the next refresh.
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .classifier import DUE_DATE_PRIORITIES
+from .models import TaskPriority, TaskStatus
+
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {TaskPriority.LOW.value: 0, TaskPriority.MEDIUM.value: 1, TaskPriority.HIGH.value: 2}
+
+# How long before its due date a task is first scheduled
+LOOKAHEAD = max(within for within, _ in DUE_DATE_PRIORITIES)
+
+# Seconds to wait after a failed read or write before trying again
+RETRY_DELAY = 60.0
+
+# (when, task id, due date, priority)
+Threshold = Tuple[datetime, str, datetime, str]
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).isoformat()
+
+
+def parse_due_date(value: str) -> datetime:
+    """Parse a stored due date, treating naive values as UTC."""
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class PriorityEscalator:
+    """Raises task priorities as their due dates approach."""
+    
+    def __init__(
+        self,
+        service,
+        refresh: float = 3600.0,
+        changed_by: str = "escalator",
+        clock: Callable[[], datetime] = _utc_now
+    ):
+        """
+        Args:
+            service: DatabaseService to read and write through
+            refresh: Seconds between reads of the due_date window
+            changed_by: Recorded in the history of escalated tasks
+            clock: Time source returning aware datetimes, injectable for tests
+        """
+        self.refresh_interval = timedelta(seconds=refresh)
+        self.changed_by = changed_by
+        self._service = service
+        self._clock = clock
+        self._heap: List[Threshold] = []
+        # Due date each scheduled task's thresholds were computed from;
+        # heap entries with another due date are stale
+        self._scheduled: Dict[str, datetime] = {}
+        # Tasks due at or after this are not scheduled yet; None before the first refresh
+        self._horizon: Optional[datetime] = None
+        self._next_refresh: Optional[datetime] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.escalated = 0
+        self.batches = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+    
+    def start(self):
+        """Start escalating on the running event loop."""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="priority-escalator")
+    
+    async def stop(self):
+        """Stop escalating; thresholds are caught up on the next start."""
+        if not self.running:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+    
+    def track(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """
+        Account for one write.
+        
+        Args:
+            old: The task row before the write (None for a create)
+            new: The task row after the write (None for a delete)
+        """
+        if self._horizon is None:
+            return
+        if new is None:
+            # A delete whose row was not read leaves stale entries, skipped when they fire
+            if old is not None:
+                self._scheduled.pop(old["id"], None)
+            return
+        if new.get("status") == TaskStatus.COMPLETED.value or not new.get("due_date"):
+            self._scheduled.pop(new["id"], None)
+            return
+        if (
+            old is not None
+            and old.get("status") != TaskStatus.COMPLETED.value
+            and old.get("due_date") == new["due_date"]
+        ):
+            # Due date not moved: its thresholds are scheduled already
+            return
+        due = parse_due_date(new["due_date"])
+        if due >= self._horizon:
+            # Scheduled by the refresh that moves the horizon past it
+            self._scheduled.pop(new["id"], None)
+            return
+        self._schedule(new["id"], due, new.get("priority"))
+    
+    def _schedule(self, task_id: str, due: datetime, priority: Optional[str]):
+        """
+        Push a task's thresholds.
+        
+        Ones already crossed fire on the next run, unless the task's
+        priority already meets them.
+        """
+        now = self._clock()
+        self._scheduled[task_id] = due
+        earliest = self._heap[0][0] if self._heap else None
+        for within, target in DUE_DATE_PRIORITIES:
+            moment = due - within
+            if moment <= now and PRIORITY_RANK[target.value] <= PRIORITY_RANK.get(priority, 0):
+                continue
+            heapq.heappush(self._heap, (moment, task_id, due, target.value))
+        if self._wake is not None and (earliest is None or self._heap[0][0] < earliest):
+            self._wake.set()
+    
+    async def refresh(self) -> int:
+        """
+        Read the tasks due before the moved horizon and schedule new ones.
+        
+        Returns:
+            Number of tasks newly scheduled
+        """
+        now = self._clock()
+        horizon = now + LOOKAHEAD + self.refresh_interval
+        first = self._horizon is None
+        rows = await self._service.storage.select_due_tasks(
+            _timestamp(horizon), None if first else _timestamp(now)
+        )
+        
+        # Tasks past due have crossed every threshold; their entries have fired
+        self._scheduled = {
+            task_id: due for task_id, due in self._scheduled.items() if due >= now
+        }
+        self._horizon = horizon
+        self._next_refresh = now + self.refresh_interval
+        
+        scheduled = 0
+        for row in rows:
+            due = parse_due_date(row["due_date"])
+            if due < horizon and self._scheduled.get(row["id"]) != due:
+                self._schedule(row["id"], due, row["priority"])
+                scheduled += 1
+        return scheduled
+    
+    async def escalate_due(self) -> int:
+        """
+        Raise the priority of every task whose threshold has been crossed.
+        
+        Returns:
+            Number of tasks escalated
+        """
+        now = self._clock()
+        crossed: List[Threshold] = []
+        targets: Dict[str, str] = {}
+        while self._heap and self._heap[0][0] <= now:
+            threshold = heapq.heappop(self._heap)
+            _, task_id, due, priority = threshold
+            if self._scheduled.get(task_id) != due:
+                continue
+            crossed.append(threshold)
+            if PRIORITY_RANK[priority] > PRIORITY_RANK.get(targets.get(task_id), -1):
+                targets[task_id] = priority
+        if not targets:
+            return 0
+        
+        try:
+            escalated = await self._escalate(targets)
+        except Exception:
+            # Crossed again on the next run
+            for threshold in crossed:
+                heapq.heappush(self._heap, threshold)
+            raise
+        self.escalated += escalated
+        return escalated
+    
+    async def _escalate(self, targets: Dict[str, str]) -> int:
+        """Raise tasks to their target priorities, one write per priority."""
+        # The rows may have changed since they were scheduled
+        changes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for row in await self._service.storage.get_tasks_by_ids(list(targets)):
+            target = targets[row["id"]]
+            if (
+                row.get("status") != TaskStatus.COMPLETED.value
+                and row.get("due_date")
+                and parse_due_date(row["due_date"]) == self._scheduled.get(row["id"])
+                and PRIORITY_RANK.get(row.get("priority"), 0) < PRIORITY_RANK[target]
+            ):
+                changes.setdefault(target, {})[row["id"]] = {"priority": target}
+        
+        escalated = 0
+        for priority_changes in changes.values():
+            # One atomic write of the tasks and their history per priority
+            updated = await self._service.apply_changes(
+                priority_changes, changed_by=self.changed_by
+            )
+            escalated += len(updated)
+            self.batches += 1
+        return escalated
+    
+    def _seconds_until_next(self) -> float:
+        now = self._clock()
+        moments = [self._next_refresh]
+        if self._heap:
+            moments.append(self._heap[0][0])
+        return max((min(moments) - now).total_seconds(), 0.0)
+    
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await self.escalate_due()
+                if self._next_refresh is None or self._clock() >= self._next_refresh:
+                    await self.refresh()
+                    await self.escalate_due()
+            except Exception:
+                logger.exception("Priority escalation failed")
+                await asyncio.sleep(RETRY_DELAY)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._seconds_until_next())
+            except asyncio.TimeoutError:
+                pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """Scheduled tasks, the next threshold and escalation counters."""
+        return {
+            "running": self.running,
+            "scheduled_tasks": len(self._scheduled),
+            "pending_thresholds": len(self._heap),
+            "next_threshold": self._heap[0][0].isoformat() if self._heap else None,
+            "horizon": self._horizon.isoformat() if self._horizon else None,
+            "escalated": self.escalated,
+            "batches": self.batches,
+        }
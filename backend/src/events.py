@@ -0,0 +1,195 @@
+"""
+In-process task change feed.
+
+DatabaseService publishes an event to the EventBus for every task a write
+creates, changes or deletes. Each subscriber (an open GET /api/tasks/stream
+connection) has its own bounded queue of frames that are already
+serialized, so an event is encoded once however many clients listen.
+
+Publishing never waits on subscribers. When a slow client lets its queue
+fill up, the queued frames are discarded and replaced by a single "resync"
+frame telling the client to refetch what it shows; later events queue
+normally behind it. Memory stays bounded by subscribers x queue size.
+
+Only writes made by this process are seen. With several workers, relay
+events between them (e.g. from an invalidation hook) and publish() them
+on each worker's bus.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from .models import Task, TaskEvent, TaskEventType
+
+
+# Sent in place of the events a slow subscriber could not keep up with
+RESYNC_FRAME = "event: resync\ndata: {}\n\n"
+
+# Milliseconds a client waits before reconnecting a dropped stream
+RECONNECT_DELAY_MS = 3000
+
+# Comment line that keeps idle connections open through proxies
+HEARTBEAT_FRAME = ": keepalive\n\n"
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """Subscriber filter; None fields match anything."""
+    status: Optional[str] = None
+    category: Optional[str] = None
+    assigned_to: Optional[str] = None
+    
+    def matches(self, row: Optional[Dict[str, Any]]) -> bool:
+        """Whether a task row passes the filter."""
+        if row is None:
+            return False
+        return (
+            (self.status is None or row.get("status") == self.status)
+            and (self.category is None or row.get("category") == self.category)
+            and (self.assigned_to is None or row.get("assigned_to") == self.assigned_to)
+        )
+
+
+def format_frame(event: TaskEvent) -> str:
+    """Encode an event as a server-sent event frame."""
+    return f"id: {event.id}\nevent: {event.type.value}\ndata: {event.model_dump_json()}\n\n"
+
+
+class Subscription:
+    """A subscriber's filter and bounded queue of frames."""
+    
+    def __init__(self, bus: "EventBus", event_filter: EventFilter, maxsize: int):
+        self.filter = event_filter
+        self.dropped = 0
+        self._bus = bus
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    
+    def offer(self, frame: str):
+        """Queue a frame, collapsing the backlog into a resync if full."""
+        try:
+            self._queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+        
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._bus.resyncs += 1
+        self._queue.put_nowait(RESYNC_FRAME)
+        # The new event is still delivered after the resync
+        self._queue.put_nowait(frame)
+    
+    async def get(self) -> str:
+        """Wait for the next frame."""
+        return await self._queue.get()
+    
+    def close(self):
+        """Stop receiving events."""
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """Fans task change events out to subscribers."""
+    
+    def __init__(self, queue_size: int = 256):
+        """
+        Args:
+            queue_size: Frames buffered per subscriber before it is resynced
+        """
+        # At least the resync frame plus the event that overflowed
+        self.queue_size = max(queue_size, 2)
+        self.published = 0
+        self.resyncs = 0
+        self._sequence = 0
+        self._subscribers: Set[Subscription] = set()
+    
+    def has_subscribers(self) -> bool:
+        """Whether anyone listens; writers skip building events otherwise."""
+        return bool(self._subscribers)
+    
+    def subscribe(self, event_filter: Optional[EventFilter] = None) -> Subscription:
+        """Start receiving the events that match a filter."""
+        subscription = Subscription(self, event_filter or EventFilter(), self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+    
+    def publish(
+        self,
+        old: Optional[Dict[str, Any]],
+        new: Optional[Dict[str, Any]],
+        task: Optional[Task] = None
+    ):
+        """
+        Publish one task change.
+        
+        A subscriber receives it when the task matches its filter before or
+        after the change, so clients also learn about tasks that leave
+        their view.
+        
+        Args:
+            old: The task row before the write (None for a create)
+            new: The task row after the write (None for a delete)
+            task: new, parsed (None for a delete)
+        """
+        row = new if new is not None else old
+        if not self._subscribers or row is None:
+            return
+        
+        if old is None:
+            event_type = TaskEventType.CREATED
+        elif new is None:
+            event_type = TaskEventType.DELETED
+        else:
+            event_type = TaskEventType.UPDATED
+        
+        self._sequence += 1
+        self.published += 1
+        frame = None
+        for subscription in list(self._subscribers):
+            if subscription.filter.matches(old) or subscription.filter.matches(new):
+                if frame is None:
+                    frame = format_frame(TaskEvent(
+                        id=self._sequence, type=event_type, task_id=row["id"], task=task
+                    ))
+                subscription.offer(frame)
+    
+    def stats(self) -> Dict[str, int]:
+        """Subscriber count and event counters."""
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "resyncs": self.resyncs,
+        }
+
+
+async def stream_frames(
+    bus: EventBus,
+    event_filter: EventFilter,
+    heartbeat: float
+) -> AsyncIterator[str]:
+    """
+    Body of a server-sent event stream.
+    
+    Subscribes when the stream starts and unsubscribes when the client
+    disconnects and the generator is closed.
+    
+    Args:
+        bus: Bus to subscribe to
+        event_filter: Events to deliver
+        heartbeat: Seconds of silence before a keepalive comment is sent
+    """
+    subscription = bus.subscribe(event_filter)
+    try:
+        # Flushes the response headers so the client knows it is connected
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        while True:
+            try:
+                yield await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT_FRAME
+    finally:
+        subscription.close()
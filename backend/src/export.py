@@ -0,0 +1,55 @@
+"""
+Serialization of task exports.
+
+Turns batches of tasks into NDJSON or CSV text chunks, one chunk per batch,
+for streaming responses.
+"""
+import csv
+import io
+import json
+from typing import AsyncIterator, List
+
+from .models import ExportFormat, Task
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+CSV_COLUMNS = list(Task.model_fields)
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[Task]]) -> AsyncIterator[str]:
+    """One JSON object per line."""
+    async for batch in batches:
+        yield "".join(task.model_dump_json() + "\n" for task in batch)
+
+
+async def csv_chunks(batches: AsyncIterator[List[Task]]) -> AsyncIterator[str]:
+    """A header row, then one row per task; nested fields are JSON-encoded."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    
+    async for batch in batches:
+        for task in batch:
+            row = task.model_dump(mode="json")
+            writer.writerow([
+                json.dumps(row[column]) if isinstance(row[column], (dict, list)) else row[column]
+                for column in CSV_COLUMNS
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    # Header only, when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_chunks(fmt: ExportFormat, batches: AsyncIterator[List[Task]]) -> AsyncIterator[str]:
+    """Serialize task batches in the given export format."""
+    if fmt == ExportFormat.CSV:
+        return csv_chunks(batches)
+    return ndjson_chunks(batches)
@@ -0,0 +1,234 @@
+"""
+Streaming bulk import of tasks from CSV or NDJSON files.
+
+Rows carry title, description and optionally assigned_to and due_date.
+They are validated one at a time and collected into batches; each batch is
+classified in parallel and written with one multi-row insert for the tasks
+and one for their history (DatabaseService.create_tasks). Memory is bounded
+by the batch size however large the file is.
+
+Invalid rows are reported with their row number instead of stopping the
+import. The CLI records a checkpoint after every written batch so an
+interrupted import resumes where it left off; a batch that was written but
+not yet checkpointed when the import stopped is imported again.
+
+Usage:
+    python -m src.importer tickets.csv --batch-size 1000 --errors errors.ndjson
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from .checkpoint import Checkpoint
+from .database import db_service
+from .models import CreateTaskRequest, ExportFormat, ImportRowError, format_validation_error
+
+
+logger = logging.getLogger(__name__)
+
+# Columns read from each row; anything else is ignored
+IMPORT_FIELDS = ("title", "description", "assigned_to", "due_date")
+
+
+@dataclass
+class ImportProgress:
+    """Running totals of an import."""
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+
+
+def detect_format(filename: Optional[str]) -> ExportFormat:
+    """Guess the file format from its name; NDJSON unless it ends in .csv."""
+    if filename and filename.lower().endswith(".csv"):
+        return ExportFormat.CSV
+    return ExportFormat.NDJSON
+
+
+def read_rows(
+    lines: Iterable[str],
+    fmt: ExportFormat
+) -> Iterator[Tuple[int, Union[Dict[str, Any], str]]]:
+    """
+    Parse an import file lazily.
+    
+    Args:
+        lines: Text lines of the file
+        fmt: CSV (with a header row) or NDJSON (one object per line)
+    
+    Yields:
+        (row number counting from 1, record), or (row number, error message)
+        for NDJSON lines that are not JSON objects. Blank NDJSON lines are
+        skipped without being numbered.
+    """
+    if fmt == ExportFormat.CSV:
+        for row, record in enumerate(csv.DictReader(lines), start=1):
+            yield row, record
+        return
+    
+    row = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, "Expected a JSON object"
+            continue
+        yield row, record
+
+
+def parse_record(record: Dict[str, Any]) -> CreateTaskRequest:
+    """
+    Build a create request from an import row.
+    
+    Raises:
+        ValidationError: If the row is not a valid task
+    """
+    values = {}
+    for name in IMPORT_FIELDS:
+        value = record.get(name)
+        # CSV has no nulls; an empty optional cell means "not set"
+        if value == "" and name in ("assigned_to", "due_date"):
+            value = None
+        if value is not None:
+            values[name] = value
+    return CreateTaskRequest.model_validate(values)
+
+
+async def import_rows(
+    service,
+    rows: Iterable[Tuple[int, Union[Dict[str, Any], str]]],
+    batch_size: int = 1000,
+    resume: Optional[ImportProgress] = None,
+    changed_by: str = "importer",
+    on_batch: Optional[Callable[[ImportProgress], None]] = None,
+    on_error: Optional[Callable[[ImportRowError], None]] = None
+) -> ImportProgress:
+    """
+    Import parsed rows through the database service in batches.
+    
+    Args:
+        service: DatabaseService to write through
+        rows: Output of read_rows()
+        batch_size: Valid rows per classification and insert batch
+        resume: Totals of an earlier run; rows it covered are skipped
+        changed_by: Recorded in the tasks' history
+        on_batch: Called with the totals after each batch is written
+        on_error: Called for each invalid row once its batch is written
+    
+    Returns:
+        Final totals, including those of the resumed run
+    """
+    progress = replace(resume) if resume else ImportProgress()
+    skip = progress.rows
+    batch: List[CreateTaskRequest] = []
+    # Errors of the batch being collected; reported once it is written
+    errors: List[ImportRowError] = []
+    
+    async def flush():
+        if batch:
+            await service.create_tasks(batch, changed_by=changed_by)
+            progress.imported += len(batch)
+            batch.clear()
+        if on_error:
+            for error in errors:
+                on_error(error)
+        errors.clear()
+        if on_batch:
+            on_batch(progress)
+    
+    for row, record in rows:
+        if row <= skip:
+            continue
+        
+        if isinstance(record, str):
+            error = ImportRowError(row=row, error=record)
+        else:
+            try:
+                batch.append(parse_record(record))
+                error = None
+            except ValidationError as e:
+                error = ImportRowError(row=row, error=format_validation_error(e), record=record)
+        
+        if error is not None:
+            progress.failed += 1
+            errors.append(error)
+        progress.rows = row
+        
+        if len(batch) >= batch_size:
+            await flush()
+    
+    await flush()
+    return progress
+
+
+async def run(args: argparse.Namespace) -> ImportProgress:
+    fmt = ExportFormat(args.format) if args.format else detect_format(args.source)
+    checkpoint = Checkpoint(
+        args.checkpoint or f"{args.source}.checkpoint", os.path.abspath(args.source), ImportProgress
+    )
+    previous = checkpoint.load() if not args.restart else ImportProgress()
+    if previous.rows:
+        logger.info("Resuming after row %d", previous.rows)
+    
+    errors_file = open(args.errors or f"{args.source}.errors.ndjson", "a" if previous.rows else "w")
+    
+    def on_batch(progress: ImportProgress):
+        checkpoint.save(progress)
+        logger.info(
+            "%d rows read, %d imported, %d failed",
+            progress.rows, progress.imported, progress.failed
+        )
+    
+    def on_error(error: ImportRowError):
+        errors_file.write(error.model_dump_json() + "\n")
+    
+    try:
+        with open(args.source, newline="", encoding="utf-8-sig") as f:
+            progress = await import_rows(
+                db_service,
+                read_rows(f, fmt),
+                batch_size=args.batch_size,
+                resume=previous,
+                on_batch=on_batch,
+                on_error=on_error
+            )
+    finally:
+        errors_file.close()
+        db_service.close()
+    
+    checkpoint.clear()
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", help="CSV or NDJSON file of tasks")
+    parser.add_argument("--format", choices=[fmt.value for fmt in ExportFormat],
+                        help="File format (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per batch")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <source>.checkpoint)")
+    parser.add_argument("--errors", help="Error file (default: <source>.errors.ndjson)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    progress = asyncio.run(run(args))
+    print(f"Imported {progress.imported} tasks, {progress.failed} rows failed")
+
+
+if __name__ == "__main__":
+    main()
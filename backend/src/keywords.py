@@ -0,0 +1,104 @@
+"""
+Multi-pattern keyword matching for the classifier.
+
+Keywords are compiled into a character trie. Every keyword has to start on a
+word boundary, so Aho-Corasick failure links are never needed: a walk that
+falls off the trie simply resumes at the next word start. The trie is
+rendered as a prefix-factored regular expression so the walk from every word
+start runs inside the regex engine, which reports the longest keyword found
+there; shorter keywords sharing that start are looked up from a table built
+alongside the expression. One pass over the text finds every keyword, at a
+cost that depends on the text length and not on how many keywords are
+registered.
+"""
+import re
+from typing import Any, Dict, Hashable, List, Optional, Pattern, Tuple
+
+
+# Key under which a trie node stores the keyword that ends there
+_END = ""
+
+
+class KeywordMatcher:
+    """Matches many keywords against a text in a single scan."""
+    
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+        self._pattern: Optional[Pattern] = None
+        self._prefixes: Dict[str, List[Tuple[str, List[Hashable]]]] = {}
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def add(self, keyword: str, tag: Hashable) -> None:
+        """
+        Register a keyword with a tag reported when it matches.
+        
+        A keyword may be registered several times with different tags.
+        """
+        node = self._root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            node[_END] = (keyword, [])
+            self._size += 1
+        if tag not in node[_END][1]:
+            node[_END][1].append(tag)
+        self._pattern = None
+    
+    def scan(self, text: str) -> List[Tuple[str, List[Hashable]]]:
+        """
+        Find the keywords that occur in text.
+        
+        A keyword matches when it starts at the beginning of a word; it may
+        run into a longer word, so "pay" matches "payment" but "now" does not
+        match "know". Each keyword is reported once, in order of its first
+        occurrence, together with its tags.
+        """
+        if not self._size:
+            return []
+        if self._pattern is None:
+            self._compile()
+        
+        found: Dict[str, List[Hashable]] = {}
+        for longest in dict.fromkeys(self._pattern.findall(text)):
+            for keyword, tags in self._prefixes[longest]:
+                if keyword not in found:
+                    found[keyword] = tags
+        
+        return list(found.items())
+    
+    def _compile(self) -> None:
+        """Build the scanning expression and the shared-prefix table."""
+        prefixes = {}
+        
+        def visit(node: Dict[str, Any], chain: List[Tuple[str, List[Hashable]]]):
+            if _END in node:
+                chain = chain + [node[_END]]
+                prefixes[node[_END][0]] = chain
+            for char, child in node.items():
+                if char != _END:
+                    visit(child, chain)
+        
+        visit(self._root, [])
+        self._prefixes = prefixes
+        # The lookahead keeps matches zero-width so keywords that start inside
+        # a multi-word match (e.g. "week" within "this week") are still seen
+        self._pattern = re.compile(r"\b(?=(" + self._render(self._root) + "))")
+    
+    @classmethod
+    def _render(cls, node: Dict[str, Any]) -> str:
+        """Render a trie node as a regex matching the longest keyword below it."""
+        branches = [
+            re.escape(char) + cls._render(child)
+            for char, child in sorted(node.items())
+            if char != _END
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if _END in node:
+            # A keyword ends here; longer keywords are optional (greedy)
+            return f"(?:{body})?"
+        return body
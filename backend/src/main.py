@@ -1,22 +1,55 @@
 """
 FastAPI application with task management endpoints.
 """
-from fastapi import FastAPI, HTTPException, Query, Path
+import csv
+import hashlib
+import io
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, Header, HTTPException, Query, Path, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, Optional
 from .models import (
     CreateTaskRequest, UpdateTaskRequest, Task, TaskWithHistory,
     TaskListResponse, DeleteTaskResponse, TaskStatus, TaskCategory,
-    TaskPriority, ErrorResponse
+    TaskPriority, ErrorResponse, BulkCreateTaskRequest, BulkItemResult,
+    BulkTaskResponse, BulkUpdateTaskRequest, CountMode, ExportFormat,
+    ImportResponse, ImportRowError, IMPORT_MAX_ERRORS, TaskSummary,
+    format_validation_error
 )
+from .classifier import classifier
 from .database import db_service
+from .events import EventFilter, stream_frames
+from .export import MEDIA_TYPES, export_chunks
+from .importer import ImportProgress, detect_format, import_rows, read_rows
 from .config import get_settings
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the enrichment workers and the escalator, and release the storage backend on shutdown."""
+    if db_service.enrichment is not None:
+        db_service.enrichment.start()
+    if db_service.escalator is not None:
+        db_service.escalator.start()
+    yield
+    if db_service.escalator is not None:
+        await db_service.escalator.stop()
+    if db_service.enrichment is not None:
+        await db_service.enrichment.stop()
+    db_service.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Smart Task Manager API",
     description="Task management system with auto-classification",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -26,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -39,6 +73,20 @@ async def root():
     }
 
 
+@app.get("/api/metrics")
+async def metrics():
+    """Cache hit/miss, change feed, enrichment and escalation counters for this worker."""
+    metrics = {
+        "cache": {**db_service.cache_stats(), "classifier": classifier.memo_stats()},
+        "events": db_service.events.stats()
+    }
+    if db_service.enrichment is not None:
+        metrics["enrichment"] = db_service.enrichment.stats()
+    if db_service.escalator is not None:
+        metrics["escalation"] = db_service.escalator.stats()
+    return metrics
+
+
 @app.post(
     "/api/tasks",
     response_model=Task,
@@ -67,6 +115,140 @@ async def create_task(task_data: CreateTaskRequest):
         )
 
 
+@app.post(
+    "/api/tasks/bulk",
+    response_model=BulkTaskResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Validation error"}
+    }
+)
+async def create_tasks_bulk(request: BulkCreateTaskRequest):
+    """
+    Create many tasks in one request.
+    
+    Each item is validated like a single create; valid items are classified
+    as a batch and written with one multi-row insert plus one history insert.
+    The response reports success or failure for every item by index. The
+    valid items are written together, so if the write fails each of them is
+    reported failed with the storage error.
+    """
+    results = {}
+    valid = []
+    
+    for index, item in enumerate(request.tasks):
+        try:
+            valid.append((index, CreateTaskRequest.model_validate(item)))
+        except ValidationError as e:
+            results[index] = BulkItemResult(
+                index=index,
+                success=False,
+                error=format_validation_error(e)
+            )
+    
+    try:
+        tasks = await db_service.create_tasks([task_data for _, task_data in valid])
+    except Exception as e:
+        logger.exception("Bulk create of %d tasks failed", len(valid))
+        tasks = []
+        for index, _ in valid:
+            results[index] = BulkItemResult(
+                index=index,
+                success=False,
+                error=f"Failed to create task: {str(e)}"
+            )
+    
+    for (index, _), task in zip(valid, tasks):
+        results[index] = BulkItemResult(index=index, success=True, task=task)
+    
+    ordered = [results[index] for index in sorted(results)]
+    return BulkTaskResponse(
+        results=ordered,
+        succeeded=len(tasks),
+        failed=len(ordered) - len(tasks)
+    )
+
+
+@app.post(
+    "/api/tasks/import",
+    response_model=ImportResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Unreadable file"}
+    }
+)
+async def import_tasks(
+    file: UploadFile = File(..., description="CSV or NDJSON file of tasks"),
+    import_format: Optional[ExportFormat] = Query(
+        None, alias="format", description="File format (default: from the file name)"
+    )
+):
+    """
+    Import a CSV or NDJSON file of tasks.
+    
+    Rows hold title, description and optionally assigned_to and due_date.
+    They are classified and inserted in batches of IMPORT_BATCH_SIZE, so the
+    file is never held in memory as a whole. Invalid rows are skipped and
+    reported by row number (the first IMPORT_MAX_ERRORS of them). For very
+    large or resumable imports use `python -m src.importer`.
+    """
+    fmt = import_format or detect_format(file.filename)
+    errors = []
+    
+    def on_batch(progress: ImportProgress):
+        logger.info(
+            "Import of %s: %d rows read, %d imported, %d failed",
+            file.filename, progress.rows, progress.imported, progress.failed
+        )
+    
+    def on_error(error: ImportRowError):
+        errors.append(error)
+    
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        progress = await import_rows(
+            db_service,
+            read_rows(lines, fmt),
+            batch_size=db_service.settings.import_batch_size,
+            on_batch=on_batch,
+            on_error=on_error
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable file: {str(e)}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to import tasks: {str(e)}"
+        )
+    finally:
+        lines.detach()
+    
+    return ImportResponse(
+        rows=progress.rows,
+        imported=progress.imported,
+        failed=progress.failed,
+        errors=errors[:IMPORT_MAX_ERRORS],
+        errors_truncated=len(errors) > IMPORT_MAX_ERRORS
+    )
+
+
+def _etag(*parts: Any) -> str:
+    """Strong entity tag hashed from the given parts."""
+    digest = hashlib.sha1("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
 @app.get(
     "/api/tasks",
     response_model=TaskListResponse,
@@ -75,26 +257,56 @@ async def create_task(task_data: CreateTaskRequest):
     }
 )
 async def list_tasks(
+    response: Response,
     status: Optional[TaskStatus] = Query(None, description="Filter by status"),
     category: Optional[TaskCategory] = Query(None, description="Filter by category"),
     priority: Optional[TaskPriority] = Query(None, description="Filter by priority"),
     search: Optional[str] = Query(None, description="Search in title and description"),
-    sort_by: str = Query("created_at", description="Field to sort by"),
-    sort_order: str = Query("desc", regex="^(asc|desc)$", description="Sort order"),
+    sort_by: str = Query("created_at", description="Field to sort by, or relevance when searching"),
+    sort_order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
     limit: int = Query(20, ge=1, le=100, description="Number of items to return"),
-    offset: int = Query(0, ge=0, description="Number of items to skip")
+    offset: int = Query(0, ge=0, description="Number of items to skip"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    count: CountMode = Query(CountMode.EXACT, description="How to compute total: exact, planned, estimated or none"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     List all tasks with filtering, sorting, and pagination.
     
     Supports:
     - Filtering by status, category, priority
-    - Text search in title and description
-    - Sorting by any field
-    - Pagination with limit and offset
+    - Indexed text search in title and description (word prefixes, with a
+      substring fallback)
+    - Sorting by any field, or by relevance (sort_by=relevance) when searching
+    - Pagination with limit and offset, or with a cursor (keyset pagination)
+    
+    Pass the returned next_cursor as `cursor` to fetch the following page;
+    cursor pages stay fast at any depth and are stable under inserts.
+    
+    `count` controls the total: `exact` counts every match (briefly cached),
+    `planned` and `estimated` use planner statistics, and `none` skips it
+    (total is null); has_more is reliable in every mode. Infinite-scroll
+    clients should pass `count=none` after the first page.
+    
+    Responses carry an ETag built from the listing parameters and a version
+    stamp that changes on every write; send it back in If-None-Match to get
+    304 Not Modified without the list being queried again.
     """
+    if cursor and offset:
+        raise HTTPException(
+            status_code=400,
+            detail="Use either cursor or offset, not both"
+        )
+    
+    etag = _etag(
+        db_service.list_version(), status, category, priority, search,
+        sort_by, sort_order, limit, offset, cursor, count
+    )
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    
     try:
-        tasks, total = await db_service.get_tasks(
+        tasks, total, next_cursor = await db_service.get_tasks(
             status=status,
             category=category,
             priority=priority,
@@ -102,18 +314,22 @@ async def list_tasks(
             sort_by=sort_by,
             sort_order=sort_order,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=cursor,
+            count=count
         )
         
-        has_more = (offset + limit) < total
-        
+        response.headers["ETag"] = etag
         return TaskListResponse(
             tasks=tasks,
             total=total,
             limit=limit,
             offset=offset,
-            has_more=has_more
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -121,32 +337,206 @@ async def list_tasks(
         )
 
 
+@app.get(
+    "/api/tasks/summary",
+    response_model=TaskSummary
+)
+async def get_summary(
+    due_soon_days: int = Query(3, ge=1, le=365, description="Days ahead counted as due soon")
+):
+    """
+    Dashboard counts over all tasks.
+    
+    Returns the number of tasks per status, category and priority, the
+    open tasks that are overdue, and the open tasks due within
+    due_soon_days, without listing any task.
+    """
+    try:
+        return await db_service.get_summary(due_soon_days)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to summarize tasks: {str(e)}"
+        )
+
+
+@app.get(
+    "/api/tasks/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}}
+)
+async def stream_tasks(
+    status: Optional[TaskStatus] = Query(None, description="Only tasks with this status"),
+    category: Optional[TaskCategory] = Query(None, description="Only tasks in this category"),
+    assigned_to: Optional[str] = Query(None, description="Only tasks assigned to this person")
+):
+    """
+    Server-sent events for every task created, updated or deleted.
+    
+    Each event is named after the change (created, updated, deleted) and
+    carries a TaskEvent as JSON. Filtered streams also receive changes
+    that move a task out of the filter. A "resync" event means the client
+    fell too far behind and events were dropped; refetch the list. Only
+    writes handled by this worker are streamed.
+    """
+    event_filter = EventFilter(
+        status=status.value if status else None,
+        category=category.value if category else None,
+        assigned_to=assigned_to
+    )
+    return StreamingResponse(
+        stream_frames(db_service.events, event_filter, db_service.settings.event_heartbeat),
+        media_type="text/event-stream",
+        # Keep proxies such as nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get(
+    "/api/tasks/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}},
+        400: {"model": ErrorResponse, "description": "Invalid parameters"}
+    }
+)
+async def export_tasks(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="Export format: ndjson or csv"),
+    status: Optional[TaskStatus] = Query(None, description="Filter by status"),
+    category: Optional[TaskCategory] = Query(None, description="Filter by category"),
+    priority: Optional[TaskPriority] = Query(None, description="Filter by priority"),
+    search: Optional[str] = Query(None, description="Search in title and description"),
+    sort_by: str = Query("created_at", description="Field to sort by, or relevance when searching"),
+    sort_order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order")
+):
+    """
+    Stream every task matching the filters as NDJSON or CSV.
+    
+    Takes the same filters and ordering as the task list. Rows are read in
+    keyset batches of EXPORT_BATCH_SIZE without counting and written out as
+    they arrive, so memory use does not grow with the number of tasks.
+    CSV exports JSON-encode extracted_entities and suggested_actions.
+    """
+    try:
+        batches = db_service.iter_task_batches(
+            status=status,
+            category=category,
+            priority=priority,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        export_chunks(export_format, batches),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format.value}"'}
+    )
+
+
 @app.get(
     "/api/tasks/{task_id}",
     response_model=TaskWithHistory,
     responses={
+        400: {"model": ErrorResponse, "description": "Invalid history cursor"},
         404: {"model": ErrorResponse, "description": "Task not found"}
     }
 )
 async def get_task(
-    task_id: str = Path(..., description="Task ID")
+    response: Response,
+    task_id: str = Path(..., description="Task ID"),
+    history_limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of history entries"),
+    history_cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_history_cursor"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
-    Get a single task by ID with complete history.
+    Get a single task by ID with its history.
     
-    Returns the task details along with all historical changes.
+    Returns the task details along with its historical changes, newest
+    first. Page through long histories with history_limit, passing the
+    returned next_history_cursor as history_cursor for the next page.
+    Cursors seek on (changed_at, id), so entries sharing a timestamp are
+    neither skipped nor repeated.
+    
+    The ETag is derived from the task's updated_at and the paging
+    parameters: every write that adds history also updates the task, so
+    updated_at versions the history too. A request with If-None-Match is
+    checked against the (usually cached) task first, and a match gets
+    304 Not Modified without reading the history.
     """
-    task = await db_service.get_task(task_id)
+    def task_etag(task: Task) -> str:
+        return _etag(task.id, task.updated_at.isoformat(), history_limit, history_cursor)
+    
+    if if_none_match:
+        task = await db_service.get_task(task_id)
+        if task is not None:
+            etag = task_etag(task)
+            if _etag_matches(if_none_match, etag):
+                return _not_modified(etag)
     
-    if not task:
+    try:
+        # One extra entry tells whether another page follows
+        result = await db_service.get_task_with_history(
+            task_id, history_limit + 1 if history_limit else None, history_cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not result:
         raise HTTPException(
             status_code=404,
             detail=f"Task not found: {task_id}"
         )
     
-    history = await db_service.get_task_history(task_id)
+    task, history = result
+    next_history_cursor = None
+    if history_limit and len(history) > history_limit:
+        history = history[:history_limit]
+        next_history_cursor = db_service.history_cursor(history[-1])
+    
+    response.headers["ETag"] = task_etag(task)
+    return TaskWithHistory(task=task, history=history, next_history_cursor=next_history_cursor)
+
+
+@app.patch(
+    "/api/tasks/bulk",
+    response_model=BulkTaskResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Validation error"}
+    }
+)
+async def update_tasks_bulk(request: BulkUpdateTaskRequest):
+    """
+    Update many tasks in one request.
     
-    return TaskWithHistory(task=task, history=history)
+    Apply one update to a list of task ids (e.g. move them all to
+    in_progress), or send a separate patch per task. Current rows are fetched,
+    updated and logged to history with one set-based operation each; every
+    task still gets its own history action. Results are reported per item.
+    """
+    updates = request.updates()
+    
+    try:
+        tasks = await db_service.update_tasks(updates)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to update tasks: {str(e)}"
+        )
+    
+    results = [
+        BulkItemResult(index=index, success=True, task=tasks[task_id])
+        if task_id in tasks else
+        BulkItemResult(index=index, success=False, error=f"Task not found: {task_id}")
+        for index, (task_id, _) in enumerate(updates)
+    ]
+    return BulkTaskResponse(
+        results=results,
+        succeeded=len(tasks),
+        failed=len(results) - len(tasks)
+    )
 
 
 @app.patch(
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -35,6 +35,33 @@ class TaskAction(str, Enum):
     COMPLETED = "completed"
 
 
+class EnrichmentStatus(str, Enum):
+    """Whether a task's extracted entities have been computed yet."""
+    PENDING = "pending"
+    COMPLETE = "complete"
+
+
+class CountMode(str, Enum):
+    """How the total of a task listing is computed."""
+    EXACT = "exact"
+    PLANNED = "planned"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+class TaskEventType(str, Enum):
+    """Kind of change in the task change feed."""
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
+class ExportFormat(str, Enum):
+    """File format of a task export or import."""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 # Request Models
 class CreateTaskRequest(BaseModel):
     """Request model for creating a task."""
@@ -51,6 +78,20 @@ class CreateTaskRequest(BaseModel):
         return v.strip()
 
 
+# Largest batch accepted by the bulk endpoints
+BULK_MAX_ITEMS = 5000
+
+
+class BulkCreateTaskRequest(BaseModel):
+    """
+    Request model for creating many tasks at once.
+    
+    Items are validated individually against CreateTaskRequest so that one
+    invalid item is reported on its own instead of rejecting the batch.
+    """
+    tasks: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
 class UpdateTaskRequest(BaseModel):
     """Request model for updating a task."""
     title: Optional[str] = Field(None, min_length=1, max_length=200)
@@ -62,6 +103,46 @@ class UpdateTaskRequest(BaseModel):
     due_date: Optional[datetime] = None
 
 
+class TaskPatch(UpdateTaskRequest):
+    """Partial update for one task of a bulk update."""
+    id: str
+
+
+class BulkUpdateTaskRequest(BaseModel):
+    """
+    Request model for updating many tasks at once.
+    
+    Either apply one `update` to every id in `task_ids`, or send `patches`
+    with a separate update per task.
+    """
+    task_ids: Optional[List[str]] = Field(None, min_length=1, max_length=BULK_MAX_ITEMS)
+    update: Optional[UpdateTaskRequest] = None
+    patches: Optional[List[TaskPatch]] = Field(None, min_length=1, max_length=BULK_MAX_ITEMS)
+    
+    @model_validator(mode="after")
+    def validate_mode(self) -> "BulkUpdateTaskRequest":
+        if self.patches is not None:
+            if self.task_ids is not None or self.update is not None:
+                raise ValueError("Send either patches or task_ids with update, not both")
+            ids = [patch.id for patch in self.patches]
+        elif self.task_ids is not None and self.update is not None:
+            ids = self.task_ids
+        else:
+            raise ValueError("Send task_ids with update, or patches")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Task ids must be unique")
+        return self
+    
+    def updates(self) -> List[tuple]:
+        """Return (task_id, UpdateTaskRequest) pairs in request order."""
+        if self.patches is not None:
+            return [
+                (patch.id, UpdateTaskRequest(**patch.model_dump(exclude={"id"})))
+                for patch in self.patches
+            ]
+        return [(task_id, self.update) for task_id in self.task_ids]
+
+
 # Response Models
 class ExtractedEntities(BaseModel):
     """Extracted entities from task content."""
@@ -83,6 +164,7 @@ class Task(BaseModel):
     due_date: Optional[datetime] = None
     extracted_entities: ExtractedEntities
     suggested_actions: List[str]
+    enrichment_status: EnrichmentStatus = EnrichmentStatus.COMPLETE
     created_at: datetime
     updated_at: datetime
 
@@ -102,15 +184,72 @@ class TaskWithHistory(BaseModel):
     """Task with complete history."""
     task: Task
     history: List[TaskHistory]
+    # Pass as history_cursor for the next page; None on the last page
+    next_history_cursor: Optional[str] = None
 
 
 class TaskListResponse(BaseModel):
     """Paginated task list response."""
     tasks: List[Task]
-    total: int
+    total: Optional[int] = None  # None when listed with count=none
     limit: int
     offset: int
     has_more: bool
+    next_cursor: Optional[str] = None
+
+
+class BulkItemResult(BaseModel):
+    """Outcome for one item of a bulk request."""
+    index: int
+    success: bool
+    task: Optional[Task] = None
+    error: Optional[str] = None
+
+
+class BulkTaskResponse(BaseModel):
+    """Per-item results of a bulk request."""
+    results: List[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
+class TaskSummary(BaseModel):
+    """Dashboard counts over all tasks."""
+    total: int
+    by_status: Dict[str, int]
+    by_category: Dict[str, int]
+    by_priority: Dict[str, int]
+    overdue: int
+    due_soon: int
+    due_soon_days: int
+
+
+class TaskEvent(BaseModel):
+    """A task change delivered by the change feed."""
+    id: int
+    type: TaskEventType
+    task_id: str
+    task: Optional[Task] = None  # None for deletes
+
+
+# Most row errors listed in an import response
+IMPORT_MAX_ERRORS = 100
+
+
+class ImportRowError(BaseModel):
+    """A row of an import file that could not be imported."""
+    row: int
+    error: str
+    record: Optional[Dict[str, Any]] = None
+
+
+class ImportResponse(BaseModel):
+    """Outcome of a file import."""
+    rows: int
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
 
 
 class DeleteTaskResponse(BaseModel):
@@ -124,3 +263,11 @@ class ErrorResponse(BaseModel):
     error: str
     details: Optional[List[Dict[str, str]]] = None
     status: int
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten a Pydantic validation error into one line."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'item'}: {detail['msg']}"
+        for detail in error.errors()
+    )
@@ -0,0 +1,239 @@
+"""
+Reclassify stored tasks after the keyword tables change.
+
+Tasks are read in created_at order with keyset pagination and classified
+across the classifier's process pool, while the next batch is already being
+read. Only tasks whose category, priority, extracted entities or suggested
+actions come out different are written: one read of the current rows, one
+update per distinct change and one history insert per batch, recorded as changed by
+"reclassifier". Tasks left pending by deferred enrichment are completed too.
+
+A checkpoint records the position after every written batch, so an
+interrupted run resumes where it stopped. It is tied to the keyword tables
+it was made with; after editing them again, start over with --restart.
+With --dry-run nothing is written and the changes are reported instead.
+
+Usage:
+    python -m src.reclassify --batch-size 2000
+    python -m src.reclassify --dry-run --report changes.ndjson
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .checkpoint import Checkpoint
+from .classifier import Classification, TaskClassifier, classifier
+from .database import db_service
+from .models import CountMode, EnrichmentStatus
+from .storage import TaskQuery
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReclassifyProgress:
+    """Running totals of a reclassification."""
+    scanned: int = 0
+    changed: int = 0
+    # Changed tasks per column
+    by_column: Dict[str, int] = field(default_factory=dict)
+    # Keyset position (created_at, id) of the last task done
+    after: Optional[List[Any]] = None
+
+
+def tables_fingerprint(task_classifier: TaskClassifier) -> str:
+    """Digest of the keyword and action tables a classification depends on."""
+    tables = {
+        "categories": {
+            category.value: keywords
+            for category, keywords in task_classifier.CATEGORY_KEYWORDS.items()
+        },
+        "priorities": {
+            priority.value: keywords
+            for priority, keywords in task_classifier.PRIORITY_KEYWORDS.items()
+        },
+        "verbs": task_classifier.ACTION_VERBS,
+        "actions": {
+            category.value: actions
+            for category, actions in task_classifier.SUGGESTED_ACTIONS.items()
+        },
+    }
+    return hashlib.sha256(json.dumps(tables, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def changed_columns(row: Dict[str, Any], classification: Classification) -> Dict[str, Any]:
+    """The classified columns of a task row that differ from a new classification."""
+    category, priority, entities, actions = classification
+    values = {
+        "category": category.value,
+        "priority": priority.value,
+        "extracted_entities": entities.model_dump(),
+        "suggested_actions": list(actions),
+    }
+    changes = {column: value for column, value in values.items() if row.get(column) != value}
+    if row.get("enrichment_status") == EnrichmentStatus.PENDING.value:
+        changes["enrichment_status"] = EnrichmentStatus.COMPLETE.value
+    return changes
+
+
+def _classification_input(row: Dict[str, Any]):
+    due_date = datetime.fromisoformat(row["due_date"]) if row.get("due_date") else None
+    return row["title"], row.get("description") or "", due_date
+
+
+async def reclassify(
+    service,
+    batch_size: int = 1000,
+    resume: Optional[ReclassifyProgress] = None,
+    dry_run: bool = False,
+    changed_by: str = "reclassifier",
+    on_batch: Optional[Callable[[ReclassifyProgress], None]] = None,
+    on_change: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None
+) -> ReclassifyProgress:
+    """
+    Reclassify every task and write back the ones that changed.
+    
+    Args:
+        service: DatabaseService to read and write through
+        batch_size: Tasks per read, classification and write
+        resume: Totals of an earlier run; tasks it covered are skipped
+        dry_run: Only report the changes
+        changed_by: Recorded in the history of changed tasks
+        on_batch: Called with the totals after each batch
+        on_change: Called with (row, changed columns) for every changed task
+    
+    Returns:
+        Final totals, including those of the resumed run
+    """
+    progress = replace(resume, by_column=dict(resume.by_column)) if resume else ReclassifyProgress()
+    query = TaskQuery(
+        sort_by="created_at",
+        sort_order="asc",
+        limit=batch_size,
+        count=CountMode.NONE.value,
+        after=tuple(progress.after) if progress.after else None
+    )
+    
+    reading = asyncio.create_task(service.storage.select_tasks(query))
+    try:
+        while True:
+            rows, _ = await reading
+            if not rows:
+                break
+            last = rows[-1]
+            query = replace(query, after=(last["created_at"], last["id"]))
+            # Read the next batch while this one is classified and written
+            reading = asyncio.create_task(service.storage.select_tasks(query))
+            
+            classifications = await asyncio.to_thread(
+                service.classify_batch, [_classification_input(row) for row in rows]
+            )
+            changes = {}
+            for row, classification in zip(rows, classifications):
+                row_changes = changed_columns(row, classification)
+                if row_changes:
+                    changes[row["id"]] = row_changes
+                    if on_change:
+                        on_change(row, row_changes)
+            
+            if changes and not dry_run:
+                await service.apply_changes(changes, changed_by=changed_by)
+            
+            progress.scanned += len(rows)
+            progress.changed += len(changes)
+            for row_changes in changes.values():
+                for column in row_changes:
+                    progress.by_column[column] = progress.by_column.get(column, 0) + 1
+            progress.after = list(query.after)
+            if on_batch:
+                on_batch(progress)
+            
+            if len(rows) < batch_size:
+                break
+    finally:
+        reading.cancel()
+    
+    return progress
+
+
+async def run(args: argparse.Namespace) -> ReclassifyProgress:
+    checkpoint = Checkpoint(args.checkpoint, tables_fingerprint(classifier), ReclassifyProgress)
+    if args.dry_run or args.restart:
+        previous = ReclassifyProgress()
+    else:
+        previous = checkpoint.load()
+    if previous.after:
+        logger.info("Resuming after %d tasks", previous.scanned)
+    
+    report = None
+    if args.report:
+        report = open(args.report, "w")
+    elif args.dry_run:
+        report = sys.stdout
+    started = time.monotonic()
+    
+    def on_batch(progress: ReclassifyProgress):
+        if not args.dry_run:
+            checkpoint.save(progress)
+        rate = (progress.scanned - previous.scanned) / max(time.monotonic() - started, 1e-9)
+        logger.info(
+            "%d tasks scanned, %d changed (%.0f tasks/s)",
+            progress.scanned, progress.changed, rate
+        )
+    
+    def on_change(row: Dict[str, Any], changes: Dict[str, Any]):
+        if report is not None:
+            report.write(json.dumps({
+                "id": row["id"],
+                "title": row["title"],
+                "changes": {
+                    column: {"old": row.get(column), "new": value}
+                    for column, value in changes.items()
+                },
+            }) + "\n")
+    
+    try:
+        progress = await reclassify(
+            db_service,
+            batch_size=args.batch_size,
+            resume=previous,
+            dry_run=args.dry_run,
+            on_batch=on_batch,
+            on_change=on_change
+        )
+    finally:
+        if report is not None and report is not sys.stdout:
+            report.close()
+        db_service.close()
+    
+    if not args.dry_run:
+        checkpoint.clear()
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000, help="Tasks per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    parser.add_argument("--report", help="Write changed tasks as NDJSON here (dry runs default to stdout)")
+    parser.add_argument("--checkpoint", default="reclassify.checkpoint", help="Checkpoint file")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    progress = asyncio.run(run(args))
+    verb = "Would change" if args.dry_run else "Changed"
+    columns = ", ".join(f"{column}: {count}" for column, count in sorted(progress.by_column.items()))
+    print(f"{verb} {progress.changed} of {progress.scanned} tasks ({columns or 'none'})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
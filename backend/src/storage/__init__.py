@@ -0,0 +1,52 @@
+"""
+Pluggable storage backends for tasks and task history.
+"""
+from .base import (
+    COUNT_MODES, SORTABLE_FIELDS, StorageBackend, TaskQuery, ThreadedStorage,
+    decode_cursor, decode_history_cursor, encode_cursor, encode_history_cursor, resolve_action
+)
+from .history import SNAPSHOT_INTERVAL, compact as compact_history, diff, expand as expand_history
+from .memory import MemoryStorage
+from .sqlite import SQLiteStorage
+from .supabase import SupabaseStorage
+from ..config import Settings
+
+
+def create_storage(settings: Settings) -> StorageBackend:
+    """Build the storage backend selected by the STORAGE_BACKEND setting."""
+    backend = settings.storage_backend.lower()
+    
+    if backend == "supabase":
+        return SupabaseStorage(
+            url=settings.supabase_url,
+            key=settings.supabase_key,
+            max_workers=settings.db_max_workers
+        )
+    if backend == "sqlite":
+        return SQLiteStorage(settings.sqlite_path, max_workers=settings.db_max_workers)
+    if backend == "memory":
+        return MemoryStorage()
+    
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+
+__all__ = [
+    "COUNT_MODES",
+    "SNAPSHOT_INTERVAL",
+    "SORTABLE_FIELDS",
+    "StorageBackend",
+    "TaskQuery",
+    "ThreadedStorage",
+    "MemoryStorage",
+    "SQLiteStorage",
+    "SupabaseStorage",
+    "compact_history",
+    "create_storage",
+    "decode_cursor",
+    "decode_history_cursor",
+    "diff",
+    "encode_cursor",
+    "encode_history_cursor",
+    "expand_history",
+    "resolve_action",
+]
@@ -0,0 +1,394 @@
+"""
+Storage backend interface shared by the Supabase, SQLite and in-memory engines.
+
+Backends work on plain records shaped like PostgREST rows: ids are strings,
+timestamps are ISO-8601 strings and JSON columns are Python objects. Parsing
+into Pydantic models stays in the database service.
+"""
+import asyncio
+import base64
+import binascii
+import json
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .history import diff
+from .search import RELEVANCE
+from ..models import TaskAction, TaskStatus
+
+
+# Columns that may be used for sorting task lists
+SORTABLE_FIELDS = (
+    "created_at", "updated_at", "due_date", "title",
+    "category", "priority", "status", "assigned_to"
+)
+
+# Ways of counting matches; backends without planner statistics treat
+# planned and estimated as exact
+COUNT_MODES = ("exact", "planned", "estimated", "none")
+
+
+@dataclass
+class TaskQuery:
+    """Filtering, sorting and pagination options for listing tasks."""
+    status: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[str] = None
+    search: Optional[str] = None
+    sort_by: str = "created_at"
+    sort_order: str = "desc"
+    limit: int = 20
+    offset: int = 0
+    # Keyset position (sort value, id) of the last row already returned;
+    # when set, rows are ordered by (sort_by, id) and start after it
+    after: Optional[Tuple[Any, str]] = None
+    # One of COUNT_MODES; "none" skips counting and returns no total
+    count: str = "exact"
+    
+    def __post_init__(self):
+        if self.sort_by not in SORTABLE_FIELDS and self.sort_by != RELEVANCE:
+            raise ValueError(f"Cannot sort by field: {self.sort_by}")
+        if self.sort_by == RELEVANCE and not self.search:
+            raise ValueError("Sorting by relevance requires a search term")
+        if self.sort_order not in ("asc", "desc"):
+            raise ValueError(f"Invalid sort order: {self.sort_order}")
+        if self.count not in COUNT_MODES:
+            raise ValueError(f"Invalid count mode: {self.count}")
+    
+    @property
+    def descending(self) -> bool:
+        return self.sort_order == "desc"
+
+
+def encode_cursor(query: TaskQuery, row: Dict[str, Any]) -> str:
+    """Build an opaque cursor pointing just after row in the query's order."""
+    payload = {
+        "s": query.sort_by,
+        "o": query.sort_order,
+        "v": row.get(query.sort_by),
+        "id": row["id"],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, str]:
+    """
+    Decode a cursor into its (sort value, id) keyset position.
+    
+    Cursors come from clients, so the id must be a UUID and the sort value
+    a scalar before either reaches a filter.
+    
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another order
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        position = (payload["v"], str(uuid.UUID(payload["id"])))
+        issued_for = (payload["s"], payload["o"])
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position[0], (str, int, float, type(None))):
+        raise ValueError("Invalid cursor")
+    
+    if issued_for != (sort_by, sort_order):
+        raise ValueError("Cursor was issued for a different sort order")
+    
+    return position
+
+
+def encode_history_cursor(changed_at: str, history_id: str) -> str:
+    """Build an opaque cursor pointing just after a history row, newest first."""
+    raw = json.dumps({"t": changed_at, "id": history_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a history cursor into its (changed_at, id) keyset position.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        changed_at = datetime.fromisoformat(payload["t"]).astimezone(timezone.utc)
+        history_id = str(uuid.UUID(payload["id"]))
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise ValueError("Invalid history cursor")
+    
+    return changed_at.isoformat(), history_id
+
+
+def new_id() -> str:
+    """Generate a record id."""
+    return str(uuid.uuid4())
+
+
+def utc_now() -> str:
+    """Current UTC time as an ISO-8601 string."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def resolve_action(current_status: str, new_status: Optional[str]) -> TaskAction:
+    """Determine the history action for a change from current_status to new_status."""
+    if new_status and new_status != current_status:
+        if new_status == TaskStatus.COMPLETED:
+            return TaskAction.COMPLETED
+        return TaskAction.STATUS_CHANGED
+    return TaskAction.UPDATED
+
+
+class StorageBackend(ABC):
+    """Persistence contract for tasks and their history."""
+    
+    @abstractmethod
+    async def insert_task(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a task and return the stored row."""
+    
+    async def insert_tasks(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert several tasks at once and return the stored rows in order."""
+        return [await self.insert_task(record) for record in records]
+    
+    @abstractmethod
+    async def select_tasks(
+        self,
+        query: TaskQuery
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Return one page of tasks matching the query and the total match count.
+        
+        Rows are ordered by the sort column with PostgreSQL null placement
+        (last ascending, first descending) and then by id in the same
+        direction. When query.after is set the page starts after that
+        keyset position and query.offset is ignored. The count is None
+        when query.count is "none".
+        
+        Searches follow the rules in storage.search. With
+        sort_by="relevance" each row also carries its "relevance" score.
+        """
+    
+    @abstractmethod
+    async def summarize_tasks(
+        self,
+        now: str,
+        due_soon_until: str,
+        facets: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Count tasks for the dashboard in one grouped query.
+        
+        Args:
+            now: ISO-8601 timestamp before which open tasks are overdue
+            due_soon_until: End of the due-soon window that starts at now
+            facets: Whether to count per status/category/priority as well;
+                without them only the due_date index range is read
+        
+        Returns:
+            Dict with "overdue" and "due_soon" (tasks not completed whose
+            due_date falls before now, or in [now, due_soon_until)) and, with
+            facets, "cells": one {"status", "category", "priority", "count"}
+            dict per combination that has tasks
+        """
+    
+    @abstractmethod
+    async def select_due_tasks(
+        self,
+        due_before: str,
+        due_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Open tasks due in a time range, read from the due_date index.
+        
+        Args:
+            due_before: ISO-8601 timestamp the due dates fall before
+            due_after: ISO-8601 timestamp the due dates fall at or after;
+                None for no lower bound
+        
+        Returns:
+            {"id", "due_date", "priority"} dicts of the tasks not completed,
+            in due_date order
+        """
+    
+    @abstractmethod
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Return a task row, or None if it does not exist."""
+    
+    async def get_tasks_by_ids(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """Return the rows for the given ids that exist."""
+        rows = [await self.get_task(task_id) for task_id in task_ids]
+        return [row for row in rows if row]
+    
+    @abstractmethod
+    async def update_task(
+        self,
+        task_id: str,
+        changes: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Apply changes to a task and return the updated row."""
+    
+    async def update_task_logged(
+        self,
+        task_id: str,
+        changes: Dict[str, Any],
+        changed_by: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Update a task and append its history row as one atomic operation.
+        
+        Returns a dict with the new row under "task", the history "action",
+        and the previous values of the changed columns under "previous"; or
+        None if the task does not exist.
+        """
+        current = await self.get_task(task_id)
+        if not current:
+            return None
+        updated = await self.update_task(task_id, changes)
+        if not updated:
+            return None
+        action = resolve_action(current["status"], updated["status"])
+        old_value, new_value = diff(current, updated)
+        await self.insert_history({
+            "task_id": task_id,
+            "action": action.value,
+            "old_value": old_value,
+            "new_value": new_value,
+            "changed_by": changed_by,
+            "is_snapshot": False
+        })
+        return {
+            "task": updated,
+            "action": action.value,
+            "previous": {column: current.get(column) for column in changes}
+        }
+    
+    async def update_tasks(
+        self,
+        task_ids: List[str],
+        changes: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Apply the same changes to several tasks and return the updated rows."""
+        rows = [await self.update_task(task_id, changes) for task_id in task_ids]
+        return [row for row in rows if row]
+    
+    async def update_tasks_logged(
+        self,
+        changes: Dict[str, Dict[str, Any]],
+        changed_by: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply per-task changes and append their history rows atomically.
+        
+        Only the given columns are written and missing tasks are skipped,
+        never inserted. The default runs update_task_logged() per task;
+        backends that can do it in one transaction override it.
+        
+        Args:
+            changes: Column changes keyed by task id
+            changed_by: Recorded in the history
+        
+        Returns:
+            One entry per updated task, shaped like update_task_logged()'s
+        """
+        results = [
+            await self.update_task_logged(task_id, task_changes, changed_by)
+            for task_id, task_changes in changes.items()
+        ]
+        return [result for result in results if result]
+    
+    @abstractmethod
+    async def delete_task(self, task_id: str) -> bool:
+        """Delete a task and its history. Returns False if it did not exist."""
+    
+    @abstractmethod
+    async def insert_history(self, record: Dict[str, Any]) -> None:
+        """
+        Append a history row.
+        
+        Records are delta-encoded (see storage.history) and carry
+        is_snapshot. The backend numbers each task's rows in seq and turns
+        every SNAPSHOT_INTERVAL-th row into a snapshot of the current task.
+        """
+    
+    async def insert_history_many(self, records: List[Dict[str, Any]]) -> None:
+        """Append several history rows at once."""
+        for record in records:
+            await self.insert_history(record)
+    
+    @abstractmethod
+    async def select_history(
+        self,
+        task_id: str,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return a task's history rows as stored (delta-encoded), newest first.
+        
+        Rows are ordered by (changed_at, id) descending, so rows sharing a
+        timestamp keep a stable order across pages.
+        
+        Args:
+            task_id: Task whose history to read
+            limit: Maximum number of rows (None for all)
+            before: Only rows after this (changed_at, id) keyset position,
+                as decoded by decode_history_cursor
+        """
+    
+    async def get_task_with_history(
+        self,
+        task_id: str,
+        history_limit: Optional[int] = None,
+        history_before: Optional[Tuple[str, str]] = None
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Return a task row with its history rows (as select_history), or None.
+        
+        The default issues both reads concurrently; backends that can fetch
+        them in one round trip override it.
+        """
+        task, history = await asyncio.gather(
+            self.get_task(task_id),
+            self.select_history(task_id, history_limit, history_before)
+        )
+        if task is None:
+            return None
+        return task, history
+    
+    async def compact_history(self, batch_size: int = 1000) -> int:
+        """
+        Delta-encode history rows written with full old and new values.
+        
+        Processes the rows of up to batch_size tasks per call; call until it
+        returns 0. Backends that never stored full rows have nothing to do.
+        
+        Returns:
+            Number of rows rewritten
+        """
+        return 0
+    
+    def close(self) -> None:
+        """Release resources held by the backend."""
+
+
+class ThreadedStorage(StorageBackend):
+    """Base for backends whose driver blocks; calls run on a bounded thread pool."""
+    
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="db"
+        )
+    
+    async def _run(self, fn: Callable, *args):
+        """Run a blocking call on the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,91 @@
+"""
+Delta encoding of task history.
+
+History rows store only the fields a change touched: old_value holds their
+previous values and new_value their new ones. A task's first row and every
+SNAPSHOT_INTERVAL-th row after it are snapshots whose new_value is the full
+row after the change, so full views can be rebuilt from the nearest older
+snapshot. Rows written before delta encoding (is_snapshot NULL) hold full
+rows on both sides and read like snapshots until compacted.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Rows per snapshot; assign_task_history_seq() in schema.sql uses the same value
+SNAPSHOT_INTERVAL = 16
+
+
+def diff(
+    old: Dict[str, Any],
+    new: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Old and new values of the fields that differ between two rows."""
+    keys = [key for key in new if key not in old or old[key] != new[key]]
+    return {key: old.get(key) for key in keys}, {key: new[key] for key in keys}
+
+
+def is_snapshot_seq(seq: int) -> bool:
+    """Whether the seq-th history row of a task (counting from 1) is a snapshot."""
+    return (seq - 1) % SNAPSHOT_INTERVAL == 0
+
+
+def expand(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Rebuild full old_value/new_value views of history rows.
+    
+    Args:
+        rows: One task's history rows, newest first; the oldest rows should
+            reach back to a snapshot
+    
+    Returns:
+        Rows in the same order with full views. Delta rows older than every
+        snapshot in rows are returned as stored.
+    """
+    expanded = []
+    state: Optional[Dict[str, Any]] = None
+    for row in reversed(rows):
+        old_part, new_part = row.get("old_value"), row.get("new_value")
+        if row.get("is_snapshot") is not False:
+            new_value = dict(new_part) if new_part is not None else None
+            if old_part is None or new_value is None:
+                old_value = old_part
+            else:
+                old_value = {**new_value, **old_part}
+            state = new_value
+        elif state is not None:
+            old_value = state
+            new_value = state = {**state, **(new_part or {})}
+        else:
+            old_value, new_value = old_part, new_part
+        expanded.append({**row, "old_value": old_value, "new_value": new_value})
+    expanded.reverse()
+    return expanded
+
+
+def compact(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Delta-encode one task's rows written with full old and new values.
+    
+    Args:
+        rows: The task's history rows, oldest first
+    
+    Returns:
+        The rows with seq, is_snapshot, old_value and new_value rewritten
+    """
+    compacted = []
+    for seq, row in enumerate(rows, start=1):
+        old_value, new_value = row.get("old_value"), row.get("new_value")
+        snapshot = old_value is None or new_value is None or is_snapshot_seq(seq)
+        if old_value is not None and new_value is not None:
+            old_delta, new_delta = diff(old_value, new_value)
+            old_value = old_delta
+            if not snapshot:
+                new_value = new_delta
+        compacted.append({
+            **row,
+            "seq": seq,
+            "is_snapshot": snapshot,
+            "old_value": old_value,
+            "new_value": new_value,
+        })
+    return compacted
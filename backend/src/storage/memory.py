@@ -0,0 +1,191 @@
+"""
+Pure in-memory storage backend.
+
+All state lives in Python dicts owned by the event loop; no method awaits
+between reading and writing, so operations are atomic without locking.
+"""
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+from .base import StorageBackend, TaskQuery, new_id, utc_now
+from .history import is_snapshot_seq
+from .search import RELEVANCE, SearchIndex
+
+
+class MemoryStorage(StorageBackend):
+    """Backend that keeps tasks and history in process memory."""
+    
+    def __init__(self):
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._history: Dict[str, List[Dict[str, Any]]] = {}
+        self._search = SearchIndex()
+    
+    async def insert_task(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        now = utc_now()
+        row = {
+            "id": new_id(), "status": "pending", "enrichment_status": "complete",
+            "created_at": now, "updated_at": now
+        }
+        row.update(record)
+        self._tasks[row["id"]] = row
+        self._history[row["id"]] = []
+        self._index(row)
+        return dict(row)
+    
+    async def select_tasks(
+        self,
+        query: TaskQuery
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        if query.search:
+            # Only the indexed matches are visited, not every task
+            scores = self._search.search(query.search)
+            matches = [
+                {**self._tasks[task_id], RELEVANCE: score}
+                if query.sort_by == RELEVANCE else self._tasks[task_id]
+                for task_id, score in scores.items()
+                if self._matches(self._tasks[task_id], query)
+            ]
+        else:
+            matches = [row for row in self._tasks.values() if self._matches(row, query)]
+        
+        # Match PostgreSQL null ordering: last when ascending, first when descending
+        matches.sort(key=lambda row: row["id"], reverse=query.descending)
+        matches.sort(
+            key=lambda row: (
+                row.get(query.sort_by) is None,
+                "" if row.get(query.sort_by) is None else row[query.sort_by]
+            ),
+            reverse=query.descending
+        )
+        
+        if query.after is not None:
+            page = [row for row in matches if self._is_after(row, query)][:query.limit]
+        else:
+            page = matches[query.offset:query.offset + query.limit]
+        total = None if query.count == "none" else len(matches)
+        return [dict(row) for row in page], total
+    
+    async def summarize_tasks(
+        self,
+        now: str,
+        due_soon_until: str,
+        facets: bool = True
+    ) -> Dict[str, Any]:
+        cells: Dict[Tuple[str, str, str], int] = {}
+        overdue = due_soon = 0
+        for row in self._tasks.values():
+            if facets:
+                key = (row.get("status"), row.get("category"), row.get("priority"))
+                cells[key] = cells.get(key, 0) + 1
+            due_date = row.get("due_date")
+            if due_date and row.get("status") != "completed" and due_date < due_soon_until:
+                if due_date < now:
+                    overdue += 1
+                else:
+                    due_soon += 1
+        
+        summary: Dict[str, Any] = {"overdue": overdue, "due_soon": due_soon}
+        if facets:
+            summary["cells"] = [
+                {"status": status, "category": category, "priority": priority, "count": count}
+                for (status, category, priority), count in cells.items()
+            ]
+        return summary
+    
+    async def select_due_tasks(
+        self,
+        due_before: str,
+        due_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        rows = [
+            {"id": row["id"], "due_date": row["due_date"], "priority": row.get("priority")}
+            for row in self._tasks.values()
+            if row.get("due_date") and row.get("status") != "completed"
+            and row["due_date"] < due_before
+            and (due_after is None or row["due_date"] >= due_after)
+        ]
+        rows.sort(key=lambda row: (row["due_date"], row["id"]))
+        return rows
+    
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._tasks.get(task_id)
+        return dict(row) if row else None
+    
+    async def update_task(
+        self,
+        task_id: str,
+        changes: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        row = self._tasks.get(task_id)
+        if row is None:
+            return None
+        row = {**row, **changes, "updated_at": utc_now()}
+        self._tasks[task_id] = row
+        self._index(row)
+        return dict(row)
+    
+    async def get_tasks_by_ids(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        return [dict(self._tasks[task_id]) for task_id in task_ids if task_id in self._tasks]
+    
+    async def delete_task(self, task_id: str) -> bool:
+        self._history.pop(task_id, None)
+        self._search.remove(task_id)
+        return self._tasks.pop(task_id, None) is not None
+    
+    async def insert_history(self, record: Dict[str, Any]) -> None:
+        row = {"id": new_id(), "changed_at": utc_now()}
+        row.update(record)
+        history = self._history.get(row["task_id"])
+        if history is None:
+            return
+        row["seq"] = len(history) + 1
+        row["is_snapshot"] = bool(row.get("is_snapshot"))
+        if is_snapshot_seq(row["seq"]) and not row["is_snapshot"]:
+            row["new_value"] = dict(self._tasks[row["task_id"]])
+            row["is_snapshot"] = True
+        history.append(row)
+    
+    async def select_history(
+        self,
+        task_id: str,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        rows = sorted(
+            self._history.get(task_id, []),
+            key=lambda row: (row["changed_at"], row["id"]),
+            reverse=True
+        )
+        if before is not None:
+            rows = (row for row in rows if (row["changed_at"], row["id"]) < before)
+        return [dict(row) for row in islice(rows, limit)]
+    
+    def _index(self, row: Dict[str, Any]):
+        """(Re)index a row's searchable text."""
+        self._search.add(row["id"], row.get("title"), row.get("description"))
+    
+    @staticmethod
+    def _is_after(row: Dict[str, Any], query: TaskQuery) -> bool:
+        """Whether row sorts after the query's keyset position."""
+        value, last_id = query.after
+        current = row.get(query.sort_by)
+        if query.descending:
+            # Nulls come first, then values high to low
+            if value is None:
+                return current is not None or row["id"] < last_id
+            return current is not None and (
+                current < value or (current == value and row["id"] < last_id)
+            )
+        # Values low to high, then nulls
+        if value is None:
+            return current is None and row["id"] > last_id
+        return current is None or current > value or (current == value and row["id"] > last_id)
+    
+    @staticmethod
+    def _matches(row: Dict[str, Any], query: TaskQuery) -> bool:
+        if query.status and row.get("status") != query.status:
+            return False
+        if query.category and row.get("category") != query.category:
+            return False
+        if query.priority and row.get("priority") != query.priority:
+            return False
+        return True
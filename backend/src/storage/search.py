@@ -0,0 +1,140 @@
+"""
+Text search shared by the storage backends.
+
+A task matches a search when every word of the search is a prefix of some
+word in its title or description (full-text match), or when the search
+string occurs anywhere in the title or description, ignoring case
+(substring fallback). Relevance weights title words above description words;
+substring-only matches rank last.
+"""
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Sort key that orders search results by relevance instead of a column
+RELEVANCE = "relevance"
+
+# Weight of one occurrence of a word, by field (mirrors setweight 'A'/'B')
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase words."""
+    return _WORD.findall(text.lower()) if text else []
+
+
+def trigrams(text: str) -> Set[str]:
+    """Every three-character window of an already lowercased string."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    Inverted index over task titles and descriptions.
+    
+    Words map to the tasks containing them (with a relevance weight) and are
+    kept sorted so that prefix lookups are a binary search. Trigrams narrow
+    the candidates for substring matches, so neither kind of lookup scans
+    every task.
+    """
+    
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._words: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._docs: Dict[str, Tuple[Dict[str, float], str, str]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._docs)
+    
+    def add(self, task_id: str, title: Optional[str], description: Optional[str]):
+        """Index a task, replacing any previous entry for it."""
+        self.remove(task_id)
+        
+        weights: Dict[str, float] = {}
+        for word in tokenize(title):
+            weights[word] = weights.get(word, 0.0) + TITLE_WEIGHT
+        for word in tokenize(description):
+            weights[word] = weights.get(word, 0.0) + DESCRIPTION_WEIGHT
+        
+        for word, weight in weights.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                insort(self._words, word)
+            postings[task_id] = weight
+        
+        title_text, description_text = (title or "").lower(), (description or "").lower()
+        for gram in trigrams(title_text) | trigrams(description_text):
+            self._trigrams.setdefault(gram, set()).add(task_id)
+        
+        self._docs[task_id] = (weights, title_text, description_text)
+    
+    def remove(self, task_id: str):
+        """Drop a task from the index if present."""
+        doc = self._docs.pop(task_id, None)
+        if doc is None:
+            return
+        weights, title_text, description_text = doc
+        
+        # Emptied postings are kept so the sorted word list stays consistent
+        for word in weights:
+            self._postings[word].pop(task_id, None)
+        for gram in trigrams(title_text) | trigrams(description_text):
+            self._trigrams[gram].discard(task_id)
+    
+    def search(self, text: str) -> Dict[str, float]:
+        """
+        Find the tasks matching a search.
+        
+        Args:
+            text: Search string as entered by the user
+        
+        Returns:
+            Relevance of every matching task keyed by id
+        """
+        scores: Dict[str, float] = {}
+        
+        words = tokenize(text)
+        if words:
+            per_word = [self._prefix_scores(word) for word in words]
+            for task_id in set.intersection(*(set(s) for s in per_word)):
+                scores[task_id] = sum(s[task_id] for s in per_word)
+        
+        for task_id in self._substring_matches(text.lower()):
+            scores.setdefault(task_id, 0.0)
+        
+        return scores
+    
+    def _prefix_scores(self, prefix: str) -> Dict[str, float]:
+        """Summed weight of the words starting with prefix, per task."""
+        scores: Dict[str, float] = {}
+        position = bisect_left(self._words, prefix)
+        while position < len(self._words) and self._words[position].startswith(prefix):
+            for task_id, weight in self._postings[self._words[position]].items():
+                scores[task_id] = scores.get(task_id, 0.0) + weight
+            position += 1
+        return scores
+    
+    def _substring_matches(self, needle: str) -> Set[str]:
+        """Tasks whose title or description contains needle."""
+        if not needle:
+            return set()
+        
+        grams = trigrams(needle)
+        if grams:
+            candidates = set.intersection(
+                *(self._trigrams.get(gram, set()) for gram in grams)
+            )
+        else:
+            # Too short for trigrams; check every task
+            candidates = set(self._docs)
+        
+        return {
+            task_id for task_id in candidates
+            if needle in self._docs[task_id][1] or needle in self._docs[task_id][2]
+        }
@@ -0,0 +1,684 @@
+"""
+Embedded SQLite storage backend.
+
+Uses a single WAL-mode connection guarded by a lock; statements are issued
+with parameters from fixed SQL templates so they are served from sqlite3's
+prepared-statement cache.
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from .base import TaskQuery, ThreadedStorage, new_id, resolve_action, utc_now
+from .history import compact, diff, is_snapshot_seq
+from .search import DESCRIPTION_WEIGHT, RELEVANCE, TITLE_WEIGHT, tokenize
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+  id TEXT PRIMARY KEY,
+  title TEXT NOT NULL,
+  description TEXT,
+  category TEXT CHECK (category IN ('scheduling', 'finance', 'technical', 'safety', 'general')),
+  priority TEXT CHECK (priority IN ('high', 'medium', 'low')),
+  status TEXT CHECK (status IN ('pending', 'in_progress', 'completed')) DEFAULT 'pending',
+  assigned_to TEXT,
+  due_date TEXT,
+  extracted_entities TEXT DEFAULT '{}',
+  suggested_actions TEXT DEFAULT '[]',
+  enrichment_status TEXT CHECK (enrichment_status IN ('pending', 'complete')) DEFAULT 'complete',
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS task_history (
+  id TEXT PRIMARY KEY,
+  task_id TEXT REFERENCES tasks(id) ON DELETE CASCADE,
+  action TEXT CHECK (action IN ('created', 'updated', 'status_changed', 'completed')),
+  old_value TEXT,
+  new_value TEXT,
+  changed_by TEXT,
+  changed_at TEXT NOT NULL,
+  seq INTEGER,
+  is_snapshot INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_task_history_task_id ON task_history(task_id);
+CREATE INDEX IF NOT EXISTS idx_task_history_changed_at ON task_history(changed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_task_history_task_changed
+  ON task_history(task_id, changed_at DESC, id DESC);
+"""
+
+# Full-text (word prefix) and trigram (substring) indexes over title and
+# description, kept in sync by triggers. Both are external-content tables
+# keyed by the tasks rowid; run 'rebuild' on them after a VACUUM.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+  title, description, content='tasks', content_rowid='rowid', prefix='2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_trigram USING fts5(
+  title, description, content='tasks', content_rowid='rowid', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_search_insert AFTER INSERT ON tasks BEGIN
+  INSERT INTO tasks_fts(rowid, title, description)
+    VALUES (new.rowid, new.title, new.description);
+  INSERT INTO tasks_trigram(rowid, title, description)
+    VALUES (new.rowid, new.title, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_search_delete AFTER DELETE ON tasks BEGIN
+  INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+    VALUES ('delete', old.rowid, old.title, old.description);
+  INSERT INTO tasks_trigram(tasks_trigram, rowid, title, description)
+    VALUES ('delete', old.rowid, old.title, old.description);
+END;
+
+-- Upserts set every column; only reindex when the text actually changed.
+-- Recreated on open so databases with the older unconditional trigger get it.
+DROP TRIGGER IF EXISTS tasks_search_update;
+CREATE TRIGGER tasks_search_update AFTER UPDATE OF title, description ON tasks
+WHEN old.title IS NOT new.title OR old.description IS NOT new.description BEGIN
+  INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+    VALUES ('delete', old.rowid, old.title, old.description);
+  INSERT INTO tasks_trigram(tasks_trigram, rowid, title, description)
+    VALUES ('delete', old.rowid, old.title, old.description);
+  INSERT INTO tasks_fts(rowid, title, description)
+    VALUES (new.rowid, new.title, new.description);
+  INSERT INTO tasks_trigram(rowid, title, description)
+    VALUES (new.rowid, new.title, new.description);
+END;
+"""
+
+TASK_COLUMNS = (
+    "id", "title", "description", "category", "priority", "status",
+    "assigned_to", "due_date", "extracted_entities", "suggested_actions",
+    "enrichment_status", "created_at", "updated_at"
+)
+HISTORY_COLUMNS = (
+    "id", "task_id", "action", "old_value", "new_value", "changed_by", "changed_at",
+    "seq", "is_snapshot"
+)
+JSON_COLUMNS = ("extracted_entities", "suggested_actions", "old_value", "new_value")
+BOOLEAN_COLUMNS = ("is_snapshot",)
+
+INSERT_TASK = (
+    f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in TASK_COLUMNS)})"
+)
+# seq is numbered by the insert itself, so no other write can take it in between
+APPENDED_COLUMNS = tuple(column for column in HISTORY_COLUMNS if column != "seq")
+APPEND_HISTORY = (
+    f"INSERT INTO task_history ({', '.join(APPENDED_COLUMNS)}, seq) "
+    f"SELECT {', '.join('?' for _ in APPENDED_COLUMNS)}, COALESCE(MAX(seq), 0) + 1 "
+    "FROM task_history WHERE task_id = ? RETURNING seq"
+)
+MAKE_SNAPSHOT = "UPDATE task_history SET new_value = ?, is_snapshot = 1 WHERE id = ?"
+SELECT_TASK = "SELECT * FROM tasks WHERE id = ?"
+
+# Ids bound per statement, below SQLite's host parameter limit
+ID_BATCH_SIZE = 500
+DELETE_TASK = "DELETE FROM tasks WHERE id = ?"
+SELECT_HISTORY = (
+    "SELECT * FROM task_history WHERE task_id = ? AND (changed_at, id) < (?, ?) "
+    "ORDER BY changed_at DESC, id DESC LIMIT ?"
+)
+# Keyset position above every row, for reads without "before"
+LATEST = ("9999", "")
+# One row per status/category/priority combination, with the open tasks
+# that are overdue or due soon
+SUMMARIZE_TASKS = (
+    "SELECT status, category, priority, COUNT(*) AS count, "
+    "COALESCE(SUM(status != 'completed' AND due_date < ?), 0) AS overdue, "
+    "COALESCE(SUM(status != 'completed' AND due_date >= ? AND due_date < ?), 0) AS due_soon "
+    "FROM tasks GROUP BY status, category, priority"
+)
+# Only the due counts; a range scan of idx_tasks_due_date
+COUNT_DUE = (
+    "SELECT COALESCE(SUM(due_date < ?), 0), COALESCE(SUM(due_date >= ?), 0) "
+    "FROM tasks WHERE due_date < ? AND status != 'completed'"
+)
+
+# Open tasks in a due_date range, for the priority escalator
+SELECT_DUE_TASKS = (
+    "SELECT id, due_date, priority FROM tasks "
+    "WHERE due_date >= ? AND due_date < ? AND status != 'completed' "
+    "ORDER BY due_date, id"
+)
+
+
+def _encode(column: str, value: Any) -> Any:
+    if column in JSON_COLUMNS and value is not None:
+        return json.dumps(value)
+    return value
+
+
+def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+    record = dict(row)
+    for column in JSON_COLUMNS:
+        if record.get(column) is not None:
+            record[column] = json.loads(record[column])
+    for column in BOOLEAN_COLUMNS:
+        if record.get(column) is not None:
+            record[column] = bool(record[column])
+    return record
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _fts_phrase(text: str) -> str:
+    """Quote text as a single FTS5 phrase."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _fts_prefix_query(words: List[str]) -> str:
+    """FTS5 query requiring a word starting with each of words."""
+    return " ".join(_fts_phrase(word) + "*" for word in words)
+
+
+class SQLiteStorage(ThreadedStorage):
+    """Backend backed by an embedded SQLite database file."""
+    
+    def __init__(self, path: str = "tasks.db", max_workers: int = 4):
+        """
+        Open (and if needed create) the database.
+        
+        Args:
+            path: Database file path, or ":memory:"
+            max_workers: Size of the thread pool queries run on
+        """
+        super().__init__(max_workers)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        
+        history_columns = {
+            row["name"] for row in self._conn.execute("PRAGMA table_info(task_history)")
+        }
+        if "seq" not in history_columns:
+            # Databases created before delta-encoded history
+            self._conn.execute("ALTER TABLE task_history ADD COLUMN seq INTEGER")
+            self._conn.execute("ALTER TABLE task_history ADD COLUMN is_snapshot INTEGER")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_task_history_task_seq ON task_history(task_id, seq DESC)"
+        )
+        
+        task_columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        if "enrichment_status" not in task_columns:
+            # Databases created before deferred enrichment
+            self._conn.execute(
+                "ALTER TABLE tasks ADD COLUMN enrichment_status TEXT "
+                "CHECK (enrichment_status IN ('pending', 'complete')) DEFAULT 'complete'"
+            )
+        
+        indexed = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'"
+        ).fetchone()
+        self._conn.executescript(SEARCH_SCHEMA)
+        if not indexed:
+            # Index rows written before the search tables existed
+            self._conn.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+            self._conn.execute("INSERT INTO tasks_trigram(tasks_trigram) VALUES ('rebuild')")
+    
+    async def insert_task(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return (await self._run(self._insert_tasks, [record]))[0]
+    
+    async def insert_tasks(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await self._run(self._insert_tasks, records)
+    
+    async def select_tasks(
+        self,
+        query: TaskQuery
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        return await self._run(self._select_tasks, query)
+    
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get_task, task_id)
+    
+    async def summarize_tasks(
+        self,
+        now: str,
+        due_soon_until: str,
+        facets: bool = True
+    ) -> Dict[str, Any]:
+        return await self._run(self._summarize_tasks, now, due_soon_until, facets)
+    
+    async def select_due_tasks(
+        self,
+        due_before: str,
+        due_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._run(self._select_due_tasks, due_before, due_after)
+    
+    async def update_task(
+        self,
+        task_id: str,
+        changes: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        return await self._run(self._update_task, task_id, changes)
+    
+    async def update_task_logged(
+        self,
+        task_id: str,
+        changes: Dict[str, Any],
+        changed_by: str
+    ) -> Optional[Dict[str, Any]]:
+        return await self._run(self._update_task_logged, task_id, changes, changed_by)
+    
+    async def get_tasks_by_ids(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self._run(self._get_tasks_by_ids, task_ids)
+    
+    async def update_tasks(
+        self,
+        task_ids: List[str],
+        changes: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        return await self._run(self._update_tasks, task_ids, changes)
+    
+    async def update_tasks_logged(
+        self,
+        changes: Dict[str, Dict[str, Any]],
+        changed_by: str
+    ) -> List[Dict[str, Any]]:
+        return await self._run(self._update_tasks_logged, changes, changed_by)
+    
+    async def delete_task(self, task_id: str) -> bool:
+        return await self._run(self._delete_task, task_id)
+    
+    async def insert_history(self, record: Dict[str, Any]) -> None:
+        await self._run(self._insert_history_many, [record])
+    
+    async def insert_history_many(self, records: List[Dict[str, Any]]) -> None:
+        await self._run(self._insert_history_many, records)
+    
+    async def select_history(
+        self,
+        task_id: str,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._run(self._select_history, task_id, limit, before)
+    
+    async def compact_history(self, batch_size: int = 1000) -> int:
+        return await self._run(self._compact_history, batch_size)
+    
+    async def get_task_with_history(
+        self,
+        task_id: str,
+        history_limit: Optional[int] = None,
+        history_before: Optional[Tuple[str, str]] = None
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        return await self._run(
+            self._get_task_with_history, task_id, history_limit, history_before
+        )
+    
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            self._conn.close()
+    
+    # Blocking implementations, run on the thread pool
+    
+    @contextmanager
+    def _transaction(self):
+        """Hold the connection lock and run the block in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+    
+    def _insert_tasks(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        now = utc_now()
+        rows = []
+        for record in records:
+            row = {column: None for column in TASK_COLUMNS}
+            row.update(
+                id=new_id(), status="pending", enrichment_status="complete",
+                created_at=now, updated_at=now
+            )
+            row.update(record)
+            rows.append(row)
+        
+        with self._transaction() as conn:
+            conn.executemany(
+                INSERT_TASK,
+                [[_encode(column, row[column]) for column in TASK_COLUMNS] for row in rows]
+            )
+        return rows
+    
+    def _select_tasks(
+        self,
+        query: TaskQuery
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        clauses, params = [], []
+        for column in ("status", "category", "priority"):
+            value = getattr(query, column)
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if query.search:
+            clause, clause_params = self._search_clause(query.search)
+            clauses.append(clause)
+            params.extend(clause_params)
+        
+        columns, source, source_params = "*", "tasks", []
+        if query.sort_by == RELEVANCE:
+            words = tokenize(query.search)
+            if words:
+                # Rank the full-text hits in one pass; bm25 is lower for better
+                # matches and substring-only matches get 0
+                columns = f"tasks.*, COALESCE(-score, 0.0) AS {RELEVANCE}"
+                source = (
+                    "tasks LEFT JOIN (SELECT rowid AS hit, bm25(tasks_fts, ?, ?) AS score "
+                    "FROM tasks_fts WHERE tasks_fts MATCH ?) ON hit = tasks.rowid"
+                )
+                source_params = [TITLE_WEIGHT, DESCRIPTION_WEIGHT, _fts_prefix_query(words)]
+            else:
+                columns = f"*, 0.0 AS {RELEVANCE}"
+        
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Match PostgreSQL null ordering: last when ascending, first when descending
+        direction = "DESC NULLS FIRST" if query.descending else "ASC NULLS LAST"
+        order = f" ORDER BY {query.sort_by} {direction}, id {query.sort_order.upper()}"
+        
+        page_clauses, page_params = list(clauses), list(params)
+        offset = query.offset
+        if query.after is not None:
+            seek, seek_params = self._seek_clause(query)
+            page_clauses.append(seek)
+            page_params.extend(seek_params)
+            offset = 0
+        page_where = f" WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        
+        with self._lock:
+            total = None
+            if query.count != "none":
+                total = self._conn.execute(
+                    f"SELECT COUNT(*) FROM tasks{where}", params
+                ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM {source}{page_where}{order} LIMIT ? OFFSET ?",
+                [*source_params, *page_params, query.limit, offset]
+            ).fetchall()
+        
+        return [_decode(row) for row in rows], total
+    
+    @staticmethod
+    def _search_clause(search: str) -> Tuple[str, List[Any]]:
+        """Predicate matching a search through the full-text and trigram indexes."""
+        matches, params = [], []
+        words = tokenize(search)
+        if words:
+            matches.append("tasks.rowid IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+            params.append(_fts_prefix_query(words))
+        if len(search) >= 3:
+            matches.append(
+                "tasks.rowid IN (SELECT rowid FROM tasks_trigram WHERE tasks_trigram MATCH ?)"
+            )
+            params.append(_fts_phrase(search))
+        else:
+            # Too short for trigrams
+            pattern = f"%{_escape_like(search)}%"
+            matches.append("title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\'")
+            params.extend([pattern, pattern])
+        return f"({' OR '.join(matches)})", params
+    
+    @staticmethod
+    def _seek_clause(query: TaskQuery) -> Tuple[str, List[Any]]:
+        """Predicate selecting rows after the query's keyset position."""
+        value, last_id = query.after
+        column = query.sort_by
+        if query.descending:
+            # Nulls come first, then values high to low
+            if value is None:
+                return f"({column} IS NOT NULL OR id < ?)", [last_id]
+            # The leading range term lets the column index bound the scan
+            return f"({column} <= ? AND ({column} < ? OR id < ?))", [value, value, last_id]
+        # Values low to high, then nulls
+        if value is None:
+            return f"({column} IS NULL AND id > ?)", [last_id]
+        return (
+            f"({column} > ? OR ({column} = ? AND id > ?) OR {column} IS NULL)",
+            [value, value, last_id]
+        )
+    
+    def _summarize_tasks(self, now: str, due_soon_until: str, facets: bool) -> Dict[str, Any]:
+        with self._lock:
+            if not facets:
+                overdue, due_soon = self._conn.execute(
+                    COUNT_DUE, (now, now, due_soon_until)
+                ).fetchone()
+                return {"overdue": overdue, "due_soon": due_soon}
+            rows = self._conn.execute(SUMMARIZE_TASKS, (now, now, due_soon_until)).fetchall()
+        
+        return {
+            "overdue": sum(row["overdue"] for row in rows),
+            "due_soon": sum(row["due_soon"] for row in rows),
+            "cells": [
+                {column: row[column] for column in ("status", "category", "priority", "count")}
+                for row in rows
+            ]
+        }
+    
+    def _select_due_tasks(self, due_before: str, due_after: Optional[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            # Every ISO-8601 string sorts after the empty one
+            rows = self._conn.execute(SELECT_DUE_TASKS, (due_after or "", due_before)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def _get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(SELECT_TASK, (task_id,)).fetchone()
+        return _decode(row) if row else None
+    
+    def _update_task(self, task_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._apply_update(task_id, changes)
+    
+    def _apply_update(self, task_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update one row and read it back; caller holds the lock."""
+        changes = {**changes, "updated_at": utc_now()}
+        columns = [column for column in TASK_COLUMNS if column in changes]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        params = [_encode(column, changes[column]) for column in columns]
+        
+        cursor = self._conn.execute(
+            f"UPDATE tasks SET {assignments} WHERE id = ?", [*params, task_id]
+        )
+        if cursor.rowcount == 0:
+            return None
+        return _decode(self._conn.execute(SELECT_TASK, (task_id,)).fetchone())
+    
+    def _update_task_logged(
+        self,
+        task_id: str,
+        changes: Dict[str, Any],
+        changed_by: str
+    ) -> Optional[Dict[str, Any]]:
+        with self._transaction() as conn:
+            row = conn.execute(SELECT_TASK, (task_id,)).fetchone()
+            if row is None:
+                return None
+            current = _decode(row)
+            updated = self._apply_update(task_id, changes)
+            action = resolve_action(current["status"], updated["status"]).value
+            old_value, new_value = diff(current, updated)
+            self._append_history([{
+                "task_id": task_id,
+                "action": action,
+                "old_value": old_value,
+                "new_value": new_value,
+                "changed_by": changed_by,
+                "is_snapshot": False
+            }])
+        return {
+            "task": updated,
+            "action": action,
+            "previous": {column: current.get(column) for column in changes}
+        }
+    
+    def _update_tasks_logged(
+        self,
+        changes: Dict[str, Dict[str, Any]],
+        changed_by: str
+    ) -> List[Dict[str, Any]]:
+        # Rows, updates and history in one transaction: all or nothing
+        results, history = [], []
+        with self._transaction():
+            for current in self._select_by_ids(list(changes)):
+                task_changes = changes[current["id"]]
+                updated = self._apply_update(current["id"], task_changes)
+                action = resolve_action(current["status"], updated["status"]).value
+                old_value, new_value = diff(current, updated)
+                history.append({
+                    "task_id": current["id"],
+                    "action": action,
+                    "old_value": old_value,
+                    "new_value": new_value,
+                    "changed_by": changed_by,
+                    "is_snapshot": False
+                })
+                results.append({
+                    "task": updated,
+                    "action": action,
+                    "previous": {column: current.get(column) for column in task_changes}
+                })
+            self._append_history(history)
+        return results
+    
+    def _select_by_ids(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch rows by id; caller holds the lock."""
+        rows = []
+        for start in range(0, len(task_ids), ID_BATCH_SIZE):
+            batch = task_ids[start:start + ID_BATCH_SIZE]
+            rows.extend(self._conn.execute(
+                f"SELECT * FROM tasks WHERE id IN ({', '.join('?' for _ in batch)})", batch
+            ).fetchall())
+        return [_decode(row) for row in rows]
+    
+    def _get_tasks_by_ids(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._select_by_ids(task_ids)
+    
+    def _update_tasks(self, task_ids: List[str], changes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        changes = {**changes, "updated_at": utc_now()}
+        columns = [column for column in TASK_COLUMNS if column in changes]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        params = [_encode(column, changes[column]) for column in columns]
+        
+        with self._transaction() as conn:
+            for start in range(0, len(task_ids), ID_BATCH_SIZE):
+                batch = task_ids[start:start + ID_BATCH_SIZE]
+                conn.execute(
+                    f"UPDATE tasks SET {assignments} WHERE id IN ({', '.join('?' for _ in batch)})",
+                    [*params, *batch]
+                )
+            return self._select_by_ids(task_ids)
+    
+    def _delete_task(self, task_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(DELETE_TASK, (task_id,)).rowcount > 0
+    
+    def _insert_history_many(self, records: List[Dict[str, Any]]) -> None:
+        with self._transaction():
+            self._append_history(records)
+    
+    def _compact_history(self, batch_size: int) -> int:
+        with self._transaction() as conn:
+            task_ids = [row[0] for row in conn.execute(
+                "SELECT DISTINCT task_id FROM task_history WHERE is_snapshot IS NULL LIMIT ?",
+                (batch_size,)
+            )]
+            compacted = []
+            for task_id in task_ids:
+                rows = conn.execute(
+                    "SELECT * FROM task_history WHERE task_id = ? AND is_snapshot IS NULL "
+                    "ORDER BY changed_at, rowid",
+                    (task_id,)
+                ).fetchall()
+                compacted.extend(compact(_decode(row) for row in rows))
+            conn.executemany(
+                "UPDATE task_history SET seq = ?, is_snapshot = ?, old_value = ?, new_value = ? "
+                "WHERE id = ?",
+                [
+                    (row["seq"], row["is_snapshot"], _encode("old_value", row["old_value"]),
+                     _encode("new_value", row["new_value"]), row["id"])
+                    for row in compacted
+                ]
+            )
+        return len(compacted)
+    
+    def _append_history(self, records: List[Dict[str, Any]]) -> None:
+        """Number and insert history rows, adding due snapshots; caller holds a transaction."""
+        now = utc_now()
+        for record in records:
+            row = {"id": new_id(), "changed_at": now}
+            row.update(record)
+            row["is_snapshot"] = bool(row.get("is_snapshot"))
+            
+            seq = self._conn.execute(
+                APPEND_HISTORY,
+                [*(_encode(column, row.get(column)) for column in APPENDED_COLUMNS), row["task_id"]]
+            ).fetchone()[0]
+            if is_snapshot_seq(seq) and not row["is_snapshot"]:
+                task = self._conn.execute(SELECT_TASK, (row["task_id"],)).fetchone()
+                if task is not None:
+                    self._conn.execute(
+                        MAKE_SNAPSHOT, (_encode("new_value", _decode(task)), row["id"])
+                    )
+    
+    def _select_history(
+        self,
+        task_id: str,
+        limit: Optional[int],
+        before: Optional[Tuple[str, str]]
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._read_history(task_id, limit, before)
+    
+    def _read_history(
+        self,
+        task_id: str,
+        limit: Optional[int],
+        before: Optional[Tuple[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """Read a task's history rows; caller holds the lock."""
+        rows = self._conn.execute(
+            SELECT_HISTORY,
+            (task_id, *(before or LATEST), -1 if limit is None else limit)
+        ).fetchall()
+        return [_decode(row) for row in rows]
+    
+    def _get_task_with_history(
+        self,
+        task_id: str,
+        history_limit: Optional[int],
+        history_before: Optional[Tuple[str, str]]
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        # Both reads under one lock, so they see the same state
+        with self._lock:
+            row = self._conn.execute(SELECT_TASK, (task_id,)).fetchone()
+            if row is None:
+                return None
+            return _decode(row), self._read_history(task_id, history_limit, history_before)
@@ -0,0 +1,333 @@
+"""
+Supabase (PostgREST) storage backend.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from supabase import create_client, Client
+from .base import TaskQuery, ThreadedStorage
+from .search import tokenize
+
+
+# Ids per request for id-list filters, keeping URLs well under proxy limits
+ID_BATCH_SIZE = 300
+
+# Rows per request when reading a due_date range; PostgREST caps responses
+DUE_PAGE_SIZE = 1000
+
+
+def _quote(value: Any) -> str:
+    """Quote a value for use inside a PostgREST logical (or/and) filter."""
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+class SupabaseStorage(ThreadedStorage):
+    """Backend that talks to a Supabase project through PostgREST."""
+    
+    def __init__(
+        self,
+        url: str = "",
+        key: str = "",
+        client: Optional[Client] = None,
+        max_workers: int = 16
+    ):
+        """
+        Initialize the Supabase client.
+        
+        Args:
+            url: Supabase project URL
+            key: Supabase API key
+            client: Pre-built client (takes precedence over url/key)
+            max_workers: Size of the query thread pool
+        """
+        super().__init__(max_workers)
+        if client is None:
+            if not url or not key:
+                raise ValueError("SUPABASE_URL and SUPABASE_KEY are required for the supabase backend")
+            client = create_client(url, key)
+        self.client: Client = client
+    
+    async def _execute(self, query):
+        """Run a blocking query builder on the thread pool."""
+        return await self._run(query.execute)
+    
+    async def insert_task(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self._execute(self.client.table("tasks").insert(record))
+        
+        if not result.data:
+            raise Exception("Failed to create task")
+        
+        return result.data[0]
+    
+    async def insert_tasks(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not records:
+            return []
+        
+        # One multi-row INSERT; PostgREST returns the rows in input order
+        result = await self._execute(self.client.table("tasks").insert(records))
+        
+        if len(result.data) != len(records):
+            raise Exception("Failed to create tasks")
+        
+        return result.data
+    
+    async def select_tasks(
+        self,
+        query: TaskQuery
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        # Build query; planned/estimated counts come from planner statistics
+        # instead of a full COUNT(*) over the filtered set
+        count = None if query.count == "none" else query.count
+        if query.search:
+            # search_tasks (schema.sql) matches through the full-text and
+            # trigram indexes and adds a relevance column to each row
+            request = self.client.rpc(
+                "search_tasks",
+                {"p_search": query.search, "p_tsquery": self._tsquery(query.search)},
+                count=count
+            )
+        else:
+            request = self.client.table("tasks").select("*", count=count)
+        
+        # Apply filters
+        if query.status:
+            request = request.eq("status", query.status)
+        if query.category:
+            request = request.eq("category", query.category)
+        if query.priority:
+            request = request.eq("priority", query.priority)
+        
+        # Apply sorting (PostgreSQL null placement, id as tiebreaker) and pagination
+        request = request.order(query.sort_by, desc=query.descending, nullsfirst=query.descending)
+        request = request.order("id", desc=query.descending)
+        if query.after is not None:
+            request = self._seek(request, query).limit(query.limit)
+        else:
+            request = request.range(query.offset, query.offset + query.limit - 1)
+        
+        result = await self._execute(request)
+        if count is None:
+            return result.data, None
+        return result.data, result.count or 0
+    
+    @staticmethod
+    def _tsquery(search: str) -> str:
+        """Prefix tsquery requiring every word of search, e.g. 'fix:* & bug:*'."""
+        return " & ".join(f"{word}:*" for word in tokenize(search))
+    
+    @staticmethod
+    def _seek(request, query: TaskQuery):
+        """Add the predicate selecting rows after the query's keyset position."""
+        value, last_id = query.after
+        column = query.sort_by
+        if query.descending:
+            # Nulls come first, then values high to low
+            if value is None:
+                return request.or_(f"{column}.not.is.null,id.lt.{_quote(last_id)}")
+            # The range term is sargable, so idx_tasks_created_at /
+            # idx_tasks_due_date bound the scan; the OR breaks ties on id
+            return request.lte(column, value).or_(
+                f"{column}.lt.{_quote(value)},id.lt.{_quote(last_id)}"
+            )
+        # Values low to high, then nulls
+        if value is None:
+            return request.is_(column, "null").gt("id", last_id)
+        return request.or_(
+            f"{column}.gt.{_quote(value)},"
+            f"and({column}.eq.{_quote(value)},id.gt.{_quote(last_id)}),"
+            f"{column}.is.null"
+        )
+    
+    async def summarize_tasks(
+        self,
+        now: str,
+        due_soon_until: str,
+        facets: bool = True
+    ) -> Dict[str, Any]:
+        # task_summary (schema.sql) groups server-side; one round trip
+        result = await self._execute(
+            self.client.rpc("task_summary", {
+                "p_now": now,
+                "p_due_soon_until": due_soon_until,
+                "p_facets": facets
+            })
+        )
+        return result.data
+    
+    async def select_due_tasks(
+        self,
+        due_before: str,
+        due_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        rows = []
+        while True:
+            query = (
+                self.client.table("tasks")
+                .select("id,due_date,priority")
+                .lt("due_date", due_before)
+                .neq("status", "completed")
+            )
+            if due_after is not None:
+                query = query.gte("due_date", due_after)
+            result = await self._execute(
+                query.order("due_date").order("id").range(len(rows), len(rows) + DUE_PAGE_SIZE - 1)
+            )
+            rows.extend(result.data)
+            if len(result.data) < DUE_PAGE_SIZE:
+                return rows
+    
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        result = await self._execute(
+            self.client.table("tasks").select("*").eq("id", task_id)
+        )
+        return result.data[0] if result.data else None
+    
+    async def update_task(
+        self,
+        task_id: str,
+        changes: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        result = await self._execute(
+            self.client.table("tasks")
+            .update(changes)
+            .eq("id", task_id)
+        )
+        return result.data[0] if result.data else None
+    
+    async def update_task_logged(
+        self,
+        task_id: str,
+        changes: Dict[str, Any],
+        changed_by: str
+    ) -> Optional[Dict[str, Any]]:
+        # update_task_with_history (schema.sql) updates the row and writes
+        # the history entry server-side, so a PATCH is a single round trip
+        result = await self._execute(
+            self.client.rpc("update_task_with_history", {
+                "p_task_id": task_id,
+                "p_changes": changes,
+                "p_changed_by": changed_by
+            })
+        )
+        return result.data or None
+    
+    async def update_tasks_logged(
+        self,
+        changes: Dict[str, Dict[str, Any]],
+        changed_by: str
+    ) -> List[Dict[str, Any]]:
+        if not changes:
+            return []
+        
+        # bulk_update_with_history (schema.sql) applies every task's changes
+        # in one UPDATE ... FROM jsonb_to_recordset and inserts the history
+        # in the same transaction
+        result = await self._execute(
+            self.client.rpc("bulk_update_with_history", {
+                "p_changes": [
+                    {"id": task_id, "changes": task_changes}
+                    for task_id, task_changes in changes.items()
+                ],
+                "p_changed_by": changed_by
+            })
+        )
+        return result.data or []
+    
+    async def get_tasks_by_ids(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        rows = []
+        for start in range(0, len(task_ids), ID_BATCH_SIZE):
+            result = await self._execute(
+                self.client.table("tasks")
+                .select("*")
+                .in_("id", task_ids[start:start + ID_BATCH_SIZE])
+            )
+            rows.extend(result.data)
+        return rows
+    
+    async def update_tasks(
+        self,
+        task_ids: List[str],
+        changes: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        rows = []
+        for start in range(0, len(task_ids), ID_BATCH_SIZE):
+            result = await self._execute(
+                self.client.table("tasks")
+                .update(changes)
+                .in_("id", task_ids[start:start + ID_BATCH_SIZE])
+            )
+            rows.extend(result.data)
+        return rows
+    
+    async def delete_task(self, task_id: str) -> bool:
+        result = await self._execute(
+            self.client.table("tasks").delete().eq("id", task_id)
+        )
+        return len(result.data) > 0
+    
+    async def insert_history(self, record: Dict[str, Any]) -> None:
+        await self._execute(self.client.table("task_history").insert(record))
+    
+    async def insert_history_many(self, records: List[Dict[str, Any]]) -> None:
+        if records:
+            await self._execute(self.client.table("task_history").insert(records))
+    
+    async def select_history(
+        self,
+        task_id: str,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        request = (
+            self.client.table("task_history")
+            .select("*")
+            .eq("task_id", task_id)
+            .order("changed_at", desc=True)
+            .order("id", desc=True)
+        )
+        if before is not None:
+            changed_at, last_id = before
+            request = request.lte("changed_at", changed_at).or_(
+                f"changed_at.lt.{_quote(changed_at)},id.lt.{_quote(last_id)}"
+            )
+        if limit is not None:
+            request = request.limit(limit)
+        
+        result = await self._execute(request)
+        return result.data
+    
+    async def compact_history(self, batch_size: int = 1000) -> int:
+        result = await self._execute(
+            self.client.rpc("compact_task_history", {"p_batch_size": batch_size})
+        )
+        return result.data or 0
+    
+    async def get_task_with_history(
+        self,
+        task_id: str,
+        history_limit: Optional[int] = None,
+        history_before: Optional[Tuple[str, str]] = None
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        # One request: history rows are embedded through the task_id foreign key
+        request = (
+            self.client.table("tasks")
+            .select("*, task_history(*)")
+            .eq("id", task_id)
+            .order("changed_at", desc=True, foreign_table="task_history")
+            .order("id", desc=True, foreign_table="task_history")
+        )
+        if history_before is not None:
+            changed_at, last_id = history_before
+            request = request.lte("task_history.changed_at", changed_at).or_(
+                f"changed_at.lt.{_quote(changed_at)},id.lt.{_quote(last_id)}",
+                reference_table="task_history"
+            )
+        if history_limit is not None:
+            request = request.limit(history_limit, foreign_table="task_history")
+        
+        result = await self._execute(request)
+        if not result.data:
+            return None
+        
+        task = dict(result.data[0])
+        history = task.pop("task_history") or []
+        return task, history
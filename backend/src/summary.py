@@ -0,0 +1,95 @@
+"""
+Dashboard summary counts.
+
+The storage backends count tasks per status/category/priority combination
+("cells"); facet_counts() folds the cells into totals per facet.
+SummaryCounters keeps the cells current in process from the rows each write
+changes, so the facets need no query between resyncs. Overdue and due-soon
+counts depend on the clock and are always read, which only scans the
+due_date index.
+"""
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .models import TaskCategory, TaskPriority, TaskStatus
+
+# (status, category, priority)
+Cell = Tuple[str, str, str]
+
+
+def cell_of(row: Dict[str, Any]) -> Cell:
+    """The cell a task row is counted in."""
+    return row.get("status"), row.get("category"), row.get("priority")
+
+
+def facet_counts(cells: Iterable[Tuple[Cell, int]]) -> Dict[str, Any]:
+    """
+    Total tasks per status, category and priority.
+    
+    Every enum value is present, with 0 when no task has it.
+    """
+    by_status = {status.value: 0 for status in TaskStatus}
+    by_category = {category.value: 0 for category in TaskCategory}
+    by_priority = {priority.value: 0 for priority in TaskPriority}
+    total = 0
+    for (status, category, priority), count in cells:
+        total += count
+        by_status[status] = by_status.get(status, 0) + count
+        by_category[category] = by_category.get(category, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
+    return {
+        "total": total,
+        "by_status": by_status,
+        "by_category": by_category,
+        "by_priority": by_priority,
+    }
+
+
+class SummaryCounters:
+    """
+    Task counts per cell, maintained incrementally by the write paths.
+    
+    Loaded from a grouped query and then adjusted by apply() for every task
+    a write creates, changes or deletes. Writes made by other processes, or
+    that race a reload, are not accounted exactly, so the counters go stale
+    after ttl seconds and are reloaded.
+    """
+    
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: Seconds between reloads from storage
+            clock: Time source, injectable for tests
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._cells: Counter = Counter()
+        self._loaded_at: Optional[float] = None
+    
+    def is_fresh(self) -> bool:
+        """Whether the counters were loaded less than ttl seconds ago."""
+        return self._loaded_at is not None and self._clock() - self._loaded_at < self.ttl
+    
+    def load(self, cells: Iterable[Tuple[Cell, int]]):
+        """Replace the counts with ones read from storage."""
+        self._cells = Counter(dict(cells))
+        self._loaded_at = self._clock()
+    
+    def apply(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """
+        Account for one write.
+        
+        Args:
+            old: The task row before the write (None for a create)
+            new: The task row after the write (None for a delete)
+        """
+        if self._loaded_at is None:
+            return
+        if old is not None:
+            self._cells[cell_of(old)] -= 1
+        if new is not None:
+            self._cells[cell_of(new)] += 1
+    
+    def cells(self) -> List[Tuple[Cell, int]]:
+        """Current counts of the non-empty cells."""
+        return [(cell, count) for cell, count in self._cells.items() if count > 0]
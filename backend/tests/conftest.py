@@ -0,0 +1,8 @@
+"""
+Shared test configuration.
+"""
+import os
+
+# Settings are read when the database module is imported; run the global
+# service against the in-memory backend so no live project is needed.
+os.environ.setdefault("STORAGE_BACKEND", "memory")
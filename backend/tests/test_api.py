@@ -0,0 +1,477 @@
+"""
+API tests against the in-memory storage backend.
+"""
+import base64
+import csv
+import io
+import json
+import time
+import pytest
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from src import database
+from src.main import app
+from src.database import db_service
+from src.export import CSV_COLUMNS
+from src.storage import MemoryStorage
+
+
+@pytest.fixture
+def client():
+    """Create a test client backed by a fresh in-memory store."""
+    db_service.storage = MemoryStorage()
+    db_service.count_cache.clear()
+    db_service.task_cache.clear()
+    return TestClient(app)
+
+
+def create(client, title: str, description: str = "Regular task") -> dict:
+    response = client.post("/api/tasks", json={"title": title, "description": description})
+    assert response.status_code == 201
+    return response.json()
+
+
+class TestTaskEndpoints:
+    """Test the CRUD endpoints end to end."""
+    
+    def test_create_and_get_task(self, client):
+        """Test that a created task is returned with its history."""
+        task = create(client, "Fix critical bug", "System error needs urgent repair")
+        
+        response = client.get(f"/api/tasks/{task['id']}")
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert body["task"]["category"] == "technical"
+        assert [entry["action"] for entry in body["history"]] == ["created"]
+    
+    def test_update_logs_status_change(self, client):
+        """Test that completing a task records a completed action."""
+        task = create(client, "Review report")
+        
+        response = client.patch(f"/api/tasks/{task['id']}", json={"status": "completed"})
+        history = client.get(f"/api/tasks/{task['id']}").json()["history"]
+        
+        assert response.json()["status"] == "completed"
+        assert history[0]["action"] == "completed"
+        assert history[0]["old_value"]["status"] == "pending"
+    
+    def test_list_filters_and_paginates(self, client):
+        """Test list filtering and the has_more flag."""
+        for i in range(3):
+            create(client, f"Pay invoice {i}")
+        create(client, "Random task")
+        
+        response = client.get("/api/tasks", params={"category": "finance", "limit": 2})
+        body = response.json()
+        
+        assert body["total"] == 3
+        assert len(body["tasks"]) == 2
+        assert body["has_more"] is True
+    
+    def test_list_rejects_unknown_sort_field(self, client):
+        """Test that an unsortable field is a client error."""
+        response = client.get("/api/tasks", params={"sort_by": "nope"})
+        
+        assert response.status_code == 400
+    
+    def test_delete_task(self, client):
+        """Test delete followed by a 404."""
+        task = create(client, "Temporary")
+        
+        assert client.delete(f"/api/tasks/{task['id']}").status_code == 200
+        assert client.get(f"/api/tasks/{task['id']}").status_code == 404
+
+
+class TestBulkEndpoints:
+    """Test the bulk endpoints."""
+    
+    def test_bulk_create_reports_each_item(self, client):
+        """Test that valid items are created and invalid ones reported."""
+        payload = {"tasks": [
+            {"title": "Pay invoice", "description": "Finance team"},
+            {"title": "   ", "description": "Blank title"},
+            {"title": "Fix bug", "description": "System error"},
+        ]}
+        
+        response = client.post("/api/tasks/bulk", json=payload)
+        body = response.json()
+        
+        assert response.status_code == 200
+        assert (body["succeeded"], body["failed"]) == (2, 1)
+        assert [item["success"] for item in body["results"]] == [True, False, True]
+        assert body["results"][1]["error"].startswith("title")
+        assert body["results"][2]["task"]["category"] == "technical"
+        
+        task_id = body["results"][0]["task"]["id"]
+        history = client.get(f"/api/tasks/{task_id}").json()["history"]
+        assert [entry["action"] for entry in history] == ["created"]
+    
+    def test_bulk_create_reports_a_failed_write_per_item(self, client, monkeypatch):
+        """Test that a failed insert is reported on every valid item."""
+        async def fail(records):
+            raise RuntimeError("connection reset")
+        
+        monkeypatch.setattr(db_service.storage, "insert_tasks", fail)
+        payload = {"tasks": [
+            {"title": "Pay invoice", "description": "Finance team"},
+            {"title": "   ", "description": "Blank title"},
+            {"title": "Fix bug", "description": "System error"},
+        ]}
+        
+        response = client.post("/api/tasks/bulk", json=payload)
+        body = response.json()
+        
+        assert response.status_code == 200
+        assert (body["succeeded"], body["failed"]) == (0, 3)
+        assert body["results"][1]["error"].startswith("title")
+        assert body["results"][0]["error"] == "Failed to create task: connection reset"
+        assert body["results"][2]["error"] == body["results"][0]["error"]
+        assert client.get("/api/tasks").json()["total"] == 0
+    
+    def test_bulk_status_transition(self, client):
+        """Test one update applied to many ids, with per-task actions."""
+        done = create(client, "Already done")
+        client.patch(f"/api/tasks/{done['id']}", json={"status": "completed"})
+        pending = create(client, "Pending work")
+        
+        response = client.patch("/api/tasks/bulk", json={
+            "task_ids": [pending["id"], done["id"], "missing"],
+            "update": {"status": "completed"},
+        })
+        body = response.json()
+        
+        assert (body["succeeded"], body["failed"]) == (2, 1)
+        assert body["results"][2]["error"] == "Task not found: missing"
+        assert client.get(f"/api/tasks/{pending['id']}").json()["history"][0]["action"] == "completed"
+        assert client.get(f"/api/tasks/{done['id']}").json()["history"][0]["action"] == "updated"
+    
+    def test_bulk_per_task_patches(self, client):
+        """Test different patches per task in one request."""
+        first = create(client, "First")
+        second = create(client, "Second")
+        
+        response = client.patch("/api/tasks/bulk", json={"patches": [
+            {"id": first["id"], "status": "in_progress"},
+            {"id": second["id"], "priority": "high", "assigned_to": "Sam"},
+        ]})
+        tasks = [item["task"] for item in response.json()["results"]]
+        
+        assert tasks[0]["status"] == "in_progress"
+        assert (tasks[1]["priority"], tasks[1]["assigned_to"]) == ("high", "Sam")
+        assert tasks[1]["title"] == "Second"
+        assert client.get(f"/api/tasks/{first['id']}").json()["history"][0]["action"] == "status_changed"
+    
+    def test_bulk_update_requires_one_mode(self, client):
+        """Test that mixing or omitting modes is rejected."""
+        response = client.patch("/api/tasks/bulk", json={"task_ids": ["a"]})
+        
+        assert response.status_code == 422
+
+
+class TestCursorPagination:
+    """Test keyset pagination on the list endpoint."""
+    
+    def test_cursor_pages_are_stable_under_inserts(self, client):
+        """Test that inserts between pages neither skip nor repeat rows."""
+        for i in range(5):
+            create(client, f"Task {i}")
+        
+        first = client.get("/api/tasks", params={"limit": 2}).json()
+        create(client, "Inserted meanwhile")
+        second = client.get("/api/tasks", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+        third = client.get("/api/tasks", params={"limit": 2, "cursor": second["next_cursor"]}).json()
+        
+        titles = [task["title"] for page in (first, second, third) for task in page["tasks"]]
+        assert sorted(titles) == [f"Task {i}" for i in range(5)]
+        assert third["has_more"] is False
+        assert third["next_cursor"] is None
+    
+    def test_cursor_with_offset_is_rejected(self, client):
+        """Test that cursor and offset cannot be combined."""
+        response = client.get("/api/tasks", params={"cursor": "abc", "offset": 5})
+        
+        assert response.status_code == 400
+    
+    def test_invalid_cursor_is_rejected(self, client):
+        """Test that a malformed cursor is a client error."""
+        response = client.get("/api/tasks", params={"cursor": "abc"})
+        
+        assert response.status_code == 400
+    
+    def test_cursor_with_forged_id_is_rejected(self, client):
+        """Test that a cursor id that is not a UUID is a client error."""
+        payload = {"s": "created_at", "o": "desc", "v": None, "id": "x,status.eq.completed"}
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        
+        response = client.get("/api/tasks", params={"cursor": cursor})
+        
+        assert response.status_code == 400
+
+
+class TestCountModes:
+    """Test the count parameter of the list endpoint."""
+    
+    def test_count_none_returns_null_total(self, client):
+        """Test that count=none omits the total but keeps has_more."""
+        for i in range(3):
+            create(client, f"Task {i}")
+        
+        body = client.get("/api/tasks", params={"limit": 2, "count": "none"}).json()
+        
+        assert body["total"] is None
+        assert body["has_more"] is True
+    
+    def test_estimated_count_returns_total(self, client):
+        """Test that backends without planner statistics count exactly."""
+        create(client, "Task")
+        
+        body = client.get("/api/tasks", params={"count": "estimated"}).json()
+        
+        assert body["total"] == 1
+    
+    def test_unknown_count_mode_is_rejected(self, client):
+        """Test that the count mode is validated."""
+        response = client.get("/api/tasks", params={"count": "approximate"})
+        
+        assert response.status_code == 422
+
+
+class TestSearch:
+    """Test search through the list endpoint."""
+    
+    def test_sort_by_relevance(self, client):
+        """Test that relevance order puts title matches first."""
+        create(client, "Call vendor", "Ask about the invoice")
+        create(client, "Invoice overdue", "Pay it this week")
+        
+        body = client.get("/api/tasks", params={"search": "invoice", "sort_by": "relevance"}).json()
+        
+        assert [task["title"] for task in body["tasks"]] == ["Invoice overdue", "Call vendor"]
+    
+    def test_relevance_without_search_is_rejected(self, client):
+        """Test that relevance order needs a search term."""
+        response = client.get("/api/tasks", params={"sort_by": "relevance"})
+        
+        assert response.status_code == 400
+
+
+class TestMetrics:
+    """Test the metrics endpoint."""
+    
+    def test_reports_task_cache_hits(self, client):
+        """Test that repeat reads of a task show up as cache hits."""
+        task = create(client, "Hot task")
+        before = client.get("/api/metrics").json()["cache"]["tasks"]["hits"]
+        
+        client.get(f"/api/tasks/{task['id']}")
+        client.get(f"/api/tasks/{task['id']}")
+        
+        after = client.get("/api/metrics").json()["cache"]["tasks"]["hits"]
+        assert after - before == 2
+
+
+class TestConditionalRequests:
+    """Test ETag and If-None-Match handling."""
+    
+    def test_task_not_modified(self, client):
+        """Test that a matching ETag gets an empty 304."""
+        task = create(client, "Cached task")
+        first = client.get(f"/api/tasks/{task['id']}")
+        
+        second = client.get(
+            f"/api/tasks/{task['id']}", headers={"If-None-Match": first.headers["etag"]}
+        )
+        
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == first.headers["etag"]
+    
+    def test_task_not_modified_skips_history(self, client, monkeypatch):
+        """Test that a revalidated task is answered without reading its history."""
+        task = create(client, "Cached task")
+        etag = client.get(f"/api/tasks/{task['id']}").headers["etag"]
+        
+        async def no_history(*args, **kwargs):
+            raise AssertionError("history read for a 304")
+        
+        monkeypatch.setattr(db_service, "get_task_with_history", no_history)
+        response = client.get(f"/api/tasks/{task['id']}", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 304
+    
+    def test_task_etag_changes_on_update(self, client):
+        """Test that an update invalidates the task's ETag."""
+        task = create(client, "Cached task")
+        etag = client.get(f"/api/tasks/{task['id']}").headers["etag"]
+        
+        client.patch(f"/api/tasks/{task['id']}", json={"status": "in_progress"})
+        response = client.get(f"/api/tasks/{task['id']}", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+    
+    def test_list_not_modified_until_write(self, client, monkeypatch):
+        """Test that list ETags hold until a task is written."""
+        # Stay inside one cache TTL window, which is part of the list version
+        frozen = SimpleNamespace(time=lambda: 1_700_000_000.0, time_ns=time.time_ns)
+        monkeypatch.setattr(database, "time", frozen)
+        create(client, "First")
+        etag = client.get("/api/tasks", params={"status": "pending"}).headers["etag"]
+        
+        unchanged = client.get(
+            "/api/tasks", params={"status": "pending"}, headers={"If-None-Match": f'W/{etag}, "x"'}
+        )
+        other_filter = client.get(
+            "/api/tasks", params={"status": "completed"}, headers={"If-None-Match": etag}
+        )
+        create(client, "Second")
+        changed = client.get(
+            "/api/tasks", params={"status": "pending"}, headers={"If-None-Match": etag}
+        )
+        
+        assert unchanged.status_code == 304
+        assert other_filter.status_code == 200
+        assert changed.status_code == 200
+        assert len(changed.json()["tasks"]) == 2
+
+
+class TestTaskHistoryPages:
+    """Test history pagination on the task endpoint."""
+    
+    def test_history_limit_and_cursor(self, client):
+        """Test paging through a task's history."""
+        task = create(client, "Paged task")
+        for status in ("in_progress", "completed"):
+            client.patch(f"/api/tasks/{task['id']}", json={"status": status})
+        
+        first = client.get(f"/api/tasks/{task['id']}", params={"history_limit": 2}).json()
+        rest = client.get(
+            f"/api/tasks/{task['id']}",
+            params={"history_limit": 2, "history_cursor": first["next_history_cursor"]}
+        ).json()
+        
+        assert [entry["action"] for entry in first["history"]] == ["completed", "status_changed"]
+        assert [entry["action"] for entry in rest["history"]] == ["created"]
+        assert rest["next_history_cursor"] is None
+    
+    def test_invalid_history_cursor_is_rejected(self, client):
+        """Test that a malformed history cursor is a client error."""
+        task = create(client, "Paged task")
+        
+        response = client.get(f"/api/tasks/{task['id']}", params={"history_cursor": "abc"})
+        
+        assert response.status_code == 400
+
+
+class TestExport:
+    """Test streaming exports."""
+    
+    def test_ndjson_export_streams_every_match(self, client, monkeypatch):
+        """Test that an export spans several keyset batches without gaps."""
+        monkeypatch.setattr(db_service.settings, "export_batch_size", 2)
+        for i in range(5):
+            create(client, f"Pay invoice {i}")
+        create(client, "Random task")
+        
+        response = client.get("/api/tasks/export", params={"category": "finance", "sort_order": "asc"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["title"] for row in rows] == [f"Pay invoice {i}" for i in range(5)]
+    
+    def test_csv_export(self, client):
+        """Test the CSV header and JSON-encoded nested fields."""
+        task = create(client, "Pay invoice")
+        
+        response = client.get("/api/tasks/export", params={"format": "csv"})
+        
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["id"] for row in rows] == [task["id"]]
+        assert json.loads(rows[0]["suggested_actions"]) == task["suggested_actions"]
+    
+    def test_empty_csv_export_has_header(self, client):
+        """Test that an export with no matches still has its header row."""
+        response = client.get("/api/tasks/export", params={"format": "csv"})
+        
+        assert response.text.splitlines() == [",".join(CSV_COLUMNS)]
+    
+    def test_export_rejects_unknown_sort_field(self, client):
+        """Test that invalid parameters fail before streaming starts."""
+        response = client.get("/api/tasks/export", params={"sort_by": "bogus"})
+        
+        assert response.status_code == 400
+
+
+class TestImport:
+    """Test file uploads to the import endpoint."""
+    
+    def test_csv_upload(self, client):
+        """Test that valid rows are created and invalid ones reported."""
+        content = (
+            "title,description,assigned_to,due_date\n"
+            "Pay invoice,Pay the supplier invoice,Ana,\n"
+            ",Missing title,,\n"
+            "Fix server bug,Critical outage,,2030-01-01T09:00:00\n"
+        )
+        
+        response = client.post(
+            "/api/tasks/import",
+            files={"file": ("tickets.csv", content, "text/csv")}
+        )
+        
+        body = response.json()
+        assert response.status_code == 200
+        assert (body["rows"], body["imported"], body["failed"]) == (3, 2, 1)
+        assert body["errors"][0]["row"] == 2
+        tasks = client.get("/api/tasks", params={"sort_by": "title", "sort_order": "asc"}).json()["tasks"]
+        assert [(task["title"], task["category"]) for task in tasks] == [
+            ("Fix server bug", "technical"), ("Pay invoice", "finance")
+        ]
+    
+    def test_ndjson_upload_with_explicit_format(self, client):
+        """Test NDJSON uploads whatever the file is called."""
+        content = json.dumps({"title": "Call client", "description": "Follow up"}) + "\n"
+        
+        response = client.post(
+            "/api/tasks/import",
+            params={"format": "ndjson"},
+            files={"file": ("upload.txt", content, "application/octet-stream")}
+        )
+        
+        assert response.json()["imported"] == 1
+    
+    def test_undecodable_upload_is_rejected(self, client):
+        """Test that a file that is not UTF-8 text gets a 400."""
+        response = client.post(
+            "/api/tasks/import",
+            files={"file": ("tickets.csv", b"title,description\n\xff\xfe,x\n", "text/csv")}
+        )
+        
+        assert response.status_code == 400
+
+
+class TestSummary:
+    """Test the dashboard summary endpoint."""
+    
+    def test_summary_counts_every_facet(self, client):
+        """Test facet totals with zero-filled values and the due windows."""
+        create(client, "Pay invoice")
+        task = create(client, "Fix server bug", "System error")
+        client.patch(f"/api/tasks/{task['id']}", json={"status": "completed"})
+        client.post("/api/tasks", json={
+            "title": "Renew license", "description": "Expires soon",
+            "due_date": "2000-01-01T00:00:00"
+        })
+        
+        response = client.get("/api/tasks/summary", params={"due_soon_days": 7})
+        
+        body = response.json()
+        assert response.status_code == 200
+        assert body["total"] == 3
+        assert body["by_status"] == {"pending": 2, "in_progress": 0, "completed": 1}
+        assert body["by_category"]["safety"] == 0
+        assert (body["overdue"], body["due_soon"], body["due_soon_days"]) == (1, 0, 7)
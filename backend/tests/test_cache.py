@@ -0,0 +1,71 @@
+"""
+Unit tests for the in-process cache.
+"""
+from src.cache import TTLCache
+
+
+class FakeClock:
+    """Manually advanced time source."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    """Test LRU eviction, expiry and statistics."""
+    
+    def test_get_counts_hits_and_misses(self):
+        """Test that lookups are counted."""
+        cache = TTLCache()
+        cache.set("a", 1)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that a recent lookup protects an entry from eviction."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert len(cache) == 2
+    
+    def test_entries_expire_after_ttl(self):
+        """Test that entries older than the TTL are misses."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=5, clock=clock)
+        cache.set("a", 1)
+        
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    def test_zero_size_cache_stores_nothing(self):
+        """Test that maxsize 0 disables caching."""
+        cache = TTLCache(maxsize=0)
+        cache.set("a", 1)
+        
+        assert cache.get("a") is None
+    
+    def test_pop_and_clear(self):
+        """Test explicit invalidation."""
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        cache.pop("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
@@ -1,9 +1,12 @@
 """
 Unit tests for the task classification engine.
 """
+import pickle
 import pytest
-from datetime import datetime, timedelta
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
 from src.classifier import TaskClassifier
+from src.keywords import KeywordMatcher
 from src.models import TaskCategory, TaskPriority
 
 
@@ -103,6 +106,14 @@ class TestPriorityAssignment:
         
         assert priority == TaskPriority.MEDIUM
     
+    def test_timezone_aware_due_date(self, classifier):
+        """Test that due dates with a UTC offset, as stored, are compared correctly."""
+        due_date = datetime.now(timezone.utc) + timedelta(hours=6)
+        
+        _, priority, _, _ = classifier.classify("Regular task", "Normal work", due_date)
+        
+        assert priority == TaskPriority.HIGH
+    
     def test_low_priority_default(self, classifier):
         """Test that low priority is the default."""
         title = "Future enhancement"
@@ -149,6 +160,35 @@ class TestEntityExtraction:
         assert any(action.lower() in ["schedule", "prepare", "review", "send"] 
                   for action in entities.actions)
     
+    def test_extract_locations(self, classifier):
+        """Test named places and room numbers, including rooms inside places."""
+        title = "Inspect wiring"
+        description = "Meet at Main Office 4 and then in the Warehouse"
+        
+        _, _, entities, _ = classifier.classify(title, description)
+        
+        assert entities.locations == ["Main Office", "4", "Warehouse"]
+    
+    def test_entities_deduplicated_in_order(self, classifier):
+        """Test that repeated entities are kept once, in order of appearance."""
+        title = "Call with Sarah on 12/31/2024"
+        description = "Confirm with Mike, then with Sarah again by Friday or 1-15-2025"
+        
+        _, _, entities, _ = classifier.classify(title, description)
+        
+        assert entities.people == ["Sarah", "Mike", "Friday"]
+        assert entities.dates == ["12/31/2024", "Friday", "1-15-2025"]
+    
+    def test_overlapping_dates_are_all_found(self, classifier):
+        """Test that a month date does not hide a numeric date it overlaps."""
+        assert classifier._extract_dates("Due Jan 12/31/2024 at noon") == ["Jan 12", "12/31/2024"]
+        assert classifier._extract_dates("on 1/2/33-4-55") == ["1/2/33", "33-4-55"]
+    
+    def test_locations_do_not_overlap_themselves(self, classifier):
+        """Test that a room match does not start again inside itself."""
+        assert classifier._extract_locations("Building Building Dec") == ["Building"]
+        assert classifier._extract_locations("Room Office 5") == ["Office"]
+    
     def test_entity_extraction_empty_case(self, classifier):
         """Test entity extraction with minimal text."""
         title = "Task"
@@ -197,3 +237,201 @@ class TestSuggestedActions:
         assert len(actions) > 0
         assert any("diagnose" in action.lower() or "technician" in action.lower() 
                   for action in actions)
+
+
+class TestKeywordMatching:
+    """Test the single-pass keyword matcher."""
+    
+    def test_keywords_match_at_word_start(self, classifier):
+        """Test that keywords inside other words are ignored."""
+        title = "Let me know"
+        description = "Snow removal for the parking lot"
+        
+        _, priority, _, _ = classifier.classify(title, description)
+        
+        assert priority == TaskPriority.LOW
+    
+    def test_keyword_stems_match_longer_words(self, classifier):
+        """Test that a keyword still matches words it prefixes."""
+        title = "Debugging session"
+        description = "Installed drivers need checking"
+        
+        category, _, entities, _ = classifier.classify(title, description)
+        
+        assert category == TaskCategory.TECHNICAL
+        assert entities.actions == ["Install", "Check"]
+    
+    def test_actions_in_order_of_appearance(self, classifier):
+        """Test that action verbs are reported once, in text order."""
+        title = "Review and send"
+        description = "Send the report, then review again and notify the team"
+        
+        _, _, entities, _ = classifier.classify(title, description)
+        
+        assert entities.actions == ["Review", "Send", "Notify"]
+    
+    def test_reload_keywords(self):
+        """Test that edited keyword tables take effect after reloading."""
+        custom = TaskClassifier()
+        custom.CATEGORY_KEYWORDS = {
+            **TaskClassifier.CATEGORY_KEYWORDS,
+            TaskCategory.SAFETY: ["forklift"],
+        }
+        custom.reload_keywords()
+        
+        category, _, _, _ = custom.classify("Forklift training", "New operators")
+        
+        assert category == TaskCategory.SAFETY
+
+
+class TestContentMemo:
+    """Test memoization of the text-dependent classification."""
+    
+    def test_repeat_text_hits_memo(self, classifier):
+        """Test that a repeated title and description is analyzed once."""
+        first = classifier.classify("Fix payment system bug", "Checkout error with John")
+        second = classifier.classify("Fix payment system bug", "Checkout error with John")
+        
+        assert first == second
+        assert first[2] is not second[2]
+        stats = classifier.memo_stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    
+    def test_priority_follows_due_date_on_hit(self, classifier):
+        """Test that priority is recomputed for remembered text."""
+        _, relaxed, _, _ = classifier.classify("Routine check", "Monthly inspection")
+        _, due, _, _ = classifier.classify(
+            "Routine check", "Monthly inspection", datetime.now() + timedelta(hours=2)
+        )
+        
+        assert (relaxed, due) == (TaskPriority.LOW, TaskPriority.HIGH)
+        assert classifier.memo_stats()["hits"] == 1
+    
+    def test_case_is_part_of_the_key(self, classifier):
+        """Test that texts differing only in case are analyzed separately."""
+        _, _, named, _ = classifier.classify("Call", "Meet with Ana")
+        _, _, unnamed, _ = classifier.classify("Call", "Meet with ana")
+        
+        assert (named.people, unnamed.people) == (["Ana"], [])
+    
+    def test_reload_keywords_clears_memo(self, classifier):
+        """Test that remembered analyses are dropped with the old tables."""
+        classifier.classify("Forklift training", "New operators")
+        classifier.CATEGORY_KEYWORDS = {
+            **TaskClassifier.CATEGORY_KEYWORDS,
+            TaskCategory.SAFETY: ["forklift"],
+        }
+        classifier.reload_keywords()
+        
+        category, _, _, _ = classifier.classify("Forklift training", "New operators")
+        
+        assert category == TaskCategory.SAFETY
+        assert classifier.memo_stats()["hits"] == 0
+
+
+class TestKeywordMatcher:
+    """Test the keyword matcher directly."""
+    
+    def test_multiword_keywords_and_tags(self):
+        """Test phrases and keywords registered under several tags."""
+        matcher = KeywordMatcher()
+        matcher.add("this week", "medium")
+        matcher.add("emergency", "safety")
+        matcher.add("emergency", "high")
+        
+        found = matcher.scan("emergency drill this week")
+        
+        assert found == [("emergency", ["safety", "high"]), ("this week", ["medium"])]
+        assert len(matcher) == 2
+
+
+class InlineExecutor:
+    """Executor stand-in running chunks inline and tracking how many are in flight."""
+    
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+    
+    def submit(self, fn, *args):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        future = Future()
+        future.set_result(fn(*args))
+        result = future.result
+        
+        def collect(*a, **kw):
+            self.in_flight -= 1
+            return result(*a, **kw)
+        
+        future.result = collect
+        return future
+
+
+class TestBatchClassification:
+    """Test classify_many."""
+    
+    ITEMS = [
+        ("Schedule urgent meeting", "Arrange a call with John tomorrow", None),
+        ("Process invoice payment", "Pay the bill at Main Office", None),
+        ("Fix critical bug", "System error on 12/31/2024", None),
+        ("Random task", "Some general work", datetime.now() + timedelta(days=3)),
+    ]
+    
+    def test_small_batch_matches_serial(self, classifier):
+        """Test that in-process batches equal one-by-one classification."""
+        expected = [classifier.classify(*item) for item in self.ITEMS]
+        
+        assert list(classifier.classify_many(self.ITEMS)) == expected
+    
+    def test_process_pool_matches_serial(self, classifier):
+        """Test that fanned-out batches keep order and results."""
+        items = self.ITEMS * 25
+        expected = [classifier.classify(*item) for item in items]
+        
+        results = classifier.classify_many(
+            iter(items), max_workers=2, chunk_size=8, parallel_threshold=16
+        )
+        
+        assert list(results) == expected
+    
+    def test_in_flight_chunks_follow_worker_count(self, classifier):
+        """Test that the given worker count sizes the window of chunks in flight."""
+        executor = InlineExecutor()
+        items = self.ITEMS * 25
+        
+        results = list(classifier.classify_many(
+            items, executor=executor, max_workers=3, chunk_size=4, parallel_threshold=16
+        ))
+        
+        assert len(results) == len(items)
+        assert executor.peak == 6
+    
+    def test_pickles_only_the_tables(self, classifier):
+        """Test that workers receive the tables and a memo size, not the matcher."""
+        state = classifier.__getstate__()
+        
+        assert set(state) == {
+            "CATEGORY_KEYWORDS", "PRIORITY_KEYWORDS", "ACTION_VERBS",
+            "SUGGESTED_ACTIONS", "memo_size"
+        }
+        assert pickle.loads(pickle.dumps(classifier)).classify(*self.ITEMS[0]) == \
+            classifier.classify(*self.ITEMS[0])
+    
+    def test_running_pool_sees_edited_tables(self, classifier, monkeypatch):
+        """Test that workers started before a table edit classify with the new tables."""
+        items = [("Feed the zebra", "Routine care", None)] * 20
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            before = list(classifier.classify_many(
+                items, executor=executor, chunk_size=8, parallel_threshold=16
+            ))
+            edited = {**TaskClassifier.CATEGORY_KEYWORDS}
+            edited[TaskCategory.FINANCE] = [*edited[TaskCategory.FINANCE], "zebra"]
+            monkeypatch.setattr(TaskClassifier, "CATEGORY_KEYWORDS", edited)
+            classifier.reload_keywords()
+            
+            after = list(classifier.classify_many(
+                items, executor=executor, chunk_size=8, parallel_threshold=16
+            ))
+        
+        assert {result[0] for result in before} == {TaskCategory.GENERAL}
+        assert {result[0] for result in after} == {TaskCategory.FINANCE}
@@ -0,0 +1,600 @@
+"""
+Unit tests for the database service.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from src.database import DatabaseService
+from src.events import EventFilter
+from src.models import CountMode, CreateTaskRequest, UpdateTaskRequest
+from src.storage import SNAPSHOT_INTERVAL, MemoryStorage, SQLiteStorage, SupabaseStorage, TaskQuery
+from src.summary import SummaryCounters
+
+
+class SlowQuery:
+    """Query builder stand-in whose execute() blocks like a network call."""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    def __getattr__(self, name):
+        # Every builder method (select, eq, order, ...) returns the builder
+        return lambda *args, **kwargs: self
+    
+    def execute(self):
+        time.sleep(self.latency)
+        return SimpleNamespace(data=[], count=0)
+
+
+class CountingStorage(MemoryStorage):
+    """In-memory backend recording the count mode of every listing."""
+    
+    def __init__(self):
+        super().__init__()
+        self.count_modes = []
+    
+    async def select_tasks(self, query):
+        self.count_modes.append(query.count)
+        return await super().select_tasks(query)
+
+
+class CountingReads(MemoryStorage):
+    """In-memory backend counting task and history reads."""
+    
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+    
+    async def get_task(self, task_id):
+        self.reads += 1
+        return await super().get_task(task_id)
+    
+    async def select_history(self, task_id, *args):
+        self.reads += 1
+        return await super().select_history(task_id, *args)
+
+
+class RecordingQuery:
+    """Query builder stand-in recording calls and returning canned rows."""
+    
+    def __init__(self, client, data):
+        self.client = client
+        self.data = data
+    
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.client.calls.append((name, args, kwargs))
+            return self
+        return record
+    
+    def execute(self):
+        self.client.executed += 1
+        return SimpleNamespace(data=self.data, count=None)
+
+
+class RecordingClient:
+    """Supabase client stand-in counting executed requests."""
+    
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+        self.executed = 0
+    
+    def table(self, name: str) -> RecordingQuery:
+        self.calls.append(("table", (name,), {}))
+        return RecordingQuery(self, self.data)
+    
+    def rpc(self, name: str, params: dict) -> RecordingQuery:
+        self.calls.append(("rpc", (name, params), {}))
+        return RecordingQuery(self, self.data)
+
+
+class SlowClient:
+    """Supabase client stand-in with a fixed per-query latency."""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    def table(self, name: str) -> SlowQuery:
+        return SlowQuery(self.latency)
+
+
+class TestNonBlockingQueries:
+    """Test that blocking client calls are offloaded from the event loop."""
+    
+    @pytest.mark.asyncio
+    async def test_queries_run_concurrently(self):
+        """Test that concurrent reads overlap instead of running back to back."""
+        service = DatabaseService(SupabaseStorage(client=SlowClient(0.05), max_workers=8))
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(service.get_task(str(i)) for i in range(8)))
+        elapsed = time.perf_counter() - start
+        service.close()
+        
+        assert results == [None] * 8
+        assert elapsed < 0.05 * 4
+    
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """Test that the loop keeps ticking while a query is in flight."""
+        service = DatabaseService(SupabaseStorage(client=SlowClient(0.1), max_workers=1))
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        ticker_task = asyncio.create_task(ticker())
+        await service.get_tasks()
+        ticker_task.cancel()
+        service.close()
+        
+        assert ticks >= 5
+
+
+class TestCountStrategy:
+    """Test how list totals are computed and cached."""
+    
+    @pytest.mark.asyncio
+    async def test_exact_counts_are_cached_per_filter(self):
+        """Test that repeated pages reuse the exact total of their filters."""
+        storage = CountingStorage()
+        service = DatabaseService(storage)
+        await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        
+        _, first, _ = await service.get_tasks(limit=1)
+        _, second, _ = await service.get_tasks(limit=1, offset=1)
+        
+        assert first == second == 1
+        assert storage.count_modes == ["exact", "none"]
+    
+    @pytest.mark.asyncio
+    async def test_writes_invalidate_cached_counts(self):
+        """Test that a create is reflected in the next exact total."""
+        service = DatabaseService(MemoryStorage())
+        await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        _, before, _ = await service.get_tasks()
+        
+        await service.create_task(CreateTaskRequest(title="Beta", description="Regular task"))
+        _, after, _ = await service.get_tasks()
+        
+        assert (before, after) == (1, 2)
+    
+    @pytest.mark.asyncio
+    async def test_count_none_still_reports_more_pages(self):
+        """Test that skipping the count keeps has-more detection."""
+        service = DatabaseService(MemoryStorage())
+        for title in ("Alpha", "Beta", "Gamma"):
+            await service.create_task(CreateTaskRequest(title=title, description="Regular task"))
+        
+        tasks, total, next_cursor = await service.get_tasks(limit=2, count=CountMode.NONE)
+        
+        assert total is None
+        assert len(tasks) == 2
+        assert next_cursor is not None
+
+
+class TestDueDates:
+    """Test that due dates sent with any UTC offset compare correctly."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("make_storage", [MemoryStorage, lambda: SQLiteStorage(":memory:")])
+    async def test_mixed_offsets_sort_by_instant(self, make_storage):
+        """Test that due dates are stored in UTC, so sorting follows time."""
+        service = DatabaseService(make_storage())
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        due_dates = {
+            "A": (now + timedelta(hours=2)).astimezone(timezone(timedelta(hours=5))),
+            "B": now + timedelta(hours=4),
+            "C": (now - timedelta(hours=1)).astimezone(timezone(timedelta(hours=-8))),
+        }
+        for title, due_date in due_dates.items():
+            await service.create_task(
+                CreateTaskRequest(title=title, description="Regular task", due_date=due_date)
+            )
+        
+        tasks, _, _ = await service.get_tasks(sort_by="due_date", sort_order="asc")
+        
+        assert [task.title for task in tasks] == ["C", "A", "B"]
+        assert all(task.due_date.utcoffset() == timedelta(0) for task in tasks)
+        
+        # Updates are normalized too
+        await service.update_task(tasks[2].id, UpdateTaskRequest(
+            due_date=(now - timedelta(hours=2)).astimezone(timezone(timedelta(hours=9)))
+        ))
+        tasks, _, _ = await service.get_tasks(sort_by="due_date", sort_order="asc")
+        
+        assert [task.title for task in tasks] == ["B", "C", "A"]
+        service.close()
+
+
+class TestTaskCache:
+    """Test the read-through task and history cache."""
+    
+    @pytest.mark.asyncio
+    async def test_repeat_reads_are_served_from_cache(self):
+        """Test that only the first read of a task reaches storage."""
+        storage = CountingReads()
+        service = DatabaseService(storage)
+        task = await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        
+        for _ in range(3):
+            await service.get_task(task.id)
+            await service.get_task_history(task.id)
+        
+        assert storage.reads == 2
+    
+    @pytest.mark.asyncio
+    async def test_update_invalidates_only_that_task(self):
+        """Test that an update drops the cached task and history it touched."""
+        storage = CountingReads()
+        service = DatabaseService(storage)
+        alpha = await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        beta = await service.create_task(CreateTaskRequest(title="Beta", description="Regular task"))
+        for task_id in (alpha.id, beta.id):
+            await service.get_task(task_id)
+            await service.get_task_history(task_id)
+        storage.reads = 0
+        
+        await service.update_task(alpha.id, UpdateTaskRequest(title="Alpha 2"))
+        storage.reads = 0
+        fetched = await service.get_task(alpha.id)
+        history = await service.get_task_history(alpha.id)
+        await service.get_task(beta.id)
+        
+        assert fetched.title == "Alpha 2"
+        assert len(history) == 2
+        assert storage.reads == 2
+    
+    @pytest.mark.asyncio
+    async def test_delete_invalidates(self):
+        """Test that a deleted task is no longer served from the cache."""
+        service = DatabaseService(MemoryStorage())
+        task = await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        await service.get_task(task.id)
+        
+        await service.delete_task(task.id)
+        
+        assert await service.get_task(task.id) is None
+    
+    @pytest.mark.asyncio
+    async def test_hooks_receive_written_ids(self):
+        """Test that invalidation hooks see every write, and failures are contained."""
+        service = DatabaseService(MemoryStorage())
+        seen = []
+        service.add_invalidation_hook(seen.append)
+        service.add_invalidation_hook(lambda ids: 1 / 0)
+        
+        task = await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        await service.update_task(task.id, UpdateTaskRequest(title="Alpha 2"))
+        await service.delete_task(task.id)
+        
+        assert seen == [(task.id,)] * 3
+    
+    @pytest.mark.asyncio
+    async def test_read_racing_a_write_is_not_cached(self):
+        """Test that a read overlapping a write does not cache the old row."""
+        service = DatabaseService(MemoryStorage())
+        task = await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        original_get = service.storage.get_task
+        
+        async def get_then_write(task_id):
+            record = await original_get(task_id)
+            service.storage.get_task = original_get
+            await service.update_task(task_id, UpdateTaskRequest(title="Alpha 2"))
+            return record
+        
+        service.storage.get_task = get_then_write
+        stale = await service.get_task(task.id)
+        
+        assert stale.title == "Alpha"
+        assert (await service.get_task(task.id)).title == "Alpha 2"
+
+
+class TestTaskWithHistory:
+    """Test fetching a task together with its history."""
+    
+    @pytest.mark.asyncio
+    async def test_supabase_embeds_history_in_one_request(self):
+        """Test that Supabase reads task and history with a single query."""
+        row = {"id": "t1", "title": "Alpha", "task_history": [{"id": "h1", "action": "created"}]}
+        client = RecordingClient([row])
+        storage = SupabaseStorage(client=client)
+        
+        task, history = await storage.get_task_with_history("t1", history_limit=5)
+        storage.close()
+        
+        assert client.executed == 1
+        assert ("select", ("*, task_history(*)",), {}) in client.calls
+        assert ("limit", (5,), {"foreign_table": "task_history"}) in client.calls
+        assert task == {"id": "t1", "title": "Alpha"}
+        assert history == [{"id": "h1", "action": "created"}]
+    
+    @pytest.mark.asyncio
+    async def test_supabase_history_seeks_on_changed_at_and_id(self):
+        """Test that embedded history pages break timestamp ties on id."""
+        client = RecordingClient([{"id": "t1", "task_history": []}])
+        storage = SupabaseStorage(client=client)
+        position = ("2030-01-01T00:00:00+00:00", "5d9f7e2a-1c3b-4a6d-8e0f-2b4c6d8e0a1c")
+        
+        await storage.get_task_with_history("t1", history_limit=5, history_before=position)
+        storage.close()
+        
+        assert ("order", ("id",), {"desc": True, "foreign_table": "task_history"}) in client.calls
+        assert ("lte", ("task_history.changed_at", position[0]), {}) in client.calls
+        assert (
+            "or_",
+            (f'changed_at.lt."{position[0]}",id.lt."{position[1]}"',),
+            {"reference_table": "task_history"}
+        ) in client.calls
+    
+    @pytest.mark.asyncio
+    async def test_supabase_seek_quotes_cursor_id(self):
+        """Test that the keyset id is quoted inside PostgREST logical filters."""
+        client = RecordingClient([])
+        storage = SupabaseStorage(client=client)
+        last_id = "5d9f7e2a-1c3b-4a6d-8e0f-2b4c6d8e0a1c"
+        
+        for sort_order in ("asc", "desc"):
+            await storage.select_tasks(TaskQuery(
+                sort_by="due_date", sort_order=sort_order, after=("2030-01-01", last_id)
+            ))
+        storage.close()
+        
+        filters = [args[0] for name, args, _ in client.calls if name == "or_"]
+        assert len(filters) == 2
+        assert all(f'id.gt."{last_id}"' in f or f'id.lt."{last_id}"' in f for f in filters)
+    
+    @pytest.mark.asyncio
+    async def test_history_pages_served_from_cache(self):
+        """Test that pages of a cached history need no storage reads."""
+        storage = CountingReads()
+        service = DatabaseService(storage)
+        task = await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        for title in ("Beta", "Gamma"):
+            await service.update_task(task.id, UpdateTaskRequest(title=title))
+        await service.get_task_with_history(task.id)
+        storage.reads = 0
+        
+        _, first = await service.get_task_with_history(task.id, history_limit=2)
+        _, rest = await service.get_task_with_history(
+            task.id, history_cursor=service.history_cursor(first[-1])
+        )
+        
+        assert storage.reads == 0
+        assert [entry.action for entry in first + rest] == ["updated", "updated", "created"]
+        assert len({entry.id for entry in first + rest}) == 3
+
+
+class TestDeltaHistory:
+    """Test that delta-encoded history reads back as full rows."""
+    
+    @pytest.mark.asyncio
+    async def test_history_pages_show_full_rows(self):
+        """Test that a page of deltas is expanded from an older snapshot."""
+        storage = MemoryStorage()
+        service = DatabaseService(storage)
+        task = await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        for i in range(SNAPSHOT_INTERVAL + 8):
+            await service.update_task(task.id, UpdateTaskRequest(title=f"Alpha {i}"))
+        service.task_cache.clear()
+        
+        page = await service.get_task_history(task.id, limit=5)
+        stored = await storage.select_history(task.id, limit=5)
+        
+        assert len(page) == 5
+        assert not any(row["is_snapshot"] for row in stored)
+        for entry in page:
+            assert entry.new_value["description"] == "Regular task"
+            assert entry.old_value["description"] == "Regular task"
+        assert page[0].new_value["title"] == f"Alpha {SNAPSHOT_INTERVAL + 7}"
+        assert page[0].old_value["title"] == f"Alpha {SNAPSHOT_INTERVAL + 6}"
+    
+    @pytest.mark.asyncio
+    async def test_bulk_updates_store_deltas(self):
+        """Test that batched updates log the changed fields only."""
+        storage = MemoryStorage()
+        service = DatabaseService(storage)
+        task = await service.create_task(CreateTaskRequest(title="Alpha", description="Regular task"))
+        await service.update_task(task.id, UpdateTaskRequest(title="Beta"))
+        
+        await service.update_tasks([(task.id, UpdateTaskRequest(status="completed"))])
+        
+        stored = await storage.select_history(task.id, limit=1)
+        assert stored[0]["old_value"].keys() == {"status", "updated_at"}
+        history = await service.get_task_history(task.id)
+        assert history[0].action.value == "completed"
+        assert history[0].new_value["title"] == "Beta"
+
+
+class TestBulkUpdates:
+    """Test set-based updates of many tasks."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("make_storage", [MemoryStorage, lambda: SQLiteStorage(":memory:")])
+    async def test_writes_only_changed_columns(self, make_storage):
+        """Test that other writers' edits are kept and deleted rows stay deleted."""
+        storage = make_storage()
+        service = DatabaseService(storage)
+        edited, deleted, other = [
+            await service.create_task(CreateTaskRequest(title=title, description="Regular task"))
+            for title in ("Alpha", "Beta", "Gamma")
+        ]
+        await storage.update_task(edited.id, {"title": "Alpha 2"})
+        await storage.delete_task(deleted.id)
+        
+        updated = await service.update_tasks([
+            (edited.id, UpdateTaskRequest(priority="high")),
+            (deleted.id, UpdateTaskRequest(status="completed")),
+            (other.id, UpdateTaskRequest(status="completed")),
+        ])
+        
+        assert set(updated) == {edited.id, other.id}
+        assert await storage.get_task(deleted.id) is None
+        row = await storage.get_task(edited.id)
+        assert (row["title"], row["priority"]) == ("Alpha 2", "high")
+        assert (await storage.get_task(other.id))["status"] == "completed"
+        history = await service.get_task_history(other.id)
+        assert [entry.action.value for entry in history] == ["completed", "created"]
+    
+    @pytest.mark.asyncio
+    async def test_history_failure_rolls_back_the_updates(self):
+        """Test that the rows and their history are written all or nothing."""
+        storage = SQLiteStorage(":memory:")
+        service = DatabaseService(storage)
+        first, second = [
+            await service.create_task(CreateTaskRequest(title=title, description="Regular task"))
+            for title in ("Alpha", "Beta")
+        ]
+        
+        def fail(history):
+            raise sqlite3.OperationalError("disk I/O error")
+        
+        storage._append_history = fail
+        with pytest.raises(sqlite3.OperationalError):
+            await service.update_tasks([
+                (first.id, UpdateTaskRequest(priority="high")),
+                (second.id, UpdateTaskRequest(status="completed")),
+            ])
+        
+        rows = {row["id"]: row for row in await storage.get_tasks_by_ids([first.id, second.id])}
+        assert (rows[first.id]["priority"], rows[second.id]["status"]) == (
+            first.priority.value, "pending"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_supabase_writes_in_one_call(self):
+        """Test that Supabase sends every task's changes in one RPC."""
+        client = RecordingClient([])
+        storage = SupabaseStorage(client=client)
+        
+        await storage.update_tasks_logged({"a": {"priority": "high"}, "b": {"status": "completed"}}, "api")
+        storage.close()
+        
+        assert client.calls == [("rpc", ("bulk_update_with_history", {
+            "p_changes": [
+                {"id": "a", "changes": {"priority": "high"}},
+                {"id": "b", "changes": {"status": "completed"}}
+            ],
+            "p_changed_by": "api"
+        }), {})]
+        assert client.executed == 1
+
+
+class SummaryStorage(MemoryStorage):
+    """In-memory backend recording whether each summary counted facets."""
+    
+    def __init__(self):
+        super().__init__()
+        self.summaries = []
+    
+    async def summarize_tasks(self, now, due_soon_until, facets=True):
+        self.summaries.append(facets)
+        return await super().summarize_tasks(now, due_soon_until, facets)
+
+
+class TestSummary:
+    """Test dashboard counts and the incremental counters."""
+    
+    @pytest.mark.asyncio
+    async def test_summary_is_cached_until_a_write(self):
+        """Test that repeat summaries are served from the count cache."""
+        storage = SummaryStorage()
+        service = DatabaseService(storage)
+        await service.create_task(CreateTaskRequest(title="Pay invoice", description="Supplier"))
+        
+        first = await service.get_summary()
+        second = await service.get_summary()
+        await service.create_task(CreateTaskRequest(title="Fix bug", description="Server error"))
+        third = await service.get_summary()
+        
+        assert storage.summaries == [True, True]
+        assert first == second
+        assert (first.total, third.total) == (1, 2)
+        assert third.by_category["technical"] == 1
+        assert third.by_status == {"pending": 2, "in_progress": 0, "completed": 0}
+    
+    @pytest.mark.asyncio
+    async def test_counters_follow_every_write_path(self):
+        """Test that facets come from the counters once they are loaded."""
+        storage = SummaryStorage()
+        service = DatabaseService(storage)
+        service.summary_counters = SummaryCounters(ttl=60)
+        task = await service.create_task(CreateTaskRequest(title="Pay invoice", description="Supplier"))
+        await service.get_summary()
+        
+        others = await service.create_tasks([
+            CreateTaskRequest(title="Fix bug", description="Server error"),
+            CreateTaskRequest(title="Call Ana", description="Follow up"),
+        ])
+        await service.update_task(task.id, UpdateTaskRequest(status="completed"))
+        await service.update_tasks([(others[0].id, UpdateTaskRequest(priority="high"))])
+        await service.delete_task(others[1].id)
+        summary = await service.get_summary()
+        
+        assert storage.summaries == [True, False]
+        service.count_cache.clear()
+        service.summary_counters = None
+        assert summary == await service.get_summary()
+        assert summary.by_status == {"pending": 1, "in_progress": 0, "completed": 1}
+        assert summary.by_priority["high"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_stale_counters_are_reloaded(self):
+        """Test that counters older than their ttl are read again."""
+        clock = SimpleNamespace(now=0.0)
+        storage = SummaryStorage()
+        service = DatabaseService(storage)
+        service.summary_counters = SummaryCounters(ttl=60, clock=lambda: clock.now)
+        
+        await service.get_summary()
+        await service.get_summary()
+        clock.now = 61.0
+        await service.get_summary()
+        
+        assert storage.summaries == [True, False, True]
+
+
+class TestChangeFeed:
+    """Test that writes publish task change events."""
+    
+    @pytest.mark.asyncio
+    async def test_every_write_path_publishes(self):
+        """Test creates, updates and deletes, filtered by status."""
+        service = DatabaseService(MemoryStorage())
+        subscription = service.events.subscribe(EventFilter(status="pending"))
+        
+        task = await service.create_task(CreateTaskRequest(title="Pay invoice", description="Supplier"))
+        others = await service.create_tasks([
+            CreateTaskRequest(title="Fix bug", description="Server error"),
+            CreateTaskRequest(title="Call Ana", description="Follow up"),
+        ])
+        await service.update_tasks([(others[0].id, UpdateTaskRequest(priority="high"))])
+        await service.update_task(task.id, UpdateTaskRequest(status="completed"))
+        # No longer pending before or after, so not delivered
+        await service.update_task(task.id, UpdateTaskRequest(title="Pay invoice now"))
+        await service.delete_task(others[1].id)
+        
+        events = []
+        while not subscription._queue.empty():
+            frame = await subscription.get()
+            events.append(json.loads(frame.split("data: ", 1)[1]))
+        
+        assert [(event["type"], event["task_id"]) for event in events] == [
+            ("created", task.id),
+            ("created", others[0].id),
+            ("created", others[1].id),
+            ("updated", others[0].id),
+            ("updated", task.id),
+            ("deleted", others[1].id),
+        ]
+        assert events[3]["task"]["priority"] == "high"
+        assert events[4]["task"]["status"] == "completed"
+        assert events[5]["task"] is None
@@ -0,0 +1,137 @@
+"""
+Unit tests for deferred entity extraction.
+"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.database import DatabaseService
+from src.enrichment import EnrichmentQueue
+from src.events import EventFilter
+from src.models import (
+    CreateTaskRequest, EnrichmentStatus, ExtractedEntities, TaskStatus, UpdateTaskRequest
+)
+from src.storage import MemoryStorage, SQLiteStorage
+
+
+REQUEST = CreateTaskRequest(
+    title="Schedule urgent meeting",
+    description="Arrange a call with John at Main Office"
+)
+
+
+def deferred_service(workers: int = 2, maxsize: int = 100) -> DatabaseService:
+    service = DatabaseService(MemoryStorage())
+    service.enrichment = EnrichmentQueue(service._write_enrichment, workers=workers, maxsize=maxsize)
+    return service
+
+
+class TestDeferredCreate:
+    """Test creating tasks with deferred enrichment."""
+    
+    @pytest.mark.asyncio
+    async def test_entities_are_patched_in_later(self):
+        """Test that a task is returned pending and enriched by the workers."""
+        service = deferred_service()
+        service.enrichment.start()
+        feed = service.events.subscribe()
+        
+        task = await service.create_task(REQUEST)
+        
+        assert task.enrichment_status == EnrichmentStatus.PENDING
+        assert task.extracted_entities == ExtractedEntities()
+        assert (task.category.value, task.priority.value) == ("scheduling", "high")
+        assert task.suggested_actions[0] == "Block calendar time"
+        # Cached in the pending state, which the patch must replace
+        assert (await service.get_task(task.id)).enrichment_status == EnrichmentStatus.PENDING
+        
+        await service.enrichment.stop()
+        enriched = await service.get_task(task.id)
+        
+        assert enriched.enrichment_status == EnrichmentStatus.COMPLETE
+        assert enriched.extracted_entities.people == ["John"]
+        assert enriched.extracted_entities.locations == ["Main Office"]
+        assert (enriched.category, enriched.priority) == (task.category, task.priority)
+        events = [await feed.get() for _ in range(2)]
+        assert "event: created" in events[0] and "event: updated" in events[1]
+        stats = service.enrichment.stats()
+        assert (stats["submitted"], stats["completed"], stats["depth"]) == (1, 1, 0)
+    
+    @pytest.mark.asyncio
+    async def test_classifies_inline_when_not_accepting(self):
+        """Test the fallback when the workers are stopped."""
+        service = deferred_service()
+        
+        task = await service.create_task(REQUEST)
+        
+        assert task.enrichment_status == EnrichmentStatus.COMPLETE
+        assert task.extracted_entities.people == ["John"]
+        assert service.enrichment.stats()["rejected"] == 1
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("make_storage", [MemoryStorage, lambda: SQLiteStorage(":memory:")])
+    async def test_history_keeps_enrichment_after_updates(self, make_storage):
+        """Test that entries after the enrichment rebuild to the enriched row."""
+        service = DatabaseService(make_storage())
+        service.enrichment = EnrichmentQueue(service._write_enrichment, workers=1, maxsize=10)
+        service.enrichment.start()
+        task = await service.create_task(REQUEST)
+        await service.enrichment.stop()
+        
+        await service.update_task(task.id, UpdateTaskRequest(status=TaskStatus.IN_PROGRESS))
+        history = await service.get_task_history(task.id)
+        
+        assert [entry.action.value for entry in history] == ["status_changed", "updated", "created"]
+        assert history[1].changed_by == "enrichment"
+        assert history[1].old_value["enrichment_status"] == "pending"
+        latest = history[0].new_value
+        assert (latest["status"], latest["enrichment_status"]) == ("in_progress", "complete")
+        assert latest["extracted_entities"]["people"] == ["John"]
+    
+    @pytest.mark.asyncio
+    async def test_deleted_task_is_skipped(self):
+        """Test that enriching a task deleted meanwhile is not an error."""
+        service = deferred_service()
+        service.enrichment.start()
+        
+        task = await service.create_task(REQUEST)
+        await service.delete_task(task.id)
+        await service.enrichment.stop()
+        
+        assert await service.get_task(task.id) is None
+        assert service.enrichment.stats()["failed"] == 0
+
+
+class TestEnrichmentQueue:
+    """Test the queue's backpressure and metrics."""
+    
+    @pytest.mark.asyncio
+    async def test_depth_lag_and_overflow(self):
+        """Test that a full queue refuses work and lag tracks the oldest job."""
+        clock = SimpleNamespace(now=0.0)
+        release = asyncio.Event()
+        written = []
+        
+        async def write(task_id, entities):
+            await release.wait()
+            written.append(task_id)
+        
+        queue = EnrichmentQueue(write, workers=1, maxsize=2, clock=lambda: clock.now)
+        queue.start()
+        for task_id in ("a", "b", "c"):
+            assert queue.submit(task_id, "Fix bug", "Server error")
+            clock.now += 1.0
+            # Lets the worker take "a"; "b" and "c" then fill the queue
+            await asyncio.sleep(0.05)
+        
+        assert not queue.submit("d", "Fix bug", "Server error")
+        assert not queue.admit()
+        stats = queue.stats()
+        assert (stats["depth"], stats["rejected"]) == (2, 2)
+        assert stats["lag_seconds"] == 2.0
+        
+        release.set()
+        await queue.stop()
+        
+        assert written == ["a", "b", "c"]
+        assert queue.stats()["avg_lag_seconds"] == 2.0
+        assert not queue.running
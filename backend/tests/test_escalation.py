@@ -0,0 +1,204 @@
+"""
+Unit tests for due-date priority escalation.
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from src.database import DatabaseService
+from src.escalation import PriorityEscalator
+from src.models import CreateTaskRequest, TaskPriority, TaskStatus, UpdateTaskRequest
+from src.storage import MemoryStorage
+
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class Clock:
+    """Settable time source."""
+    
+    def __init__(self, now: datetime = NOW):
+        self.now = now
+    
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def escalating_service(clock: Clock) -> DatabaseService:
+    service = DatabaseService(MemoryStorage())
+    service.escalator = PriorityEscalator(service, refresh=3600, clock=clock)
+    return service
+
+
+def request(title: str, due_in: timedelta) -> CreateTaskRequest:
+    return CreateTaskRequest(title=title, description="No details", due_date=NOW + due_in)
+
+
+def plain_task(title: str, due_in: timedelta, **overrides) -> dict:
+    record = {
+        "title": title,
+        "description": "",
+        "category": "general",
+        "priority": "low",
+        "status": "pending",
+        "due_date": (NOW + due_in).isoformat(),
+        "extracted_entities": {"dates": [], "people": [], "locations": [], "actions": []},
+        "suggested_actions": [],
+    }
+    record.update(overrides)
+    return record
+
+
+class TestThresholds:
+    """Test escalating when due-date thresholds are crossed."""
+    
+    @pytest.mark.asyncio
+    async def test_escalates_as_due_date_approaches(self):
+        """Test that a low task turns medium 7 days out and high 1 day out."""
+        clock = Clock()
+        service = escalating_service(clock)
+        await service.escalator.refresh()
+        task = await service.create_task(
+            request("Renew passport", timedelta(days=10))
+        )
+        assert task.priority == TaskPriority.LOW
+        
+        assert await service.escalator.escalate_due() == 0
+        # The refresh before the first threshold schedules the task
+        clock.now = NOW + timedelta(days=3) - timedelta(minutes=30)
+        assert await service.escalator.refresh() == 1
+        assert await service.escalator.escalate_due() == 0
+        
+        clock.now = NOW + timedelta(days=3, seconds=1)
+        assert await service.escalator.escalate_due() == 1
+        assert (await service.get_task(task.id)).priority == TaskPriority.MEDIUM
+        
+        clock.now = NOW + timedelta(days=9, seconds=1)
+        assert await service.escalator.escalate_due() == 1
+        history = await service.get_task_history(task.id)
+        assert (await service.get_task(task.id)).priority == TaskPriority.HIGH
+        assert [entry.changed_by for entry in history[:2]] == ["escalator", "escalator"]
+        assert (history[0].old_value["priority"], history[0].new_value["priority"]) == ("medium", "high")
+    
+    @pytest.mark.asyncio
+    async def test_first_refresh_catches_up(self):
+        """Test that thresholds crossed while nothing ran are applied at start."""
+        clock = Clock()
+        service = escalating_service(clock)
+        rows = await service.storage.insert_tasks([
+            plain_task("Overdue", timedelta(days=-30)),
+            plain_task("Due this week", timedelta(days=5)),
+            plain_task("Done", timedelta(days=-30), status="completed"),
+            plain_task("Far off", timedelta(days=60)),
+        ])
+        
+        assert await service.escalator.refresh() == 2
+        assert await service.escalator.escalate_due() == 2
+        
+        priorities = {
+            row["title"]: row["priority"]
+            for row in await service.storage.get_tasks_by_ids([row["id"] for row in rows])
+        }
+        assert priorities == {
+            "Overdue": "high", "Due this week": "medium", "Done": "low", "Far off": "low"
+        }
+        # One identical-change write per target priority
+        assert service.escalator.batches == 2
+    
+    @pytest.mark.asyncio
+    async def test_writes_are_scheduled_without_refresh(self):
+        """Test that created tasks and moved due dates are tracked by the write paths."""
+        clock = Clock()
+        service = escalating_service(clock)
+        await service.escalator.refresh()
+        soon = await service.create_task(
+            request("Book venue", timedelta(days=2))
+        )
+        moved = await service.create_task(
+            request("Water plants", timedelta(days=30))
+        )
+        assert (soon.priority, moved.priority) == (TaskPriority.MEDIUM, TaskPriority.LOW)
+        
+        # Moving a due date past a threshold crosses it
+        await service.update_task(moved.id, UpdateTaskRequest(due_date=NOW + timedelta(hours=12)))
+        assert await service.escalator.escalate_due() == 1
+        assert (await service.get_task(moved.id)).priority == TaskPriority.HIGH
+        
+        clock.now = NOW + timedelta(days=1, seconds=1)
+        assert await service.escalator.escalate_due() == 1
+        assert (await service.get_task(soon.id)).priority == TaskPriority.HIGH
+    
+    @pytest.mark.asyncio
+    async def test_never_lowers_or_overrides(self):
+        """Test that high, completed and hand-lowered tasks are left alone."""
+        clock = Clock()
+        service = escalating_service(clock)
+        await service.escalator.refresh()
+        urgent = await service.create_task(
+            request("Urgent fix", timedelta(days=5))
+        )
+        done = await service.create_task(
+            request("File report", timedelta(days=5))
+        )
+        lowered = await service.create_task(
+            request("Sort mail", timedelta(days=5))
+        )
+        await service.update_task(done.id, UpdateTaskRequest(status=TaskStatus.COMPLETED))
+        await service.update_task(lowered.id, UpdateTaskRequest(priority=TaskPriority.LOW))
+        
+        # Past the 7-day threshold but not the 1-day one
+        clock.now = NOW + timedelta(days=2)
+        await service.escalator.escalate_due()
+        await service.escalator.refresh()
+        await service.escalator.escalate_due()
+        
+        assert (await service.get_task(urgent.id)).priority == TaskPriority.HIGH
+        assert (await service.get_task(done.id)).priority == TaskPriority.MEDIUM
+        assert (await service.get_task(lowered.id)).priority == TaskPriority.LOW
+        
+        clock.now = NOW + timedelta(days=4, seconds=1)
+        assert await service.escalator.escalate_due() == 1
+        assert (await service.get_task(lowered.id)).priority == TaskPriority.HIGH
+        assert (await service.get_task(done.id)).priority == TaskPriority.MEDIUM
+    
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried(self):
+        """Test that crossed thresholds stay scheduled when the write fails."""
+        clock = Clock()
+        service = escalating_service(clock)
+        row = await service.storage.insert_task(plain_task("Overdue", timedelta(days=-1)))
+        await service.escalator.refresh()
+        
+        async def failing(*args, **kwargs):
+            raise RuntimeError("storage down")
+        
+        write = service.apply_changes
+        service.apply_changes = failing
+        with pytest.raises(RuntimeError):
+            await service.escalator.escalate_due()
+        service.apply_changes = write
+        
+        assert await service.escalator.escalate_due() == 1
+        assert (await service.storage.get_task(row["id"]))["priority"] == "high"
+
+
+class TestScheduler:
+    """Test the background loop."""
+    
+    @pytest.mark.asyncio
+    async def test_loop_seeds_and_escalates(self):
+        """Test that a started escalator catches up and stops cleanly."""
+        service = DatabaseService(MemoryStorage())
+        service.escalator = PriorityEscalator(service)
+        row = await service.storage.insert_task(plain_task("Overdue", timedelta(days=-1)))
+        feed = service.events.subscribe()
+        
+        service.escalator.start()
+        await asyncio.sleep(0.05)
+        await service.escalator.stop()
+        
+        assert (await service.storage.get_task(row["id"]))["priority"] == "high"
+        assert "event: updated" in await feed.get()
+        stats = service.escalator.stats()
+        assert not stats["running"]
+        assert (stats["escalated"], stats["batches"]) == (1, 1)
+        assert stats["horizon"] is not None
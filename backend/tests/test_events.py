@@ -0,0 +1,94 @@
+"""
+Unit tests for the task change feed.
+"""
+import asyncio
+import json
+import pytest
+from src.events import HEARTBEAT_FRAME, RESYNC_FRAME, EventBus, EventFilter, stream_frames
+
+
+def row(task_id: str, status: str = "pending", category: str = "general", assigned_to=None) -> dict:
+    return {"id": task_id, "status": status, "category": category, "assigned_to": assigned_to}
+
+
+def parse(frame: str) -> tuple:
+    """(event name, data) of an SSE frame."""
+    fields = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+
+class TestEventBus:
+    """Test fan-out, filtering and backpressure."""
+    
+    @pytest.mark.asyncio
+    async def test_filters_match_before_or_after_the_change(self):
+        """Test that a subscriber sees tasks entering and leaving its filter."""
+        bus = EventBus()
+        pending = bus.subscribe(EventFilter(status="pending"))
+        finance = bus.subscribe(EventFilter(category="finance"))
+        
+        bus.publish(None, row("a"))
+        bus.publish(row("a"), row("a", status="completed"))
+        bus.publish(row("b", status="completed"), None)
+        
+        assert [parse(await pending.get())[0] for _ in range(2)] == ["created", "updated"]
+        assert pending._queue.empty()
+        assert finance._queue.empty()
+        assert bus.stats() == {"subscribers": 2, "published": 3, "resyncs": 0}
+    
+    @pytest.mark.asyncio
+    async def test_event_carries_id_type_and_task_id(self):
+        """Test the frame layout."""
+        bus = EventBus()
+        subscription = bus.subscribe()
+        
+        bus.publish(row("a"), None)
+        frame = await subscription.get()
+        
+        assert frame.startswith("id: 1\n")
+        assert parse(frame) == ("deleted", {"id": 1, "type": "deleted", "task_id": "a", "task": None})
+    
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_is_resynced(self):
+        """Test that a full queue collapses into a resync and the latest event."""
+        bus = EventBus(queue_size=3)
+        slow = bus.subscribe()
+        
+        for i in range(5):
+            bus.publish(None, row(f"t{i}"))
+        frames = [await slow.get() for _ in range(3)]
+        
+        assert frames[0] == RESYNC_FRAME
+        assert [parse(frame)[1]["task_id"] for frame in frames[1:]] == ["t3", "t4"]
+        assert slow.dropped == 3
+        assert bus.stats()["resyncs"] == 1
+    
+    def test_publish_without_subscribers_does_nothing(self):
+        """Test that events are not built when nobody listens."""
+        bus = EventBus()
+        
+        bus.publish(None, row("a"))
+        
+        assert not bus.has_subscribers()
+        assert bus.stats()["published"] == 0
+
+
+class TestStreamFrames:
+    """Test the server-sent event stream body."""
+    
+    @pytest.mark.asyncio
+    async def test_streams_events_and_heartbeats_then_unsubscribes(self):
+        """Test the stream lifecycle."""
+        bus = EventBus()
+        stream = stream_frames(bus, EventFilter(assigned_to="alice"), heartbeat=0.01)
+        
+        assert (await stream.__anext__()).startswith("retry: ")
+        assert bus.has_subscribers()
+        assert await stream.__anext__() == HEARTBEAT_FRAME
+        
+        bus.publish(None, row("a", assigned_to="bob"))
+        bus.publish(None, row("b", assigned_to="alice"))
+        assert parse(await stream.__anext__())[1]["task_id"] == "b"
+        
+        await stream.aclose()
+        assert not bus.has_subscribers()
@@ -0,0 +1,89 @@
+"""
+Unit tests for delta-encoded task history.
+"""
+from src.storage.history import SNAPSHOT_INTERVAL, compact, diff, expand, is_snapshot_seq
+
+
+def states(count: int) -> list:
+    """Successive versions of one task, each changing the title."""
+    return [
+        {"id": "t1", "title": f"Title {i}", "status": "pending", "priority": "low"}
+        for i in range(count)
+    ]
+
+
+def legacy_rows(versions: list) -> list:
+    """History rows, oldest first, as written before delta encoding."""
+    rows = [{"id": "h0", "action": "created", "old_value": None, "new_value": versions[0]}]
+    for i in range(1, len(versions)):
+        rows.append({
+            "id": f"h{i}",
+            "action": "updated",
+            "old_value": versions[i - 1],
+            "new_value": versions[i],
+        })
+    return rows
+
+
+class TestDiff:
+    """Test field-level diffs."""
+    
+    def test_only_changed_fields(self):
+        """Test that unchanged fields are left out."""
+        old = {"title": "A", "status": "pending", "priority": "low"}
+        new = {"title": "A", "status": "completed", "priority": "low"}
+        
+        assert diff(old, new) == ({"status": "pending"}, {"status": "completed"})
+    
+    def test_added_fields(self):
+        """Test that fields missing from the old row count as changed."""
+        assert diff({}, {"title": "A"}) == ({"title": None}, {"title": "A"})
+
+
+class TestExpand:
+    """Test rebuilding full views from deltas."""
+    
+    def test_round_trip_through_compaction(self):
+        """Test that compacted rows expand back to the full rows."""
+        rows = legacy_rows(states(SNAPSHOT_INTERVAL + 5))
+        
+        compacted = compact(rows)
+        expanded = expand(list(reversed(compacted)))
+        
+        for original, row in zip(reversed(rows), expanded):
+            assert row["old_value"] == original["old_value"]
+            assert row["new_value"] == original["new_value"]
+    
+    def test_legacy_rows_read_as_snapshots(self):
+        """Test that rows without is_snapshot are returned whole."""
+        rows = legacy_rows(states(3))
+        
+        expanded = expand(list(reversed(rows)))
+        
+        assert [row["new_value"] for row in expanded] == [row["new_value"] for row in reversed(rows)]
+    
+    def test_deltas_older_than_every_snapshot_stay_as_stored(self):
+        """Test a page that does not reach back to a snapshot."""
+        rows = [{"id": "h1", "is_snapshot": False, "old_value": {"title": "A"}, "new_value": {"title": "B"}}]
+        
+        assert expand(rows) == rows
+
+
+class TestCompact:
+    """Test delta-encoding legacy rows."""
+    
+    def test_snapshot_cadence(self):
+        """Test that the first row and every SNAPSHOT_INTERVAL-th row are snapshots."""
+        compacted = compact(legacy_rows(states(2 * SNAPSHOT_INTERVAL + 1)))
+        
+        assert [row["seq"] for row in compacted] == list(range(1, 2 * SNAPSHOT_INTERVAL + 2))
+        assert [row["seq"] for row in compacted if row["is_snapshot"]] == [1, 17, 33]
+        assert all(is_snapshot_seq(row["seq"]) == row["is_snapshot"] for row in compacted)
+    
+    def test_deltas_hold_changed_fields_only(self):
+        """Test the stored size of non-snapshot rows."""
+        compacted = compact(legacy_rows(states(3)))
+        
+        assert compacted[1]["old_value"] == {"title": "Title 0"}
+        assert compacted[1]["new_value"] == {"title": "Title 1"}
+        assert compacted[0]["new_value"]["status"] == "pending"
@@ -0,0 +1,121 @@
+"""
+Unit tests for the streaming task importer.
+"""
+import io
+import json
+import pytest
+from src.database import DatabaseService
+from src.checkpoint import Checkpoint
+from src.importer import ImportProgress, import_rows, read_rows
+from src.models import ExportFormat
+from src.storage import MemoryStorage
+
+
+class RecordingService(DatabaseService):
+    """Database service that records the size of every create batch."""
+    
+    def __init__(self):
+        super().__init__(MemoryStorage())
+        self.batches = []
+    
+    async def create_tasks(self, tasks_data, changed_by="system"):
+        self.batches.append(len(tasks_data))
+        return await super().create_tasks(tasks_data, changed_by)
+
+
+def ndjson(*records) -> io.StringIO:
+    return io.StringIO("".join(
+        (record if isinstance(record, str) else json.dumps(record)) + "\n" for record in records
+    ))
+
+
+class TestReadRows:
+    """Test parsing of import files."""
+    
+    def test_csv_rows_are_numbered_from_one(self):
+        """Test that CSV rows are read with the header as keys."""
+        lines = io.StringIO("title,description,assigned_to\nPay rent,Monthly rent,\n")
+        
+        assert list(read_rows(lines, ExportFormat.CSV)) == [
+            (1, {"title": "Pay rent", "description": "Monthly rent", "assigned_to": ""})
+        ]
+    
+    def test_bad_ndjson_lines_become_errors(self):
+        """Test that unparseable lines are reported instead of raising."""
+        lines = ndjson({"title": "A"}, "", "{not json", "[1, 2]")
+        
+        rows = list(read_rows(lines, ExportFormat.NDJSON))
+        
+        assert rows[0] == (1, {"title": "A"})
+        assert rows[1][0] == 2 and rows[1][1].startswith("Invalid JSON")
+        assert rows[2] == (3, "Expected a JSON object")
+
+
+class TestImportRows:
+    """Test batching, error reporting and resuming."""
+    
+    @pytest.mark.asyncio
+    async def test_imports_in_batches_and_reports_bad_rows(self):
+        """Test that valid rows are written in batches and bad ones skipped."""
+        service = RecordingService()
+        lines = ndjson(
+            *({"title": f"Task {i}", "description": "Imported task"} for i in range(5)),
+            {"title": "No description"},
+            {"title": "Dated", "description": "Has a due date", "due_date": "2030-01-01T09:00:00"}
+        )
+        errors, checkpoints = [], []
+        
+        progress = await import_rows(
+            service, read_rows(lines, ExportFormat.NDJSON), batch_size=2,
+            on_batch=lambda p: checkpoints.append(p.rows), on_error=errors.append
+        )
+        
+        assert progress == ImportProgress(rows=7, imported=6, failed=1)
+        assert service.batches == [2, 2, 2]
+        assert checkpoints == [2, 4, 7, 7]
+        assert [(error.row, error.record["title"]) for error in errors] == [(6, "No description")]
+        assert "description" in errors[0].error
+        tasks, total, _ = await service.get_tasks()
+        assert total == 6
+        history = await service.get_task_history(tasks[0].id)
+        assert history[0].changed_by == "importer"
+    
+    @pytest.mark.asyncio
+    async def test_resume_skips_rows_already_imported(self):
+        """Test that resuming continues after the checkpointed row."""
+        service = RecordingService()
+        lines = io.StringIO(
+            "title,description\n" + "".join(f"Task {i},Imported task\n" for i in range(5))
+        )
+        
+        progress = await import_rows(
+            service, read_rows(lines, ExportFormat.CSV),
+            resume=ImportProgress(rows=3, imported=3, failed=0)
+        )
+        
+        assert progress == ImportProgress(rows=5, imported=5, failed=0)
+        tasks, _, _ = await service.get_tasks(sort_order="asc")
+        assert [task.title for task in tasks] == ["Task 3", "Task 4"]
+
+
+class TestCheckpoint:
+    """Test checkpoint persistence."""
+    
+    def test_round_trip(self, tmp_path):
+        """Test that saved totals are loaded back for the same source."""
+        checkpoint = Checkpoint(str(tmp_path / "import.checkpoint"), "/data/tickets.csv", ImportProgress)
+        
+        assert checkpoint.load() == ImportProgress()
+        checkpoint.save(ImportProgress(rows=10, imported=9, failed=1))
+        assert checkpoint.load() == ImportProgress(rows=10, imported=9, failed=1)
+        
+        checkpoint.clear()
+        assert checkpoint.load() == ImportProgress()
+    
+    def test_rejects_checkpoint_of_another_file(self, tmp_path):
+        """Test that a checkpoint is not applied to a different source."""
+        path = str(tmp_path / "import.checkpoint")
+        Checkpoint(path, "/data/a.csv", ImportProgress).save(ImportProgress(rows=10))
+        
+        with pytest.raises(ValueError):
+            Checkpoint(path, "/data/b.csv", ImportProgress).load()
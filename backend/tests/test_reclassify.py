@@ -0,0 +1,88 @@
+"""
+Unit tests for the reclassification job.
+"""
+import pytest
+from src.classifier import TaskClassifier
+from src.database import DatabaseService
+from src.models import CreateTaskRequest, TaskCategory
+from src.reclassify import ReclassifyProgress, reclassify, tables_fingerprint
+from src.storage import MemoryStorage
+
+
+async def stale_service(count: int = 5):
+    """Service whose first two tasks carry an outdated classification."""
+    service = DatabaseService(MemoryStorage())
+    tasks = []
+    for i in range(count):
+        tasks.append(await service.create_task(
+            CreateTaskRequest(title=f"Pay invoice {i}", description="Supplier payment with Ana")
+        ))
+    for task in tasks[:2]:
+        await service.storage.update_task(task.id, {
+            "category": "general",
+            "extracted_entities": {"dates": [], "people": [], "locations": [], "actions": []},
+        })
+    return service, tasks
+
+
+class TestReclassify:
+    """Test batching, writing only changes, dry runs and resuming."""
+    
+    @pytest.mark.asyncio
+    async def test_writes_only_changed_tasks(self):
+        """Test that stale rows are fixed and recorded in their history."""
+        service, tasks = await stale_service()
+        checkpoints = []
+        
+        progress = await reclassify(
+            service, batch_size=2, on_batch=lambda p: checkpoints.append(p.scanned)
+        )
+        
+        assert (progress.scanned, progress.changed) == (5, 2)
+        assert progress.by_column == {"category": 2, "extracted_entities": 2}
+        assert checkpoints == [2, 4, 5]
+        fixed = await service.get_task(tasks[0].id)
+        assert fixed.category == TaskCategory.FINANCE
+        assert fixed.extracted_entities.people == ["Ana"]
+        history = await service.storage.select_history(tasks[0].id)
+        assert history[0]["changed_by"] == "reclassifier"
+        assert history[0]["old_value"]["category"] == "general"
+        assert history[0]["new_value"]["category"] == "finance"
+        assert len(await service.get_task_history(tasks[2].id)) == 1
+    
+    @pytest.mark.asyncio
+    async def test_dry_run_reports_without_writing(self):
+        """Test that a dry run reports the changes and leaves rows alone."""
+        service, tasks = await stale_service()
+        report = []
+        
+        progress = await reclassify(
+            service, dry_run=True, on_change=lambda row, changes: report.append((row["id"], changes))
+        )
+        
+        assert progress.changed == 2
+        assert [task_id for task_id, _ in report] == [tasks[0].id, tasks[1].id]
+        assert report[0][1]["category"] == "finance"
+        assert (await service.get_task(tasks[0].id)).category == TaskCategory.GENERAL
+    
+    @pytest.mark.asyncio
+    async def test_resume_skips_tasks_already_done(self):
+        """Test that a resumed run starts after the checkpointed position."""
+        service, tasks = await stale_service()
+        first = await service.storage.get_task(tasks[1].id)
+        
+        progress = await reclassify(
+            service, resume=ReclassifyProgress(scanned=2, after=[first["created_at"], first["id"]])
+        )
+        
+        assert (progress.scanned, progress.changed) == (5, 0)
+        assert (await service.get_task(tasks[0].id)).category == TaskCategory.GENERAL
+    
+    def test_fingerprint_follows_keyword_tables(self):
+        """Test that editing a keyword table changes the checkpoint source."""
+        custom = TaskClassifier()
+        before = tables_fingerprint(custom)
+        custom.CATEGORY_KEYWORDS = {**TaskClassifier.CATEGORY_KEYWORDS, TaskCategory.SAFETY: ["forklift"]}
+        
+        assert tables_fingerprint(TaskClassifier()) == before
+        assert tables_fingerprint(custom) != before
@@ -0,0 +1,534 @@
+"""
+Contract tests run against every embedded storage backend.
+"""
+import asyncio
+import base64
+import json
+import uuid
+
+import pytest
+from src.storage import (
+    SNAPSHOT_INTERVAL, MemoryStorage, SQLiteStorage, TaskQuery, decode_cursor, encode_cursor,
+    expand_history
+)
+
+
+def make_record(title: str, **overrides) -> dict:
+    record = {
+        "title": title,
+        "description": f"{title} description",
+        "category": "general",
+        "priority": "low",
+        "status": "pending",
+        "assigned_to": None,
+        "due_date": None,
+        "extracted_entities": {"dates": [], "people": [], "locations": [], "actions": []},
+        "suggested_actions": ["Track progress"],
+    }
+    record.update(overrides)
+    return record
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request):
+    """Create each embedded backend in turn."""
+    backend = MemoryStorage() if request.param == "memory" else SQLiteStorage(":memory:")
+    yield backend
+    backend.close()
+
+
+class TestTaskStorage:
+    """Test task CRUD, filtering, sorting and pagination."""
+    
+    @pytest.mark.asyncio
+    async def test_insert_and_get(self, storage):
+        """Test that inserted rows come back with generated fields."""
+        created = await storage.insert_task(make_record("Alpha"))
+        
+        fetched = await storage.get_task(created["id"])
+        
+        assert fetched["title"] == "Alpha"
+        assert fetched["extracted_entities"]["people"] == []
+        assert fetched["enrichment_status"] == "complete"
+        assert fetched["created_at"] and fetched["updated_at"]
+    
+    @pytest.mark.asyncio
+    async def test_filter_sort_and_paginate(self, storage):
+        """Test that filters, sort order and ranges compose."""
+        for i, priority in enumerate(["high", "low", "high", "high"]):
+            await storage.insert_task(make_record(f"Task {i}", priority=priority))
+        
+        page, total = await storage.select_tasks(
+            TaskQuery(priority="high", sort_by="title", sort_order="asc", limit=2, offset=1)
+        )
+        
+        assert total == 3
+        assert [row["title"] for row in page] == ["Task 2", "Task 3"]
+    
+    @pytest.mark.asyncio
+    async def test_search_is_case_insensitive(self, storage):
+        """Test that search matches title or description substrings."""
+        await storage.insert_task(make_record("Fix Payment bug"))
+        await storage.insert_task(make_record("Other", description="payment follow-up"))
+        await storage.insert_task(make_record("Unrelated"))
+        
+        _, total = await storage.select_tasks(TaskQuery(search="PAYMENT"))
+        
+        assert total == 2
+    
+    @pytest.mark.asyncio
+    async def test_nulls_sort_last_ascending(self, storage):
+        """Test that missing due dates sort like PostgreSQL."""
+        await storage.insert_task(make_record("No date"))
+        await storage.insert_task(make_record("Dated", due_date="2030-01-01T00:00:00+00:00"))
+        
+        ascending, _ = await storage.select_tasks(TaskQuery(sort_by="due_date", sort_order="asc"))
+        descending, _ = await storage.select_tasks(TaskQuery(sort_by="due_date", sort_order="desc"))
+        
+        assert ascending[0]["title"] == "Dated"
+        assert descending[0]["title"] == "No date"
+    
+    @pytest.mark.asyncio
+    async def test_update_and_delete(self, storage):
+        """Test that updates apply and deletes report missing rows."""
+        created = await storage.insert_task(make_record("Alpha"))
+        
+        updated = await storage.update_task(created["id"], {"status": "completed"})
+        
+        assert updated["status"] == "completed"
+        assert await storage.update_task("missing", {"status": "completed"}) is None
+        assert await storage.delete_task(created["id"]) is True
+        assert await storage.delete_task(created["id"]) is False
+    
+    @pytest.mark.asyncio
+    async def test_bulk_insert_keeps_order(self, storage):
+        """Test multi-row inserts for tasks and history."""
+        rows = await storage.insert_tasks([make_record(f"Task {i}") for i in range(5)])
+        await storage.insert_history_many([
+            {"task_id": row["id"], "action": "created", "new_value": row} for row in rows
+        ])
+        
+        _, total = await storage.select_tasks(TaskQuery())
+        
+        assert [row["title"] for row in rows] == [f"Task {i}" for i in range(5)]
+        assert total == 5
+        assert len(await storage.select_history(rows[3]["id"])) == 1
+    
+    @pytest.mark.asyncio
+    async def test_set_based_updates(self, storage):
+        """Test fetch by ids and shared updates that never insert."""
+        rows = await storage.insert_tasks([make_record(f"Task {i}") for i in range(3)])
+        ids = [row["id"] for row in rows]
+        
+        fetched = await storage.get_tasks_by_ids([ids[0], "missing", ids[2]])
+        shared = await storage.update_tasks(ids[:2], {"status": "in_progress"})
+        await storage.delete_task(ids[2])
+        gone = await storage.update_tasks([ids[2]], {"title": "Renamed"})
+        
+        assert {row["id"] for row in fetched} == {ids[0], ids[2]}
+        assert {row["status"] for row in shared} == {"in_progress"}
+        assert gone == []
+        assert await storage.get_task(ids[2]) is None
+    
+    @pytest.mark.asyncio
+    async def test_update_logged_writes_history(self, storage):
+        """Test the single-call update with its history row."""
+        created = await storage.insert_task(make_record("Alpha"))
+        
+        result = await storage.update_task_logged(
+            created["id"], {"status": "completed", "title": "Alpha 2"}, "ops"
+        )
+        history = await storage.select_history(created["id"])
+        
+        assert result["task"]["status"] == "completed"
+        assert result["action"] == "completed"
+        assert result["previous"] == {"status": "pending", "title": "Alpha"}
+        assert history[0]["old_value"]["title"] == "Alpha"
+        assert history[0]["changed_by"] == "ops"
+        assert await storage.update_task_logged("missing", {"title": "x"}, "ops") is None
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    async def test_keyset_pages_cover_every_row_once(self, storage, sort_order):
+        """Test cursor paging across ties and null sort values."""
+        due_dates = [None, "2030-01-02T00:00:00+00:00", None, "2030-01-01T00:00:00+00:00",
+                     "2030-01-02T00:00:00+00:00", None, "2030-01-03T00:00:00+00:00"]
+        rows = await storage.insert_tasks([
+            make_record(f"Task {i}", due_date=due) for i, due in enumerate(due_dates)
+        ])
+        expected, _ = await storage.select_tasks(
+            TaskQuery(sort_by="due_date", sort_order=sort_order, limit=100)
+        )
+        
+        seen, after = [], None
+        while True:
+            query = TaskQuery(sort_by="due_date", sort_order=sort_order, limit=2, after=after)
+            page, total = await storage.select_tasks(query)
+            if not page:
+                break
+            seen.extend(row["id"] for row in page)
+            after = decode_cursor(encode_cursor(query, page[-1]), "due_date", sort_order)
+        
+        assert total == len(rows)
+        assert seen == [row["id"] for row in expected]
+    
+    def test_cursor_rejects_other_sort_order(self):
+        """Test that a cursor cannot be replayed against another ordering."""
+        cursor = encode_cursor(TaskQuery(), {"id": str(uuid.uuid4()), "created_at": "2030-01-01"})
+        
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "created_at", "asc")
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor", "created_at", "desc")
+    
+    @pytest.mark.parametrize("payload", [
+        {"s": "created_at", "o": "desc", "v": "2030-01-01", "id": "x),status.eq.completed"},
+        {"s": "created_at", "o": "desc", "v": "2030-01-01", "id": 7},
+        {"s": "created_at", "o": "desc", "v": {"or": "(id.gt.0)"}, "id": str(uuid.uuid4())},
+    ])
+    def test_cursor_rejects_forged_positions(self, payload):
+        """Test that only a UUID id and a scalar sort value are accepted."""
+        raw = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        
+        with pytest.raises(ValueError):
+            decode_cursor(raw, "created_at", "desc")
+    
+    @pytest.mark.asyncio
+    async def test_count_none_skips_total(self, storage):
+        """Test that count mode none returns rows without a total."""
+        await storage.insert_tasks([make_record("Alpha"), make_record("Beta")])
+        
+        page, total = await storage.select_tasks(TaskQuery(limit=1, count="none"))
+        
+        assert total is None
+        assert len(page) == 1
+    
+    def test_rejects_unknown_count_mode(self):
+        """Test that only known count modes are accepted."""
+        with pytest.raises(ValueError):
+            TaskQuery(count="approximate")
+    
+    def test_rejects_unknown_sort_field(self):
+        """Test that arbitrary sort columns are refused."""
+        with pytest.raises(ValueError):
+            TaskQuery(sort_by="title; DROP TABLE tasks")
+
+
+    @pytest.mark.asyncio
+    async def test_sqlite_adds_enrichment_status(self, tmp_path):
+        """Test that opening a database from before deferred enrichment migrates it."""
+        path = str(tmp_path / "tasks.db")
+        storage = SQLiteStorage(path)
+        await storage.insert_task(make_record("Legacy task"))
+        storage._conn.execute("ALTER TABLE tasks DROP COLUMN enrichment_status")
+        storage.close()
+        
+        reopened = SQLiteStorage(path)
+        page, _ = await reopened.select_tasks(TaskQuery())
+        created = await reopened.insert_task(make_record("New task", enrichment_status="pending"))
+        reopened.close()
+        
+        assert page[0]["enrichment_status"] == "complete"
+        assert created["enrichment_status"] == "pending"
+
+
+class TestSummary:
+    """Test the grouped dashboard counts."""
+    
+    NOW = "2030-01-10T00:00:00+00:00"
+    UNTIL = "2030-01-13T00:00:00+00:00"
+    
+    @pytest.mark.asyncio
+    async def test_cells_and_due_counts(self, storage):
+        """Test counts per combination and the overdue/due-soon windows."""
+        await storage.insert_tasks([
+            make_record("Late", due_date="2030-01-05T00:00:00+00:00"),
+            make_record("Late but done", status="completed", due_date="2030-01-05T00:00:00+00:00"),
+            make_record("Soon", category="finance", due_date="2030-01-11T00:00:00+00:00"),
+            make_record("Later", category="finance", due_date="2030-02-01T00:00:00+00:00"),
+            make_record("Undated", priority="high"),
+        ])
+        
+        summary = await storage.summarize_tasks(self.NOW, self.UNTIL)
+        
+        assert (summary["overdue"], summary["due_soon"]) == (1, 1)
+        cells = {
+            (cell["status"], cell["category"], cell["priority"]): cell["count"]
+            for cell in summary["cells"]
+        }
+        assert cells == {
+            ("pending", "general", "low"): 1,
+            ("completed", "general", "low"): 1,
+            ("pending", "finance", "low"): 2,
+            ("pending", "general", "high"): 1,
+        }
+    
+    @pytest.mark.asyncio
+    async def test_due_counts_only(self, storage):
+        """Test that facets can be skipped."""
+        await storage.insert_task(make_record("Late", due_date="2030-01-05T00:00:00+00:00"))
+        
+        summary = await storage.summarize_tasks(self.NOW, self.UNTIL, facets=False)
+        
+        assert summary == {"overdue": 1, "due_soon": 0}
+    
+    @pytest.mark.asyncio
+    async def test_due_range(self, storage):
+        """Test reading the open tasks due in a range, earliest first."""
+        await storage.insert_tasks([
+            make_record("Soon", priority="medium", due_date="2030-01-11T00:00:00+00:00"),
+            make_record("Late", due_date="2030-01-05T00:00:00+00:00"),
+            make_record("Late but done", status="completed", due_date="2030-01-05T00:00:00+00:00"),
+            make_record("Later", due_date="2030-02-01T00:00:00+00:00"),
+            make_record("Undated"),
+        ])
+        
+        everything = await storage.select_due_tasks(self.UNTIL)
+        upcoming = await storage.select_due_tasks(self.UNTIL, due_after=self.NOW)
+        
+        assert [(row["due_date"][:10], row["priority"]) for row in everything] == [
+            ("2030-01-05", "low"), ("2030-01-11", "medium")
+        ]
+        assert set(upcoming[0]) == {"id", "due_date", "priority"}
+        assert [row["due_date"][:10] for row in upcoming] == ["2030-01-11"]
+
+
+class TestSearch:
+    """Test indexed search and relevance ranking."""
+    
+    @pytest.mark.asyncio
+    async def test_every_word_must_prefix_match(self, storage):
+        """Test that multi-word searches match word prefixes in any order."""
+        await storage.insert_task(make_record("Fix payments", description="Checkout is broken"))
+        await storage.insert_task(make_record("Fix printer", description="Paper jam"))
+        
+        page, total = await storage.select_tasks(TaskQuery(search="broke pay"))
+        
+        assert total == 1
+        assert page[0]["title"] == "Fix payments"
+    
+    @pytest.mark.asyncio
+    async def test_substring_fallback(self, storage):
+        """Test that text inside a word still matches."""
+        await storage.insert_task(make_record("Reconfigure firewall"))
+        await storage.insert_task(make_record("Order lunch"))
+        
+        page, _ = await storage.select_tasks(TaskQuery(search="config"))
+        short, _ = await storage.select_tasks(TaskQuery(search="wa"))
+        
+        assert [row["title"] for row in page] == ["Reconfigure firewall"]
+        assert [row["title"] for row in short] == ["Reconfigure firewall"]
+    
+    @pytest.mark.asyncio
+    async def test_relevance_prefers_title_matches(self, storage):
+        """Test that title hits outrank description hits and substring hits."""
+        await storage.insert_task(make_record("Call vendor", description="About the invoice"))
+        await storage.insert_task(make_record("Invoice overdue", description="Pay it"))
+        await storage.insert_task(make_record("Prepare reinvoice", description="Later"))
+        
+        page, _ = await storage.select_tasks(TaskQuery(search="invoice", sort_by="relevance"))
+        
+        assert [row["title"] for row in page] == [
+            "Invoice overdue", "Call vendor", "Prepare reinvoice"
+        ]
+        assert page[0]["relevance"] > page[1]["relevance"] > page[2]["relevance"]
+    
+    @pytest.mark.asyncio
+    async def test_relevance_keyset_pages(self, storage):
+        """Test cursor paging over relevance ties."""
+        await storage.insert_tasks([
+            make_record(f"Report {i}", description="report" if i % 2 else "other")
+            for i in range(5)
+        ])
+        expected, _ = await storage.select_tasks(
+            TaskQuery(search="report", sort_by="relevance", limit=100)
+        )
+        
+        seen, after = [], None
+        while True:
+            query = TaskQuery(search="report", sort_by="relevance", limit=2, after=after)
+            page, _ = await storage.select_tasks(query)
+            if not page:
+                break
+            seen.extend(row["id"] for row in page)
+            after = decode_cursor(encode_cursor(query, page[-1]), "relevance", "desc")
+        
+        assert seen == [row["id"] for row in expected]
+        assert len(seen) == 5
+    
+    @pytest.mark.asyncio
+    async def test_index_follows_writes(self, storage):
+        """Test that updates and deletes are reflected in search."""
+        task = await storage.insert_task(make_record("Draft memo", description="Q3"))
+        other = await storage.insert_task(make_record("Draft letter", description="Q4"))
+        
+        await storage.update_task(task["id"], {"title": "Final memo"})
+        await storage.delete_task(other["id"])
+        
+        drafts, _ = await storage.select_tasks(TaskQuery(search="draft"))
+        finals, _ = await storage.select_tasks(TaskQuery(search="final"))
+        
+        assert drafts == []
+        assert [row["id"] for row in finals] == [task["id"]]
+    
+    def test_relevance_requires_search(self):
+        """Test that relevance order is only available for searches."""
+        with pytest.raises(ValueError):
+            TaskQuery(sort_by="relevance")
+    
+    @pytest.mark.asyncio
+    async def test_sqlite_indexes_existing_rows(self, tmp_path):
+        """Test that opening a database without search tables indexes its rows."""
+        path = str(tmp_path / "tasks.db")
+        storage = SQLiteStorage(path)
+        await storage.insert_task(make_record("Legacy task"))
+        storage._conn.executescript(
+            "DROP TABLE tasks_fts; DROP TABLE tasks_trigram; "
+            "DROP TRIGGER tasks_search_insert; DROP TRIGGER tasks_search_delete; "
+            "DROP TRIGGER tasks_search_update;"
+        )
+        storage.close()
+        
+        reopened = SQLiteStorage(path)
+        page, _ = await reopened.select_tasks(TaskQuery(search="legacy"))
+        reopened.close()
+        
+        assert [row["title"] for row in page] == ["Legacy task"]
+
+
+class TestHistoryStorage:
+    """Test history rows."""
+    
+    @pytest.mark.asyncio
+    async def test_history_newest_first_and_cascades(self, storage):
+        """Test history ordering and removal with the task."""
+        created = await storage.insert_task(make_record("Alpha"))
+        await storage.insert_history({"task_id": created["id"], "action": "created", "new_value": created})
+        await storage.insert_history({"task_id": created["id"], "action": "completed", "changed_by": "ops"})
+        
+        history = await storage.select_history(created["id"])
+        
+        assert [row["action"] for row in history] == ["completed", "created"]
+        assert history[1]["new_value"]["title"] == "Alpha"
+        
+        await storage.delete_task(created["id"])
+        assert await storage.select_history(created["id"]) == []
+    
+    @pytest.mark.asyncio
+    async def test_history_pages(self, storage):
+        """Test history limit and before bounds."""
+        created = await storage.insert_task(make_record("Alpha"))
+        for action in ("created", "updated", "status_changed", "completed"):
+            await storage.insert_history({"task_id": created["id"], "action": action})
+        
+        first = await storage.select_history(created["id"], limit=2)
+        rest = await storage.select_history(
+            created["id"], before=(first[-1]["changed_at"], first[-1]["id"])
+        )
+        
+        assert [row["action"] for row in first] == ["completed", "status_changed"]
+        assert [row["action"] for row in rest] == ["updated", "created"]
+    
+    @pytest.mark.asyncio
+    async def test_history_pages_split_timestamp_ties(self, storage):
+        """Test that rows sharing changed_at are neither skipped nor repeated."""
+        created = await storage.insert_task(make_record("Alpha"))
+        await storage.insert_history_many([
+            {"task_id": created["id"], "action": "updated", "changed_at": "2030-01-01T00:00:00+00:00"}
+            for _ in range(5)
+        ])
+        
+        seen, before = [], None
+        while True:
+            page = await storage.select_history(created["id"], limit=2, before=before)
+            if not page:
+                break
+            seen.extend(row["id"] for row in page)
+            before = (page[-1]["changed_at"], page[-1]["id"])
+        
+        assert seen == [row["id"] for row in await storage.select_history(created["id"])]
+        assert len(set(seen)) == 5
+    
+    @pytest.mark.asyncio
+    async def test_task_with_history(self, storage):
+        """Test fetching a task and a page of its history together."""
+        created = await storage.insert_task(make_record("Alpha"))
+        for action in ("created", "updated", "completed"):
+            await storage.insert_history({"task_id": created["id"], "action": action})
+        
+        task, history = await storage.get_task_with_history(created["id"], history_limit=2)
+        
+        assert task["title"] == "Alpha"
+        assert [row["action"] for row in history] == ["completed", "updated"]
+        assert await storage.get_task_with_history("missing") is None
+    
+    @pytest.mark.asyncio
+    async def test_updates_store_deltas_with_periodic_snapshots(self, storage):
+        """Test that logged updates keep changed fields only, except snapshots."""
+        created = await storage.insert_task(make_record("Alpha"))
+        await storage.insert_history({
+            "task_id": created["id"], "action": "created",
+            "new_value": created, "is_snapshot": True
+        })
+        for i in range(SNAPSHOT_INTERVAL):
+            await storage.update_task_logged(created["id"], {"title": f"Alpha {i}"}, "ops")
+        
+        history = await storage.select_history(created["id"])
+        
+        assert [row["seq"] for row in history] == list(range(SNAPSHOT_INTERVAL + 1, 0, -1))
+        assert [row["is_snapshot"] for row in history].count(True) == 2
+        delta = history[1]
+        assert delta["is_snapshot"] is False
+        assert delta["old_value"]["title"] == f"Alpha {SNAPSHOT_INTERVAL - 3}"
+        assert "description" not in delta["new_value"]
+        snapshot = history[0]
+        assert snapshot["new_value"]["title"] == f"Alpha {SNAPSHOT_INTERVAL - 1}"
+        assert snapshot["new_value"]["description"] == "Alpha description"
+    
+    @pytest.mark.asyncio
+    async def test_sqlite_numbers_history_across_connections(self, tmp_path):
+        """Test that workers sharing a database file never reuse a seq."""
+        path = str(tmp_path / "tasks.db")
+        workers = [SQLiteStorage(path), SQLiteStorage(path)]
+        created = await workers[0].insert_task(make_record("Alpha"))
+        
+        await asyncio.gather(*(
+            workers[i % 2].insert_history_many([{"task_id": created["id"], "action": "updated"}] * 3)
+            for i in range(20)
+        ))
+        history = await workers[1].select_history(created["id"])
+        for worker in workers:
+            worker.close()
+        
+        assert sorted(row["seq"] for row in history) == list(range(1, 61))
+        assert [row["is_snapshot"] for row in history].count(True) == 4
+    
+    @pytest.mark.asyncio
+    async def test_compacts_legacy_sqlite_history(self):
+        """Test rewriting rows stored with full old and new values."""
+        storage = SQLiteStorage(":memory:")
+        created = await storage.insert_task(make_record("Alpha"))
+        versions = [created] + [
+            {**created, "title": f"Alpha {i}"} for i in range(SNAPSHOT_INTERVAL + 2)
+        ]
+        with storage._lock:
+            for i, version in enumerate(versions):
+                storage._conn.execute(
+                    "INSERT INTO task_history (id, task_id, action, old_value, new_value, changed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (f"h{i:02}", created["id"], "created" if i == 0 else "updated",
+                     json.dumps(versions[i - 1]) if i else None, json.dumps(version),
+                     f"2024-01-01T00:00:{i:02}+00:00")
+                )
+        before = await storage.select_history(created["id"])
+        
+        assert await storage.compact_history(batch_size=10) == len(versions)
+        assert await storage.compact_history(batch_size=10) == 0
+        
+        after = await storage.select_history(created["id"])
+        assert [row["is_snapshot"] for row in after].count(True) == 2
+        assert after[1]["new_value"] == {"title": f"Alpha {SNAPSHOT_INTERVAL}"}
+        expanded = expand_history(after)
+        assert [row["new_value"] for row in expanded] == [row["new_value"] for row in before]
+        assert [row["old_value"] for row in expanded] == [row["old_value"] for row in before]
+        storage.close()
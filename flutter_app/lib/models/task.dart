@@ -156,6 +156,51 @@ class ExtractedEntities {
   }
 }
 
+// Dashboard counts over all tasks (GET /api/tasks/summary)
+class TaskSummary {
+  final int total;
+  final Map<TaskStatus, int> byStatus;
+  final Map<TaskCategory, int> byCategory;
+  final Map<TaskPriority, int> byPriority;
+  final int overdue;
+  final int dueSoon;
+
+  TaskSummary({
+    required this.total,
+    required this.byStatus,
+    required this.byCategory,
+    required this.byPriority,
+    required this.overdue,
+    required this.dueSoon,
+  });
+
+  factory TaskSummary.empty() {
+    return TaskSummary(
+      total: 0,
+      byStatus: {for (final status in TaskStatus.values) status: 0},
+      byCategory: {for (final category in TaskCategory.values) category: 0},
+      byPriority: {for (final priority in TaskPriority.values) priority: 0},
+      overdue: 0,
+      dueSoon: 0,
+    );
+  }
+
+  factory TaskSummary.fromJson(Map<String, dynamic> json) {
+    Map<T, int> counts<T extends Enum>(List<T> values, Map<String, dynamic> raw) {
+      return {for (final value in values) value: (raw[value.name] as int?) ?? 0};
+    }
+
+    return TaskSummary(
+      total: json['total'] as int,
+      byStatus: counts(TaskStatus.values, json['by_status'] as Map<String, dynamic>),
+      byCategory: counts(TaskCategory.values, json['by_category'] as Map<String, dynamic>),
+      byPriority: counts(TaskPriority.values, json['by_priority'] as Map<String, dynamic>),
+      overdue: json['overdue'] as int,
+      dueSoon: json['due_soon'] as int,
+    );
+  }
+}
+
 class CreateTaskDto {
   final String title;
   final String description;
@@ -1,3 +1,4 @@
+import 'dart:async';
 import 'package:flutter_riverpod/flutter_riverpod.dart';
 import '../models/task.dart';
 import '../services/api_service.dart';
@@ -19,13 +20,50 @@ class TaskListNotifier extends StateNotifier<AsyncValue<List<Task>>> {
   TaskCategory? _categoryFilter;
   TaskPriority? _priorityFilter;
   String? _searchQuery;
+  StreamSubscription<String>? _events;
+  Timer? _reloadTimer;
 
   TaskListNotifier(this._apiService) : super(const AsyncValue.loading()) {
     fetchTasks();
+    _listenForChanges();
   }
 
-  Future<void> fetchTasks() async {
-    state = const AsyncValue.loading();
+  // Reload when the server reports a change instead of polling; a burst of
+  // events causes a single reload
+  void _listenForChanges() {
+    _events = _apiService.watchTaskEvents().listen(
+      (_) {
+        _reloadTimer?.cancel();
+        _reloadTimer = Timer(const Duration(milliseconds: 300), () {
+          fetchTasks(showLoading: false);
+        });
+      },
+      onError: (_) => _reconnect(),
+      onDone: _reconnect,
+      cancelOnError: true,
+    );
+  }
+
+  // Listen again after the connection drops; changes made meanwhile are
+  // picked up by the reload
+  void _reconnect() {
+    if (!mounted) return;
+    _reloadTimer?.cancel();
+    _reloadTimer = Timer(const Duration(seconds: 3), () {
+      fetchTasks(showLoading: false);
+      _listenForChanges();
+    });
+  }
+
+  @override
+  void dispose() {
+    _events?.cancel();
+    _reloadTimer?.cancel();
+    super.dispose();
+  }
+
+  Future<void> fetchTasks({bool showLoading = true}) async {
+    if (showLoading) state = const AsyncValue.loading();
     try {
       final tasks = await _apiService.getTasks(
         status: _statusFilter,
@@ -95,34 +133,20 @@ class TaskListNotifier extends StateNotifier<AsyncValue<List<Task>>> {
   }
 }
 
+// Dashboard summary, computed server-side over all tasks; refetched
+// whenever the task list reloads (after every create, update or delete)
+final taskSummaryProvider = FutureProvider<TaskSummary>((ref) async {
+  ref.watch(taskListProvider);
+  return ref.watch(apiServiceProvider).getSummary();
+});
+
 // Task counts provider
 final taskCountsProvider = Provider<Map<TaskStatus, int>>((ref) {
-  final tasksAsync = ref.watch(taskListProvider);
-  
-  return tasksAsync.when(
-    data: (tasks) {
-      final counts = <TaskStatus, int>{
-        TaskStatus.pending: 0,
-        TaskStatus.in_progress: 0,
-        TaskStatus.completed: 0,
-      };
-      
-      for (final task in tasks) {
-        counts[task.status] = (counts[task.status] ?? 0) + 1;
-      }
-      
-      return counts;
-    },
-    loading: () => {
-      TaskStatus.pending: 0,
-      TaskStatus.in_progress: 0,
-      TaskStatus.completed: 0,
-    },
-    error: (_, __) => {
-      TaskStatus.pending: 0,
-      TaskStatus.in_progress: 0,
-      TaskStatus.completed: 0,
-    },
+  final summaryAsync = ref.watch(taskSummaryProvider);
+
+  return summaryAsync.maybeWhen(
+    data: (summary) => summary.byStatus,
+    orElse: () => TaskSummary.empty().byStatus,
   );
 });
 
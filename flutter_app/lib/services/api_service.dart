@@ -1,3 +1,4 @@
+import 'dart:convert';
 import 'package:dio/dio.dart';
 import '../models/task.dart';
 import 'dio_client.dart';
@@ -82,6 +83,51 @@ class ApiService {
     }
   }
 
+  // Get dashboard counts over all tasks
+  Future<TaskSummary> getSummary() async {
+    try {
+      final response = await _dio.get('/api/tasks/summary');
+
+      if (response.statusCode == 200) {
+        return TaskSummary.fromJson(response.data);
+      } else {
+        throw TaskApiException(
+          'Failed to fetch summary: ${response.statusMessage}',
+          response.statusCode,
+        );
+      }
+    } on DioException catch (e) {
+      throw _handleDioError(e);
+    }
+  }
+
+  // Names of the task change events pushed by the server ("created",
+  // "updated", "deleted", or "resync" after events were dropped).
+  // The server sends a keepalive every 15 seconds, within the receive timeout.
+  Stream<String> watchTaskEvents() async* {
+    try {
+      final response = await _dio.get<ResponseBody>(
+        '/api/tasks/stream',
+        options: Options(
+          responseType: ResponseType.stream,
+          headers: {'Accept': 'text/event-stream'},
+        ),
+      );
+
+      final lines = response.data!.stream
+          .cast<List<int>>()
+          .transform(utf8.decoder)
+          .transform(const LineSplitter());
+      await for (final line in lines) {
+        if (line.startsWith('event: ')) {
+          yield line.substring('event: '.length);
+        }
+      }
+    } on DioException catch (e) {
+      throw _handleDioError(e);
+    }
+  }
+
   // Get single task by ID
   Future<Task> getTask(String taskId) async {
     try {